@@ -2,20 +2,38 @@
 """
 Flask web application for ClipCheck - Reddit Misinformation Detection
 """
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import os
 import sys
-from flask import Flask, render_template, request, jsonify
-import joblib
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 import numpy as np
-from scipy.sparse import hstack
 from datetime import datetime, timedelta
 import hashlib
+import json
+import threading
 
 # Add backend directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 from backend.google_scraper import search_reddit_by_hashtag
-from backend.features import build_feature_matrix, TextVectorizer, clickbait_score
+from backend.post_store import PostStore
+from backend.driver_pool import get_driver_pool, import_browser_stack
+from backend.scrape_coordinator import scrape_many, iter_scrape, ScrapeResults
+from backend.features import TextVectorizer, feature_config, post_texts
+from backend.train_model import fit_model
+from backend.model_refresher import ModelRefresher, RefreshSkipped
+from backend.scrape_cache import ScrapeCache
+from backend.result_cache import ResultCache
+from backend.batch_scoring import score_posts, to_ndjson, clean_batch_post
+from backend.jobs import JobQueue, QueueFull
+from backend.metrics import REGISTRY, CONTENT_TYPE, STAGE_SECONDS, time_stage
+from backend.model_artifacts import load_artifacts, ArtifactError, MODEL_ARTIFACT_DIR
+from backend.compiled_scorer import CompiledScorer
+from backend.warmup import Warmup
+from backend.deadline import Deadline, DeadlineExceeded
+from backend.rate_limiter import get_rate_limiter, CircuitOpen, PRIORITY_USER, PRIORITY_BATCH, PRIORITY_TRAINING
 
 app = Flask(__name__)
 
@@ -25,43 +43,333 @@ VECT_PATH = os.path.join("backend", "tfidf_vectorizer.joblib")
 
 # Global model cache
 _model_cache = {}
+_model_cache_lock = threading.RLock()
 
-# Cache for scraping results (hashtag -> {data, timestamp})
-# Results expire after 1 hour
-_scrape_cache = {}
+# Cache for scraping results (hashtag -> post list)
+# Results expire after 1 hour; see backend/scrape_cache.py for size limits and
+# the optional SQLite store (SCRAPE_CACHE_DB) shared across worker processes
 CACHE_EXPIRY_HOURS = 1
+_scrape_cache = ScrapeCache(ttl=CACHE_EXPIRY_HOURS * 3600)
+
+# Finished analyses (hashtag, model version -> serialized payload), served with
+# ETag/Last-Modified so repeat hashtags skip scraping, scoring and serialization
+_result_cache = ResultCache(ttl=CACHE_EXPIRY_HOURS * 3600)
+
+# Trained models (corpus fingerprint -> {clf, vectorizer, accuracies, timestamp}).
+# Reused while the training scrapes are unchanged, for at most CACHE_EXPIRY_HOURS.
+_trained_models = {}
+_trained_models_lock = threading.Lock()
+
+# Seconds an analysis may spend scraping before it answers with what it has
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "45"))
+
+# Training hashtags: posts from these are labeled misinformation (1) / normal (0)
+MISINFO_TAGS = ["#conspiracy", "#leaked", "#exposed"]
+NORMAL_TAGS = ["#gaming", "#technology", "#help"]
+TAG_LABELS = dict([(tag, 1) for tag in MISINFO_TAGS] + [(tag, 0) for tag in NORMAL_TAGS])
+
+# Every scraped post once, keyed by normalized URL, with the hashtags it was seen
+# under and its cached engineered feature row (see backend/post_store.py)
+_post_store = PostStore()
 
 def get_cached_scrape(hashtag):
     """Get cached scraping results if available and not expired"""
-    if hashtag in _scrape_cache:
-        cache_entry = _scrape_cache[hashtag]
-        age = datetime.now() - cache_entry['timestamp']
-        if age < timedelta(hours=CACHE_EXPIRY_HOURS):
-            return cache_entry['data']
-    return None
+    return _scrape_cache.get(hashtag)
 
 def set_cached_scrape(hashtag, data):
     """Cache scraping results with timestamp"""
-    _scrape_cache[hashtag] = {
-        'data': data,
-        'timestamp': datetime.now()
-    }
+    _scrape_cache.set(hashtag, data)
+
+def _on_scrape_cached(hashtag, data):
+    _post_store.add_many(data, hashtag)
+    # New posts for the hashtag make its stored analysis stale
+    _result_cache.invalidate(hashtag)
+    # A refreshed training scrape changes the corpus, so cached models are stale
+    if hashtag in MISINFO_TAGS or hashtag in NORMAL_TAGS:
+        with _trained_models_lock:
+            _trained_models.clear()
+
+_scrape_cache.add_listener(_on_scrape_cached)
+
+# Exported on /metrics (per-stage latencies are recorded with time_stage)
+FALLBACK_TRAINING = REGISTRY.counter(
+    "clipcheck_fallback_training_total", "Trainings that used the hand-written fallback corpus")
+INLINE_TRAINING = REGISTRY.counter(
+    "clipcheck_inline_training_total", "Cold-start requests that scraped and trained inline")
+REGISTRY.gauge("clipcheck_scrape_cache_hit_ratio", "Scrape cache hits / lookups",
+               fn=lambda: _scrape_cache.stats()["hit_ratio"])
+REGISTRY.gauge("clipcheck_scrape_cache_entries", "Hashtags held in the scrape cache",
+               fn=lambda: _scrape_cache.stats()["entries"])
+REGISTRY.callback_counter("clipcheck_scrape_cache_lookups_total", "Scrape cache lookups by result",
+                          labelnames=("result",),
+                          fn=lambda: {("hit",): _scrape_cache.stats()["hits"],
+                                      ("miss",): _scrape_cache.stats()["misses"]})
+REGISTRY.callback_counter("clipcheck_scrape_cache_evictions_total", "Scrape cache LRU evictions",
+                          fn=lambda: _scrape_cache.stats()["evictions"])
+REGISTRY.gauge("clipcheck_scrape_paused", "1 while the circuit breaker holds back scrapes",
+               fn=lambda: int(get_rate_limiter().state != "closed"))
+REGISTRY.gauge("clipcheck_result_cache_entries", "Finished analyses held in the result cache",
+               fn=lambda: _result_cache.stats()["entries"])
+REGISTRY.callback_counter("clipcheck_result_cache_lookups_total", "Result cache lookups by outcome",
+                          labelnames=("result",),
+                          fn=lambda: {("hit",): _result_cache.hits, ("miss",): _result_cache.misses,
+                                      ("not_modified",): _result_cache.not_modified})
+
+def scrape_with_cache(hashtag, num_results=10, deadline=None, priority=PRIORITY_USER):
+    """
+    Return cached posts for a hashtag, scraping (and caching) on a miss.
+    Concurrent requests for the same uncached hashtag share one scrape.
+    deadline bounds the scrape (or the wait for another request's scrape);
+    posts cut short by it are returned with .partial set and not cached.
+    priority orders the scrape on the shared rate limit (see rate_limiter.py).
+    """
+    fetch_seconds = 0.0
 
-def load_model():
-    """Load the trained model and vectorizer"""
-    if 'clf' not in _model_cache:
-        try:
-            clf = joblib.load(MODEL_PATH)
-            tfidf = joblib.load(VECT_PATH)
+    def scrape():
+        nonlocal fetch_seconds
+        start = time.perf_counter()
+        posts = search_reddit_by_hashtag(hashtag, num_results=num_results, deadline=deadline, priority=priority)
+        fetch_seconds = time.perf_counter() - start
+        app.logger.info(f"  Scraped {len(posts)} from {hashtag}")
+        return posts
+
+    start = time.perf_counter()
+    try:
+        posts = _scrape_cache.get_or_fetch(hashtag, scrape, timeout=deadline.remaining() if deadline else None)
+    except TimeoutError:
+        raise DeadlineExceeded(f"Time budget ran out waiting for the scrape of {hashtag}")
+    # Lookup overhead only; the scrape itself is recorded as the "search" stage
+    STAGE_SECONDS.observe(max(0.0, time.perf_counter() - start - fetch_seconds), stage="cache_lookup")
+    return posts
+
+def corpus_fingerprint(training_posts, training_labels):
+    """Stable hash of the training corpus plus the feature configuration"""
+    payload = json.dumps({
+        "posts": training_posts,
+        "labels": [int(y) for y in training_labels],
+        "features": feature_config(),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def train_classifier(training_posts, training_labels):
+    """Fit the vectorizer and classifier on a corpus via the train_model.py pipeline"""
+    engineered = _post_store.engineered(training_posts)
+    model = fit_model(training_posts, training_labels, engineered=engineered)
+    app.logger.info(f"Model trained - Train accuracy: {model['train_acc'] * 100:.1f}%, "
+                    f"Test accuracy: {model['test_acc'] * 100:.1f}%")
+    model['scorer'] = compile_scorer(model['clf'], model['vectorizer'], post_texts(training_posts), engineered[0])
+    return model
+
+def compile_scorer(clf, vectorizer, texts, X_eng):
+    """NumPy-only scorer for the model, checked against sklearn on texts (None if it can't be used)"""
+    try:
+        scorer = CompiledScorer.from_model(clf, vectorizer)
+        scorer.validate(clf, vectorizer, texts, X_eng)
+        return scorer
+    except (ValueError, AttributeError) as e:
+        app.logger.warning(f"Compiled scorer disabled, scoring with sklearn: {e}")
+        return None
+
+def get_trained_model(training_posts, training_labels):
+    """Return a fitted model for this corpus, training only when the cache has no match"""
+    key = corpus_fingerprint(training_posts, training_labels)
+    with _trained_models_lock:
+        entry = _trained_models.get(key)
+        if entry and datetime.now() - entry['timestamp'] < timedelta(hours=CACHE_EXPIRY_HOURS):
+            app.logger.info(f"Reusing trained model {key[:12]}")
+            return entry
+
+    model = train_classifier(training_posts, training_labels)
+    model['timestamp'] = datetime.now()
+    with _trained_models_lock:
+        # Only the current corpus is worth keeping
+        _trained_models.clear()
+        _trained_models[key] = model
+    return model
+
+def build_training_corpus(scraped):
+    """
+    Turn scraped training hashtags into (posts, labels, info).
+    Posts are deduplicated through the post store: a post seen under several
+    training hashtags is kept once, labeled by the first of them in TAG_LABELS.
+    Falls back to a minimal hand-written corpus when nothing could be scraped
+    (info["fallback"] is then True).
+    """
+    failed_tags = []
+    keys = []
+    for train_tag in MISINFO_TAGS + NORMAL_TAGS:
+        if train_tag in scraped.errors:
+            app.logger.warning(f"  Failed to scrape {train_tag}: {scraped.errors[train_tag].reason}")
+            failed_tags.append(train_tag)
+            continue
+        keys.extend(_post_store.keys_for(scraped.get(train_tag, []), train_tag))
+    training_posts, training_labels = _post_store.training_set(TAG_LABELS, keys=dict.fromkeys(keys))
+
+    # If we got NO training data at all (or only one class), use minimal fallback
+    fallback = len(set(training_labels)) < 2
+    if fallback:
+        app.logger.warning("Training data is missing a class - adding minimal fallback")
+        FALLBACK_TRAINING.inc()
+        training_posts += [
+            {"title": "BREAKING NEWS: Miracle cure CONFIRMED!!!", "snippet": "They don't want you to know", "subreddit": "conspiracy", "rank": 1},
+            {"title": "Secret documents LEAKED - government coverup", "snippet": "PROOF inside", "subreddit": "conspiracy", "rank": 1},
+            {"title": "How to build a gaming PC", "snippet": "Discussion and advice", "subreddit": "buildapc", "rank": 1},
+            {"title": "Best monitor for productivity?", "snippet": "Looking for recommendations", "subreddit": "monitors", "rank": 1},
+        ]
+        training_labels += [1, 1, 0, 0]
+
+    app.logger.info(f"Total training samples: {len(training_posts)}")
+    return training_posts, np.array(training_labels), {"failed_tags": failed_tags, "fallback": fallback}
+
+def refresh_scrape(hashtag, num_results=10):
+    """Scrape a hashtag unconditionally and store the result in the cache"""
+    posts = search_reddit_by_hashtag(hashtag, num_results=num_results, priority=PRIORITY_TRAINING)
+    if posts:
+        set_cached_scrape(hashtag, posts)
+    return posts
+
+def collect_training_corpus():
+    """
+    Re-scrape every training hashtag for the background refresher.
+    Raises RefreshSkipped when every scrape failed or a class is missing: a model
+    trained on the fallback corpus must not replace the one being served.
+    """
+    scraped = scrape_many(MISINFO_TAGS + NORMAL_TAGS, refresh_scrape)
+    training_posts, training_labels, info = build_training_corpus(scraped)
+    if info["fallback"] or len(info["failed_tags"]) == len(MISINFO_TAGS + NORMAL_TAGS):
+        failed = ", ".join(info["failed_tags"]) or "none"
+        raise RefreshSkipped(f"Training scrapes came back without both classes (failed: {failed}); "
+                             "keeping the current model")
+    return training_posts, training_labels, info
+
+# Background retraining; /analyze serves whatever model it last published
+model_refresher = ModelRefresher(collect_training_corpus, train_classifier)
+
+def get_served_model():
+    """The refresher's current model, unless it is missing or has gone stale"""
+    model = model_refresher.current()
+    if model is None:
+        return None
+    max_age = timedelta(seconds=max(2 * model_refresher.interval, CACHE_EXPIRY_HOURS * 3600))
+    if datetime.now() - model["trained_at"] > max_age:
+        return None
+    return model
+
+def start_background_refresher():
+    """Start periodic re-scraping and retraining off the request path"""
+    model_refresher.start()
+
+def load_offline_model():
+    """
+    Load the offline model once. The memory-mapped artifacts in MODEL_ARTIFACT_DIR
+    (see backend/model_artifacts.py) are preferred and give a compiled scorer, so
+    no sklearn import is needed; the .joblib files are the fallback when no valid
+    manifest is present.
+    """
+    with _model_cache_lock:
+        if 'version' not in _model_cache:
+            try:
+                artifacts = load_artifacts(MODEL_ARTIFACT_DIR)
+                _model_cache['artifacts'] = artifacts
+                _model_cache['scorer'] = CompiledScorer.from_artifacts(MODEL_ARTIFACT_DIR, verify=False)
+                _model_cache['version'] = artifacts.version
+                return _model_cache
+            except ArtifactError as e:
+                app.logger.warning(f"Model artifacts unavailable ({e}); loading .joblib files")
+            try:
+                import joblib
+                clf = joblib.load(MODEL_PATH)
+                tfidf = joblib.load(VECT_PATH)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    "Model files not found. Please run 'python backend/train_model.py' first."
+                )
             vec = TextVectorizer()
             vec.tfidf = tfidf
-            _model_cache['clf'] = clf
-            _model_cache['vec'] = vec
-        except FileNotFoundError:
-            raise FileNotFoundError(
-                "Model files not found. Please run 'python backend/train_model.py' first."
-            )
-    return _model_cache['clf'], _model_cache['vec']
+            _model_cache['clf'], _model_cache['vec'] = clf, vec
+            _model_cache['scorer'] = None
+            _model_cache['version'] = "joblib"
+    return _model_cache
+
+
+def load_model():
+    """The offline model and vectorizer as sklearn objects"""
+    cache = load_offline_model()
+    if 'clf' not in cache:
+        with _model_cache_lock:
+            cache['vec'] = cache['artifacts'].vectorizer
+            cache['clf'] = cache['artifacts'].clf
+    return cache['clf'], cache['vec']
+
+
+def preload_model():
+    """Load the offline model at import time so no request pays for it (errors surface on /health)"""
+    try:
+        load_offline_model()
+    except Exception as e:
+        app.logger.warning(f"Offline model not loaded at startup: {e}")
+
+preload_model()
+
+
+def get_scoring_model():
+    """
+    Model for batch scoring: the served model if fresh, otherwise the offline artifact.
+    returns: (clf, vectorizer, version label, compiled scorer or None); clf and
+    vectorizer are None when the scorer is set
+    """
+    model = get_served_model()
+    if model is not None:
+        return model['clf'], model['vectorizer'], f"v{model['version']}", model.get('scorer')
+    cache = load_offline_model()
+    if cache['scorer'] is not None:
+        return None, None, f"offline-{cache['version']}", cache['scorer']
+    clf, vec = load_model()
+    return clf, vec, f"offline-{cache['version']}", None
+
+
+# Warm-up: everything a first request would otherwise pay for (the sklearn/SciPy and
+# Selenium imports, model loading, Chrome startup), and starting the model refresher.
+# It runs after the server starts (under a WSGI server: from a post-fork hook or the
+# first /ready probe); GET /ready answers 503 until it has finished.
+WARMUP_BROWSERS = os.getenv("WARMUP_BROWSERS", "true").lower() == "true"
+
+def _warm_ml_stack():
+    """Import the training stack and build the offline sklearn objects"""
+    import scipy.sparse
+    import sklearn.linear_model
+    import sklearn.model_selection
+    import sklearn.feature_extraction.text
+    load_model()
+
+def _warm_scoring():
+    """Score a probe post on the compiled and sklearn paths"""
+    probe = [{"rank": 1, "title": "Warm-up probe", "snippet": "startup check", "subreddit": "test"}]
+    scorer = load_offline_model()['scorer']
+    if scorer is not None:
+        score_posts(probe, None, None, scorer=scorer)
+    score_posts(probe, *load_model())
+
+def _warm_browsers():
+    pool = get_driver_pool()
+    app.logger.info(f"Warming browser pool ({pool.size} drivers)...")
+    pool.warm()
+
+warmup = Warmup([
+    ("offline_model", load_offline_model),
+    ("model_refresher", start_background_refresher),
+    ("ml_stack", _warm_ml_stack),
+    ("scoring", _warm_scoring),
+    ("browser_stack", import_browser_stack),
+])
+if WARMUP_BROWSERS:
+    warmup.add("browser_pool", _warm_browsers)
+
+REGISTRY.gauge("clipcheck_ready", "1 once warm-up has finished", fn=lambda: int(warmup.ready))
+REGISTRY.gauge("clipcheck_startup_seconds", "App import and warm-up step durations",
+               labelnames=("phase",),
+               fn=lambda: dict([(("import",), warmup.import_seconds or 0.0)] +
+                               [((name,), seconds) for name, seconds in warmup.timings.items()]))
 
 
 @app.route('/')
@@ -70,157 +378,119 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
+class AnalysisError(Exception):
+    """An analysis that cannot produce results; carries the HTTP status to report"""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def normalize_hashtag(raw):
+    """Strip whitespace and add a leading '#'; returns '' for blank input"""
+    hashtag = (raw or '').strip()
+    if hashtag and not hashtag.startswith('#'):
+        hashtag = '#' + hashtag
+    return hashtag
+
+
+def run_analysis(hashtag, deadline=None):
     """
-    Real-time analysis: Scrape, train, predict - all on-demand with fresh data.
-    No pre-trained model needed - everything happens when user clicks analyze.
+    Scrape, train (if needed) and score a hashtag, yielding (event, data) pairs as
+    each stage completes: "stage", "scraped" (per hashtag), "model", "post" (per
+    scored post) and finally "complete" with the full response payload.
+    deadline (default: ANALYSIS_DEADLINE_SECONDS from now) is passed to every
+    scrape; whatever was cut short by it is listed in the response's
+    "partial_reasons" and "partial" is set.
+    Raises AnalysisError when no results can be produced.
     """
-    try:
-        data = request.get_json()
-        if not data or 'hashtag' not in data:
-            return jsonify({"error": "No hashtag provided"}), 400
-
-        hashtag = data['hashtag'].strip()
-        if not hashtag:
-            return jsonify({"error": "Please provide a hashtag"}), 400
-
-        if not hashtag.startswith('#'):
-            hashtag = '#' + hashtag
-
-        app.logger.info(f"=== Starting real-time analysis for: {hashtag} ===")
-
-        # STEP 1: Scrape user's requested posts (with caching)
-        app.logger.info("STEP 1: Scraping user's requested posts...")
-        cached_user_posts = get_cached_scrape(hashtag)
-        if cached_user_posts:
-            user_posts = cached_user_posts
-            app.logger.info(f"Using cached results for {hashtag}")
-        else:
-            user_posts = search_reddit_by_hashtag(hashtag, num_results=10)
-            if user_posts:
-                set_cached_scrape(hashtag, user_posts)
-                app.logger.info(f"Scraped and cached {len(user_posts)} posts for {hashtag}")
-
-        if not user_posts:
-            return jsonify({"error": f"No Reddit posts found for {hashtag}. Try another hashtag."}), 404
-
-        app.logger.info(f"Found {len(user_posts)} posts for user query")
-
-        # STEP 2: Scrape fresh training data (with caching)
-        app.logger.info("STEP 2: Scraping fresh training data...")
-        training_posts = []
-        training_labels = []
-
-        # Scrape misinformation-prone hashtags for positive examples
-        for train_tag in ["#conspiracy", "#leaked", "#exposed"]:
-            try:
-                cached_posts = get_cached_scrape(train_tag)
-                if cached_posts:
-                    posts = cached_posts
-                    app.logger.info(f"  Using cached data for {train_tag}")
-                else:
-                    posts = search_reddit_by_hashtag(train_tag, num_results=10)
-                    if posts:
-                        set_cached_scrape(train_tag, posts)
-                        app.logger.info(f"  Scraped and cached {len(posts)} from {train_tag}")
-                training_posts.extend(posts)
-                training_labels.extend([1] * len(posts))  # Label as misinformation
-            except Exception as e:
-                app.logger.warning(f"  Failed to scrape {train_tag}: {e}")
-
-        # Scrape normal hashtags for negative examples
-        for train_tag in ["#gaming", "#technology", "#help"]:
-            try:
-                cached_posts = get_cached_scrape(train_tag)
-                if cached_posts:
-                    posts = cached_posts
-                    app.logger.info(f"  Using cached data for {train_tag}")
-                else:
-                    posts = search_reddit_by_hashtag(train_tag, num_results=10)
-                    if posts:
-                        set_cached_scrape(train_tag, posts)
-                        app.logger.info(f"  Scraped and cached {len(posts)} from {train_tag}")
-                training_posts.extend(posts)
-                training_labels.extend([0] * len(posts))  # Label as normal
-            except Exception as e:
-                app.logger.warning(f"  Failed to scrape {train_tag}: {e}")
-
-        # If we got NO training data at all, use minimal fallback
-        if len(training_posts) == 0:
-            app.logger.warning("No training data scraped - using minimal fallback")
-            training_posts = [
-                {"title": "BREAKING NEWS: Miracle cure CONFIRMED!!!", "snippet": "They don't want you to know", "subreddit": "conspiracy", "rank": 1},
-                {"title": "Secret documents LEAKED - government coverup", "snippet": "PROOF inside", "subreddit": "conspiracy", "rank": 1},
-                {"title": "How to build a gaming PC", "snippet": "Discussion and advice", "subreddit": "buildapc", "rank": 1},
-                {"title": "Best monitor for productivity?", "snippet": "Looking for recommendations", "subreddit": "monitors", "rank": 1},
-            ]
-            training_labels = [1, 1, 0, 0]
-
-        training_labels = np.array(training_labels)
-        app.logger.info(f"Total training samples: {len(training_posts)}")
-
-        # STEP 3: Train model on fresh data
+    deadline = deadline or Deadline(ANALYSIS_DEADLINE_SECONDS)
+    partial_reasons = []
+    app.logger.info(f"=== Starting real-time analysis for: {hashtag} ===")
+    yield "stage", {"stage": "scraping", "hashtag": hashtag}
+
+    model = get_served_model()
+    if model is not None:
+        # Fast path: the background refresher keeps a trained model ready,
+        # so only the user's hashtag needs scraping.
+        app.logger.info(f"STEP 1: Scraping user's posts (serving model v{model['version']})...")
+        try:
+            user_posts = scrape_with_cache(hashtag, deadline=deadline)
+        except DeadlineExceeded as e:
+            raise AnalysisError(f"Scraping {hashtag} did not finish in time: {e}", 504)
+        except CircuitOpen as e:
+            raise AnalysisError(f"{e}. Please retry shortly.", 503)
+        yield "scraped", {"hashtag": hashtag, "role": "user", "posts": len(user_posts or []), "error": None}
+    else:
+        # Cold start: scrape the user's hashtag and the training hashtags concurrently
+        # (the user's hashtag goes first on the shared rate limit)
+        app.logger.info("STEP 1-2: Scraping user's posts and fresh training data...")
+        scraped = ScrapeResults()
+        start = time.monotonic()
+
+        def scrape(tag):
+            priority = PRIORITY_USER if tag == hashtag else PRIORITY_TRAINING
+            return scrape_with_cache(tag, deadline=deadline, priority=priority)
+
+        for tag, posts, error in iter_scrape([hashtag] + MISINFO_TAGS + NORMAL_TAGS, scrape, deadline=deadline):
+            scraped.add(tag, posts, error)
+            yield "scraped", {"hashtag": tag, "role": "user" if tag == hashtag else "training",
+                              "posts": len(posts), "error": error and error.reason}
+        app.logger.info(f"Scraping finished in {time.monotonic() - start:.1f}s")
+
+        if hashtag in scraped.errors:
+            error = scraped.errors[hashtag]
+            if deadline.expired or error.status == 504:
+                raise AnalysisError(f"Scraping {hashtag} did not finish in time: {error.reason}", 504)
+            if error.status == CircuitOpen.status:
+                raise AnalysisError(f"{error.reason}. Please retry shortly.", 503)
+            raise RuntimeError(f"Scraping {hashtag} failed: {error.reason}")
+        user_posts = scraped.get(hashtag)
+        failed_training = [tag for tag in MISINFO_TAGS + NORMAL_TAGS if tag in scraped.errors]
+        if failed_training:
+            partial_reasons.append(f"trained without {', '.join(failed_training)}")
+
+    if getattr(user_posts, "partial", False):
+        partial_reasons.append(f"time budget ran out after {len(user_posts)} posts of {hashtag}")
+
+    if not user_posts:
+        raise AnalysisError(f"No Reddit posts found for {hashtag}. Try another hashtag.", 404)
+
+    app.logger.info(f"Found {len(user_posts)} posts for user query")
+
+    if model is None:
+        training_posts, training_labels, info = build_training_corpus(scraped)
+
+        # STEP 3: Train model on fresh data (reused while the training corpus is unchanged)
+        yield "stage", {"stage": "training", "samples": len(training_posts)}
         app.logger.info("STEP 3: Training model on fresh data...")
-        X_text, X_eng, vectorizer = build_feature_matrix(training_posts, vectorizer=None)
-        X_all = hstack([X_text, X_eng])
-
-        from sklearn.linear_model import LogisticRegression
-        from sklearn.model_selection import train_test_split
-
-        # Split data for validation
-        if len(training_posts) >= 10:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_all, training_labels, test_size=0.2, random_state=42, stratify=training_labels
-            )
-            clf = LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced')
-            clf.fit(X_train, y_train)
-
-            train_acc = clf.score(X_train, y_train)
-            test_acc = clf.score(X_test, y_test)
-            app.logger.info(f"Model trained - Train accuracy: {train_acc * 100:.1f}%, Test accuracy: {test_acc * 100:.1f}%")
-
-            # Retrain on all data for prediction
-            clf.fit(X_all, training_labels)
-        else:
-            # Not enough data for split, just train on all
-            clf = LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced')
-            clf.fit(X_all, training_labels)
-            train_acc = clf.score(X_all, training_labels)
-            test_acc = train_acc
-            app.logger.info(f"Model trained - accuracy: {train_acc * 100:.1f}% (no test split - insufficient data)")
-
-        # STEP 4: Predict on user's posts
-        app.logger.info("STEP 4: Predicting misinformation likelihood...")
-        X_text_user, X_eng_user, _ = build_feature_matrix(user_posts, vectorizer=vectorizer)
-        X_user = hstack([X_text_user, X_eng_user])
-        probs = clf.predict_proba(X_user)[:, 1]
-
-        # STEP 5: Build results
-        posts = []
-        for i, rec in enumerate(user_posts):
-            misinfo_score = float(probs[i] * 100)
-
-            text = " ".join(filter(None, [rec.get("title", ""), rec.get("snippet", "")]))
-            cb_score = clickbait_score(text)
-
-            keywords = [k for k in ["confirmed", "leaked", "official", "proof", "cure",
-                                   "exposed", "fake", "scam", "rumor", "conspiracy", "hoax"]
-                       if k in text.lower()]
-
-            posts.append({
-                "rank": rec.get("rank", i + 1),
-                "title": rec.get("title", ""),
-                "url": rec.get("url", ""),
-                "snippet": rec.get("snippet", "")[:250],
-                "subreddit": rec.get("subreddit", ""),
-                "date": rec.get("date_snippet", ""),
-                "misinfo_score": round(misinfo_score, 1),
-                "clickbait_score": round(cb_score, 3),
-                "keywords": keywords,
-                "risk_level": "high" if misinfo_score >= 70 else "medium" if misinfo_score >= 40 else "low"
-            })
-
+        INLINE_TRAINING.inc()
+        model = dict(get_trained_model(training_posts, training_labels), **info)
+        model = model_refresher.publish(model)
+
+    clf, vectorizer = model['clf'], model['vectorizer']
+    train_acc, test_acc = model['train_acc'], model['test_acc']
+
+    training_info = {
+        "samples_scraped": model['n_samples'],
+        "failed_tags": model.get('failed_tags', []),
+        "model_version": model['version'],
+        "train_accuracy": f"{train_acc * 100:.1f}%",
+        "test_accuracy": f"{test_acc * 100:.1f}%"
+    }
+    yield "model", training_info
+
+    # STEP 4-5: Predict on user's posts and build results
+    # (clickbait scores and keywords come from the same feature pass)
+    app.logger.info("STEP 4: Predicting misinformation likelihood...")
+    _post_store.keys_for(user_posts, hashtag)
+    probs, posts = score_posts(user_posts, clf, vectorizer, engineered=_post_store.engineered(user_posts),
+                               scorer=model.get('scorer'))
+    for post in posts:
+        yield "post", post
+
+    with time_stage("build_response"):
         # Statistics
         avg_score = float(np.mean(probs) * 100)
         max_score = float(np.max(probs) * 100)
@@ -241,36 +511,338 @@ def analyze():
                 "medium_risk_count": medium_risk_count,
                 "low_risk_count": low_risk_count
             },
-            "training_info": {
-                "samples_scraped": len(training_posts),
-                "train_accuracy": f"{train_acc * 100:.1f}%",
-                "test_accuracy": f"{test_acc * 100:.1f}%"
-            }
+            "training_info": training_info,
+            "partial": bool(partial_reasons),
+            "partial_reasons": partial_reasons
         }
 
-        app.logger.info(f"=== Analysis complete for {hashtag} ===")
-        return jsonify(response), 200
+    app.logger.info(f"=== Analysis complete for {hashtag} ===")
+    yield "complete", response
+
+
+def analysis_job(hashtag):
+    """
+    Job runner: run_analysis with unexpected failures reported as AnalysisError.
+    Complete (non-partial) payloads are stored in the result cache.
+    """
+    try:
+        with time_stage("analysis"):
+            for event, data in run_analysis(hashtag):
+                if event == "complete" and not data["partial"]:
+                    _result_cache.set(hashtag, data["training_info"]["model_version"], data)
+                yield event, data
+    except AnalysisError:
+        raise
+    except Exception as e:
+        app.logger.exception(f"Analysis of {hashtag} failed")
+        raise AnalysisError(f"Analysis failed: {str(e)}", 500)
+
+
+# Analyses run on a bounded worker pool; identical in-flight hashtags share one job
+analysis_jobs = JobQueue(analysis_job, error_event="analysis_error")
+
+REGISTRY.gauge("clipcheck_job_queue_depth", "Analysis jobs waiting for a worker",
+               fn=lambda: analysis_jobs.stats()["queue_depth"])
+REGISTRY.gauge("clipcheck_jobs_running", "Analysis jobs currently running",
+               fn=lambda: analysis_jobs.stats()["running"])
+REGISTRY.callback_counter("clipcheck_jobs_rejected_total", "Analysis requests refused with 429",
+                          fn=lambda: analysis_jobs.stats()["rejected"])
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT_SECONDS = 15
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # don't let a reverse proxy buffer the stream
+    })
+
+
+def job_events(job):
+    """Replay a job's events so far, then follow it live until it finishes"""
+    sent = 0
+    while True:
+        events, done = job.wait_events(sent, timeout=SSE_HEARTBEAT_SECONDS)
+        if not events and not done:
+            yield ": keep-alive\n\n"
+            continue
+        for event in events:
+            yield sse_event(*event)
+        sent += len(events)
+        if done and sent == len(job.events):
+            return
+
+
+def job_links(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    }
+
+
+def cached_analysis(hashtag):
+    """The stored analysis of hashtag by the model currently being served, or None"""
+    model = get_served_model()
+    if model is None:
+        return None
+    return _result_cache.get(hashtag, model['version'])
+
+
+def cached_result_response(entry):
+    """
+    Serve a CachedResult: 304 when the client's If-None-Match / If-Modified-Since
+    still match, otherwise the stored JSON (gzipped when accepted and worthwhile).
+    """
+    gzipped = entry.gzipped is not None and request.accept_encodings['gzip'] > 0
+    response = Response(entry.gzipped if gzipped else entry.body, mimetype='application/json')
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    # Weak: the gzip and identity bodies are the same representation
+    response.set_etag(entry.etag, weak=True)
+    response.last_modified = entry.last_modified
+    response.headers['Cache-Control'] = 'public, no-cache'  # store, but revalidate before reuse
+    response.make_conditional(request)
+    if response.status_code == 304:
+        _result_cache.not_modified += 1
+    return response
+
+
+def cached_events(payload):
+    """Replay a stored analysis as the events a live one would end with"""
+    yield sse_event("model", payload["training_info"])
+    for post in payload["posts"]:
+        yield sse_event("post", post)
+    yield sse_event("complete", payload)
+
+
+def queue_full_response(e):
+    response = jsonify({"error": "Server is busy, please retry shortly", "retry_after": e.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+@app.route('/analyze', methods=['GET', 'POST'])
+def analyze():
+    """
+    Analyze a hashtag ({"hashtag": ...} body, or ?hashtag= on GET).
+    If the current model already analyzed it, the stored result is returned with
+    200 (or 304 for a matching If-None-Match / If-Modified-Since). Otherwise a
+    real-time analysis (scrape, train if needed, predict) is queued: 202 with the
+    job id; poll /jobs/<id> or subscribe to /jobs/<id>/events for the result.
+    Returns 429 with Retry-After when the queue is full.
+    """
+    if request.method == 'GET':
+        data = request.args
+    else:
+        data = request.get_json(silent=True)
+    if not data or 'hashtag' not in data:
+        return jsonify({"error": "No hashtag provided"}), 400
+
+    hashtag = normalize_hashtag(data['hashtag'])
+    if not hashtag:
+        return jsonify({"error": "Please provide a hashtag"}), 400
+
+    cached = cached_analysis(hashtag)
+    if cached is not None:
+        return cached_result_response(cached)
+
+    try:
+        job, created = analysis_jobs.submit(hashtag)
+    except QueueFull as e:
+        return queue_full_response(e)
+
+    if not created:
+        app.logger.info(f"Joining in-flight analysis {job.id} for {hashtag}")
+    response = jsonify(job_links(job))
+    response.status_code = 202
+    response.headers['Location'] = f"/jobs/{job.id}"
+    return response
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll an analysis job; includes the result once it is done"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/jobs/<job_id>/events')
+def job_stream(job_id):
+    """
+    Subscribe to an analysis job (Server-Sent Events): replays the events so far,
+    then emits each stage as it completes, ending with "complete" or "analysis_error".
+    """
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return sse_response(job_events(job))
+
+
+@app.route('/analyze/stream')
+def analyze_stream():
+    """
+    Queue an analysis and subscribe to it in one request (Server-Sent Events).
+    A stored result is replayed from the result cache without queueing.
+    A full queue is reported as an "analysis_error" event with status 429.
+    """
+    hashtag = normalize_hashtag(request.args.get('hashtag'))
+    if not hashtag:
+        return jsonify({"error": "Please provide a hashtag"}), 400
+
+    cached = cached_analysis(hashtag)
+    if cached is not None:
+        return sse_response(cached_events(cached.payload))
+
+    try:
+        job, _ = analysis_jobs.submit(hashtag)
+    except QueueFull as e:
+        return sse_response(iter([sse_event("analysis_error", {
+            "error": "Server is busy, please retry shortly", "status": 429, "retry_after": e.retry_after
+        })]))
+    return sse_response(job_events(job))
+
+
+# Upper bound on hashtags scraped by one /batch_score call
+MAX_BATCH_HASHTAGS = 50
+
+def parse_batch_request():
+    """
+    (posts, hashtags) from a /batch_score body, validated (see clean_batch_post).
+    Raises ValueError describing the first problem.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        posts = []
+        for number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number} is not valid JSON: {e}")
+            posts.append(clean_batch_post(rec, f"line {number}"))
+        return posts, []
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ValueError("Body must be a JSON object")
+
+    posts = data.get('posts') or []
+    if not isinstance(posts, list):
+        raise ValueError("'posts' must be a list of objects")
+    posts = [clean_batch_post(rec, f"posts[{i}]") for i, rec in enumerate(posts)]
+
+    hashtags = data.get('hashtags') or []
+    if not isinstance(hashtags, list) or not all(isinstance(t, str) for t in hashtags):
+        raise ValueError("'hashtags' must be a list of strings")
+    return posts, [normalize_hashtag(t) for t in hashtags if t.strip()]
+
+@app.route('/batch_score', methods=['POST'])
+def batch_score():
+    """
+    Batch scoring for pipelines: accepts {"hashtags": [...]}, {"posts": [...]} or an
+    application/x-ndjson body of posts, scores everything with one predict_proba call
+    and streams one NDJSON line per post back.
+    """
+    try:
+        posts, hashtags = parse_batch_request()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid request body: {e}"}), 400
+
+    if not posts and not hashtags:
+        return jsonify({"error": "Provide 'hashtags' or 'posts'"}), 400
+    if len(hashtags) > MAX_BATCH_HASHTAGS:
+        return jsonify({"error": f"At most {MAX_BATCH_HASHTAGS} hashtags per request"}), 400
+
+    try:
+        clf, vectorizer, model_version, scorer = get_scoring_model()
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 503
+
+    errors = []
+    if hashtags:
+        deadline = Deadline(ANALYSIS_DEADLINE_SECONDS)
+        scraped = scrape_many(hashtags, lambda tag: scrape_with_cache(tag, deadline=deadline, priority=PRIORITY_BATCH),
+                              deadline=deadline)
+        for tag in hashtags:
+            if tag in scraped.errors:
+                errors.append({"hashtag": tag, "error": scraped.errors[tag].reason})
+            elif getattr(scraped.get(tag), "partial", False):
+                errors.append({"hashtag": tag, "error": "time budget ran out; results are partial"})
+            posts.extend(dict(p, hashtag=tag) for p in scraped.get(tag, []))
 
+    try:
+        _, results = score_posts(posts, clf, vectorizer, scorer=scorer)
     except Exception as e:
-        app.logger.error(f"Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+        app.logger.exception("Batch scoring failed")
+        return jsonify({"error": f"Scoring failed: {str(e)}"}), 500
+    for rec, result in zip(posts, results):
+        if 'hashtag' in rec:
+            result['hashtag'] = rec['hashtag']
+        result['model_version'] = model_version
+
+    app.logger.info(f"Batch scored {len(results)} posts ({len(errors)} failed hashtags)")
+    return Response(stream_with_context(to_ndjson(errors + results)), mimetype='application/x-ndjson')
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms, cache and queue stats"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once warm-up has finished, 503 before (the first call starts it)"""
+    warmup.start()
+    status = warmup.status()
+    return jsonify(status), 200 if status["ready"] else 503
 
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
+    status = {
+        "served_model": model_refresher.status(),
+        "scrape_cache": _scrape_cache.stats(),
+        "result_cache": _result_cache.stats(),
+        "post_store": _post_store.stats(),
+        "driver_pool": get_driver_pool().stats(),
+        "rate_limiter": get_rate_limiter().stats(),
+        "analysis_jobs": analysis_jobs.stats()
+    }
     try:
-        load_model()
-        return jsonify({"status": "healthy", "model_loaded": True}), 200
+        cache = load_offline_model()
+        status["model_loaded"] = True
+        status["offline_model"] = cache['artifacts'].info() if 'artifacts' in cache else {"model_version": cache['version']}
     except Exception as e:
-        return jsonify({"status": "unhealthy", "error": str(e)}), 500
+        status["model_loaded"] = False
+        status["error"] = str(e)
 
+    # /analyze can answer from either the background-trained model or the offline one
+    healthy = status["model_loaded"] or model_refresher.current() is not None
+    status["status"] = "healthy" if healthy else "unhealthy"
+    return jsonify(status), 200 if healthy else 500
+
+
+warmup.import_seconds = time.perf_counter() - _IMPORT_STARTED
 
 if __name__ == '__main__':
     # Check if models exist
-    if not os.path.exists(MODEL_PATH) or not os.path.exists(VECT_PATH):
+    if not os.path.exists(os.path.join(MODEL_ARTIFACT_DIR, "manifest.json")) and \
+            (not os.path.exists(MODEL_PATH) or not os.path.exists(VECT_PATH)):
         print("WARNING: Model files not found!")
         print(f"Please run: python backend/train_model.py")
         print("This will generate the required model files.\n")
@@ -278,6 +850,15 @@ if __name__ == '__main__':
     # Configure debug mode via environment variable (default: False for production)
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
 
+    # Warm up in the background (imports, models, browser pool, and the model refresher
+    # that trains the first model and keeps it fresh) so the first request doesn't pay
+    # for it; /ready turns 200 when done. Under the debug reloader only the serving
+    # child process needs it.
+    if not debug_mode or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        print(f"Warming up in the background (app imported in {warmup.import_seconds:.2f}s)...")
+        print(f"Model refresher retrains every {model_refresher.interval / 60:.0f} min")
+        warmup.start()
+
     # Run the Flask app on port 5001 (port 5000 is used by macOS AirPlay)
     print("\n" + "="*60)
     print("Starting ClipCheck Server...")
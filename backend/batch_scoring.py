@@ -0,0 +1,131 @@
+# batch_scoring.py
+# Scores many posts with one feature matrix and a single predict_proba call.
+
+import os
+import json
+import threading
+
+import numpy as np
+
+try:
+    from backend.features import build_feature_matrix, engineered_features, post_texts, \
+        TextVectorizer, HashingTextVectorizer, CSRBuffers
+    from backend.metrics import time_stage
+except ImportError:
+    from features import build_feature_matrix, engineered_features, post_texts, \
+        TextVectorizer, HashingTextVectorizer, CSRBuffers
+    from metrics import time_stage
+
+# Feature matrix dtype on the sklearn scoring path; float32 halves the matrix and
+# moves probabilities by ~1e-7 (the percentages shown are rounded to 0.1)
+SCORING_DTYPE = np.dtype(os.getenv("SCORING_DTYPE", "float32"))
+
+# Each scoring thread assembles its feature matrices in the same arrays
+_local = threading.local()
+
+
+def scoring_buffers(dtype):
+    """This thread's CSRBuffers for dtype"""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None or buffers.dtype != dtype:
+        buffers = _local.buffers = CSRBuffers(dtype)
+    return buffers
+
+
+# Text fields of a submitted post (missing or null means empty)
+BATCH_POST_TEXT_FIELDS = ("title", "snippet", "url", "subreddit", "date_snippet")
+
+
+def clean_batch_post(rec, where):
+    """
+    A submitted post (/batch_score body, score_batch.py input) checked for the
+    types scoring relies on: an object whose text
+    fields are strings and whose rank, if given, is a positive integer (numeric
+    strings are accepted). Raises ValueError naming the offending field.
+    """
+    if not isinstance(rec, dict):
+        raise ValueError(f"{where} must be an object")
+    post = dict(rec)
+    for field in BATCH_POST_TEXT_FIELDS:
+        if post.get(field) is None:
+            post.pop(field, None)
+        elif not isinstance(post[field], str):
+            raise ValueError(f"{where}.{field} must be a string")
+    rank = post.get("rank")
+    if isinstance(rank, str) and rank.strip().isdigit():
+        rank = post["rank"] = int(rank)
+    if rank is not None and (isinstance(rank, bool) or not isinstance(rank, int) or rank < 1):
+        raise ValueError(f"{where}.rank must be a positive integer")
+    return post
+
+
+def risk_level(misinfo_score):
+    return "high" if misinfo_score >= 70 else "medium" if misinfo_score >= 40 else "low"
+
+
+def format_post(rec, prob, cb_score, keywords, index):
+    """Result entry for one scored post (the shape /analyze returns)"""
+    misinfo_score = float(prob * 100)
+    return {
+        "rank": rec.get("rank") or index + 1,
+        "title": rec.get("title", ""),
+        "url": rec.get("url", ""),
+        "snippet": (rec.get("snippet") or "")[:250],
+        "subreddit": rec.get("subreddit", ""),
+        "date": rec.get("date_snippet", ""),
+        "misinfo_score": round(misinfo_score, 1),
+        "clickbait_score": round(cb_score, 3),
+        "keywords": keywords,
+        "risk_level": risk_level(misinfo_score)
+    }
+
+
+def score_posts(posts, clf, vectorizer, engineered=None, scorer=None, dtype=None):
+    """
+    Score a batch of post records.
+    engineered: optional precomputed engineered_features(posts) (see PostStore)
+    scorer: optional CompiledScorer of the same model; when given, scores are computed
+    with NumPy only and clf/vectorizer are not used
+    dtype: feature matrix dtype for clf (default SCORING_DTYPE); the matrix is
+    built as one CSR in this thread's reused buffers
+    returns: (probabilities_np, list of result dicts in input order)
+    """
+    if not posts:
+        return [], []
+    if scorer is not None:
+        with time_stage("build_feature_matrix"):
+            texts = post_texts(posts)
+            X_eng, clickbait, keywords = engineered or engineered_features(posts, texts)
+        with time_stage("predict_proba"):
+            probs = scorer.score(texts, X_eng)
+    else:
+        dtype = SCORING_DTYPE if dtype is None else np.dtype(dtype)
+        with time_stage("build_feature_matrix"):
+            X, X_eng, _, details = build_feature_matrix(posts, vectorizer=vectorizer, return_details=True,
+                                                        engineered=engineered, combine=True, dtype=dtype,
+                                                        buffers=scoring_buffers(dtype))
+            clickbait, keywords = details["clickbait"], details["keywords"]
+        with time_stage("predict_proba"):
+            probs = clf.predict_proba(X)[:, 1]
+    results = [
+        format_post(rec, prob, cb, kws, i)
+        for i, (rec, prob, cb, kws) in enumerate(zip(posts, probs.tolist(), clickbait.tolist(), keywords))
+    ]
+    return probs, results
+
+
+def to_ndjson(rows):
+    """Yield each row as one line of newline-delimited JSON"""
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def load_vectorizer(path):
+    """Load a saved vectorizer, wrapping it in the matching TextVectorizer class"""
+    import joblib
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    inner = joblib.load(path)
+    vec = HashingTextVectorizer() if isinstance(inner, HashingVectorizer) else TextVectorizer()
+    vec.tfidf = inner
+    return vec
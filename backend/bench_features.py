@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# bench_features.py
+# Benchmarks the batched engineered-feature pass against the original per-post loop.
+#
+# Usage: python backend/bench_features.py [--sizes 100 1000 10000] [--repeat 3] [--json]
+
+import json
+import time
+import random
+import argparse
+import numpy as np
+
+try:
+    from backend.features import (engineered_features, post_text, clickbait_score, keyword_flags,
+                                  subreddit_risk, rank_score, MISINFO_KEYWORDS, DISPLAY_KEYWORDS,
+                                  SUBREDDIT_RISK)
+except ImportError:
+    from features import (engineered_features, post_text, clickbait_score, keyword_flags,
+                          subreddit_risk, rank_score, MISINFO_KEYWORDS, DISPLAY_KEYWORDS,
+                          SUBREDDIT_RISK)
+
+FILLER = ("the a new thread about my game help question anyone know how build review update "
+          "today people think best settings monitor graphics discussion advice news report").split()
+SUBREDDITS = [s for s in SUBREDDIT_RISK if s != "__default__"] + ["gaming", "technology", "help"]
+
+
+def synthetic_posts(n, seed=42):
+    """Generate n post records with a realistic mix of keywords, caps and exclamations"""
+    rng = random.Random(seed)
+    posts = []
+    for i in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(6, 40))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(MISINFO_KEYWORDS))
+        if rng.random() < 0.3:
+            j = rng.randrange(len(words))
+            words[j] = words[j].upper()
+        text = " ".join(words) + "!" * rng.choice([0, 0, 0, 1, 3])
+        cut = rng.randint(3, 8)
+        posts.append({
+            "rank": rng.randint(1, 10),
+            "title": " ".join(text.split()[:cut]),
+            "snippet": " ".join(text.split()[cut:]),
+            "url": f"https://www.reddit.com/r/x/comments/{i}/",
+            "subreddit": rng.choice(SUBREDDITS),
+        })
+    return posts
+
+
+def legacy_engineered(records):
+    """The original implementation: per-post feature rows plus app.py's display fields"""
+    eng, clickbait, keywords = [], [], []
+    for r in records:
+        text = post_text(r)
+        cb = clickbait_score(text)
+        eng.append([cb, subreddit_risk(r.get("subreddit")), rank_score(r.get("rank"))] + keyword_flags(text))
+        clickbait.append(clickbait_score(text))
+        keywords.append([k for k in DISPLAY_KEYWORDS if k in text.lower()])
+    return np.array(eng, dtype=float), np.array(clickbait), keywords
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(sizes, repeat):
+    rows = []
+    for n in sizes:
+        records = synthetic_posts(n)
+        legacy_s, legacy = _best_of(lambda: legacy_engineered(records), repeat)
+        batched_s, batched = _best_of(lambda: engineered_features(records), repeat)
+        assert np.allclose(legacy[0], batched[0]), "feature matrices differ"
+        assert np.allclose(legacy[1], batched[1]), "clickbait scores differ"
+        assert legacy[2] == batched[2], "display keywords differ"
+        rows.append({
+            "posts": n,
+            "legacy_seconds": round(legacy_s, 6),
+            "batched_seconds": round(batched_s, 6),
+            "speedup": round(legacy_s / batched_s, 2) if batched_s else None,
+            "batched_posts_per_second": round(n / batched_s) if batched_s else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engineered feature extraction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.repeat)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'posts':>8} {'legacy (s)':>12} {'batched (s)':>12} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['posts']:>8} {row['legacy_seconds']:>12.4f} {row['batched_seconds']:>12.4f} {row['speedup']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
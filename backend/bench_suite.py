@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# bench_suite.py
+# Offline benchmarks for the scrape -> features -> train -> score pipeline (no network, no Chrome).
+#
+# Usage: python backend/bench_suite.py [--sizes 10 1000 100000] [--repeat 3]
+#                                      [--skip parse features model analyze]
+#                                      [--analyze-requests 20] [--scrape-latency 0.0]
+#                                      [--output results.json]
+#
+# Recorded result pages in backend/fixtures/ are replayed through result_parser.parse_results,
+# synthetic corpora (bench_features.synthetic_posts) stand in for scraped posts, and
+# /analyze runs through Flask's test client with the scraper stubbed. Results are
+# printed (or written) as JSON so runs can be diffed.
+
+import os
+import sys
+import json
+import glob
+import time
+import platform
+import argparse
+import subprocess
+import numpy as np
+
+try:
+    from backend.result_parser import parse_results
+    from backend.features import build_feature_matrix, combine_features, CSRBuffers, TextVectorizer, post_text
+    from backend.train_model import auto_label_post
+    from backend.bench_features import synthetic_posts
+    from backend.post_batch import PostBatch
+    from backend.batch_scoring import score_posts
+    from backend.compiled_scorer import CompiledScorer
+except ImportError:
+    from result_parser import parse_results
+    from features import build_feature_matrix, combine_features, CSRBuffers, TextVectorizer, post_text
+    from train_model import auto_label_post
+    from bench_features import synthetic_posts
+    from post_batch import PostBatch
+    from batch_scoring import score_posts
+    from compiled_scorer import CompiledScorer
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BACKEND_DIR, "fixtures")
+
+
+def _timings(fn, repeat):
+    """Run fn repeat times; returns ({best, median, mean} seconds, last result)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "best_seconds": round(min(samples), 6),
+        "median_seconds": round(float(np.median(samples)), 6),
+        "mean_seconds": round(float(np.mean(samples)), 6),
+    }, result
+
+
+def recorded_pages(fixture_dir=FIXTURE_DIR):
+    """Recorded DuckDuckGo result pages (bot-check pages are skipped)"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        if "anomaly-modal" not in html:
+            pages[os.path.basename(path)] = html
+    return pages
+
+
+def bench_parse(repeat, fixture_dir=FIXTURE_DIR):
+    rows = []
+    for name, html in recorded_pages(fixture_dir).items():
+        stats, posts = _timings(lambda: parse_results(html), repeat)
+        rows.append(dict(stats, page=name, html_bytes=len(html.encode("utf-8")), posts=len(posts)))
+    return rows
+
+
+def labeled_corpus(n):
+    posts = synthetic_posts(n)
+    labels = np.array([auto_label_post(p) for p in posts])
+    if labels.min() == labels.max():
+        labels[0] = 1 - labels[0]  # LogisticRegression needs both classes
+    return posts, labels
+
+
+def _matrix_bytes(X):
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def bench_features(sizes, repeat):
+    from scipy.sparse import hstack
+
+    rows = []
+    for n in sizes:
+        posts = synthetic_posts(n)
+        texts = [post_text(p) for p in posts]
+        fitted = TextVectorizer().fit(texts)
+
+        build, _ = _timings(lambda: build_feature_matrix(posts, vectorizer=None), repeat)
+        tfidf_fit, _ = _timings(lambda: TextVectorizer().fit(texts), repeat)
+        tfidf_transform, _ = _timings(lambda: fitted.transform(texts), repeat)
+        # Text + engineered columns as one CSR: via hstack (COO) vs assembled directly
+        X_text, X_eng, _ = build_feature_matrix(posts, vectorizer=fitted)
+        buffers = CSRBuffers(np.float32)
+        stacked, X64 = _timings(lambda: hstack([X_text, X_eng]).tocsr(), repeat)
+        direct, _ = _timings(lambda: combine_features(X_text, X_eng), repeat)
+        direct32, X32 = _timings(lambda: combine_features(X_text, X_eng, np.float32, buffers), repeat)
+        rows.append({
+            "posts": n,
+            "build_feature_matrix": build,
+            "tfidf_fit": tfidf_fit,
+            "tfidf_transform": tfidf_transform,
+            "combine_hstack": stacked,
+            "combine_csr_float64": direct,
+            "combine_csr_float32_reused": direct32,
+            "combined_bytes_float64": _matrix_bytes(X64),
+            "combined_bytes_float32": _matrix_bytes(X32),
+        })
+    return rows
+
+
+def bench_model(sizes, repeat):
+    from sklearn.linear_model import LogisticRegression
+
+    rows = []
+    for n in sizes:
+        posts, labels = labeled_corpus(n)
+        X, _, vec = build_feature_matrix(posts, vectorizer=None, combine=True)
+
+        def fit():
+            return LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced').fit(X, labels)
+
+        fit_stats, clf = _timings(fit, repeat)
+        predict_stats, _ = _timings(lambda: clf.predict_proba(X), repeat)
+        # End-to-end scoring (features + probabilities) with sklearn vs the compiled scorer
+        scorer = CompiledScorer.from_model(clf, vec)
+        sklearn_stats, probs32 = _timings(lambda: score_posts(posts, clf, vec)[0], repeat)
+        compiled_stats, probs = _timings(lambda: score_posts(posts, None, None, scorer=scorer)[0], repeat)
+        expected = score_posts(posts, clf, vec, dtype=np.float64)[0]
+        rows.append({
+            "posts": n,
+            "positive_rate": round(float(labels.mean()), 3),
+            "lr_fit": fit_stats,
+            "predict_proba": predict_stats,
+            "score_posts_sklearn": sklearn_stats,
+            "score_posts_compiled": compiled_stats,
+            "compiled_max_abs_diff": float(np.max(np.abs(probs - expected))),
+            "float32_max_abs_diff": float(np.max(np.abs(probs32 - expected))),
+        })
+    return rows
+
+
+def bench_analyze(requests, scrape_latency):
+    """
+    End-to-end /analyze through the Flask test client: one cold request (scrape all
+    seven hashtags and train inline) followed by warm requests served from the cache
+    and the published model. Scrapes replay the first recorded page.
+    """
+    sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+    import app as webapp
+    from backend.model_refresher import ModelRefresher
+
+    html = next(iter(recorded_pages().values()))
+
+    def stub_search(hashtag, num_results=10, **kwargs):
+        if scrape_latency:
+            time.sleep(scrape_latency)
+        tag = hashtag.strip("#")
+        return PostBatch.from_dicts(dict(p, title=f"{p['title']} {hashtag}", url=f"{p['url']}{tag}/")
+                                    for p in parse_results(html)[:num_results])
+
+    webapp.search_reddit_by_hashtag = stub_search
+    webapp._scrape_cache.clear()
+    webapp._trained_models.clear()
+    webapp.model_refresher = ModelRefresher(webapp.collect_training_corpus, webapp.train_classifier)
+    client = webapp.app.test_client()
+
+    def analyze(hashtag):
+        start = time.perf_counter()
+        job = client.post('/analyze', json={"hashtag": hashtag}).get_json()
+        while True:
+            status = client.get(job["status_url"]).get_json()
+            if status["status"] in ("done", "failed"):
+                break
+            time.sleep(0.002)
+        if status["status"] != "done":
+            raise RuntimeError(f"/analyze {hashtag} failed: {status.get('error')}")
+        return time.perf_counter() - start
+
+    cold = analyze("#benchcold")
+    warm = [analyze(f"#bench{i % 5}") for i in range(requests)]
+    return {
+        "scrape_latency_seconds": scrape_latency,
+        "cold_seconds": round(cold, 6),
+        "warm_requests": requests,
+        "warm_median_seconds": round(float(np.median(warm)), 6),
+        "warm_p95_seconds": round(float(np.percentile(warm, 95)), 6),
+    }
+
+
+def environment():
+    import sklearn
+    import scipy
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "sklearn": sklearn.__version__,
+        "git_commit": commit,
+    }
+
+
+def run(args):
+    results = {"environment": environment(), "repeat": args.repeat, "sizes": args.sizes}
+    if "parse" not in args.skip:
+        results["parse"] = bench_parse(args.repeat)
+    if "features" not in args.skip:
+        results["features"] = bench_features(args.sizes, args.repeat)
+    if "model" not in args.skip:
+        results["model"] = bench_model(args.sizes, args.repeat)
+    if "analyze" not in args.skip:
+        results["analyze"] = bench_analyze(args.analyze_requests, args.scrape_latency)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks (JSON output)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000],
+                        help="synthetic corpus sizes (up to 1000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["parse", "features", "model", "analyze"])
+    parser.add_argument("--analyze-requests", type=int, default=20, help="warm /analyze requests to time")
+    parser.add_argument("--scrape-latency", type=float, default=0.0,
+                        help="seconds each stubbed scrape sleeps")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
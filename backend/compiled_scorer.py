@@ -0,0 +1,154 @@
+# compiled_scorer.py
+# NumPy-only logistic scoring of posts from a trained TF-IDF + LogisticRegression model.
+
+import os
+import re
+import itertools
+
+import numpy as np
+
+try:
+    from backend.model_artifacts import MODEL_ARTIFACT_DIR, read_manifest, verify_artifacts
+except ImportError:
+    from model_artifacts import MODEL_ARTIFACT_DIR, read_manifest, verify_artifacts
+
+# Largest |compiled - sklearn| probability accepted by validate()
+VALIDATION_TOLERANCE = 1e-9
+
+
+class CompiledScorer:
+    """
+    A trained model reduced to arrays: the sorted term array with each term's
+    column, the IDF vector, the coefficient vector and the intercept. score() reproduces
+    vectorizer.transform -> hstack -> clf.predict_proba[:, 1] for the
+    word-analyzer TfidfVectorizer settings the app uses (lowercase, token_pattern,
+    ngram_range, norm, sublinear_tf), without sklearn or scipy.
+
+    Terms are looked up with one searchsorted call per batch, so the artifact
+    arrays can stay memory-mapped (terms_sorted=True skips sorting them) and no
+    per-process vocabulary dict is built.
+    """
+
+    def __init__(self, terms, columns, idf, coef, intercept, lowercase=True,
+                 token_pattern=r"(?u)\b\w\w+\b", ngram_range=(1, 1), norm="l2",
+                 sublinear_tf=False, version=None, terms_sorted=False):
+        if norm not in ("l2", None):
+            raise ValueError(f"Unsupported norm {norm!r}")
+        if not terms_sorted:
+            terms, columns = np.asarray(terms, dtype=str), np.asarray(columns)
+            order = np.argsort(terms)
+            terms, columns = terms[order], columns[order]
+        self.terms = terms
+        self.columns = columns
+        self.idf = np.asarray(idf, dtype=np.float64)
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.coef_text = coef[:len(self.idf)]
+        self.coef_eng = coef[len(self.idf):]
+        self.intercept = float(np.asarray(intercept).ravel()[0])
+        self.lowercase = lowercase
+        self.token_re = re.compile(token_pattern)
+        self.ngram_range = tuple(ngram_range)
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.version = version
+
+    @classmethod
+    def from_model(cls, clf, vectorizer, version=None):
+        """Compile a fitted binary LogisticRegression and TF-IDF vectorizer (or TextVectorizer)"""
+        tfidf = getattr(vectorizer, "tfidf", vectorizer)
+        params = tfidf.get_params()
+        unsupported = {k: params[k] for k in ("analyzer", "preprocessor", "tokenizer", "stop_words",
+                                              "strip_accents") if params[k] not in (None, "word")}
+        if unsupported or not params["use_idf"] or len(clf.classes_) != 2:
+            raise ValueError(f"Cannot compile this model (unsupported settings: {unsupported or 'classes/idf'})")
+        vocab = tfidf.vocabulary_
+        return cls(list(vocab), list(vocab.values()), tfidf.idf_, clf.coef_, clf.intercept_,
+                   lowercase=params["lowercase"], token_pattern=params["token_pattern"],
+                   ngram_range=params["ngram_range"], norm=params["norm"],
+                   sublinear_tf=params["sublinear_tf"], version=version)
+
+    @classmethod
+    def from_artifacts(cls, directory=MODEL_ARTIFACT_DIR, verify=True):
+        """Compile the .npy artifacts written by model_artifacts.save_artifacts"""
+        manifest = verify_artifacts(directory) if verify else read_manifest(directory)
+        arrays = {name: np.load(os.path.join(directory, entry["file"]), mmap_mode="r")
+                  for name, entry in manifest["files"].items()}
+        settings = {k: v for k, v in manifest["vectorizer"].items()
+                    if k in ("lowercase", "token_pattern", "ngram_range", "norm", "sublinear_tf")}
+        return cls(arrays["vocab_terms"], arrays["vocab_columns"], arrays["idf"], arrays["coef"],
+                   arrays["intercept"], version=manifest["model_version"], terms_sorted=True, **settings)
+
+    def _ngrams(self, text):
+        # sklearn's word analyzer: lowercase, token_pattern, then contiguous n-grams
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_re.findall(text)
+        min_n, max_n = self.ngram_range
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def text_scores(self, texts):
+        """Per-text dot product of the normalized TF-IDF row with the text coefficients"""
+        n_cols = len(self.idf)
+        scores = np.zeros(len(texts))
+        grams, lengths = [], []
+        for text in texts:
+            text_grams = self._ngrams(text)
+            grams.extend(text_grams)
+            lengths.append(len(text_grams))
+        if not grams or not len(self.terms):
+            return scores
+
+        # Number the batch's distinct n-grams, then look each up once in the sorted term array
+        distinct = dict(zip(dict.fromkeys(grams), itertools.count()))
+        ids = np.fromiter(map(distinct.__getitem__, grams), dtype=np.int64, count=len(grams))
+        uniq = np.array(list(distinct), dtype=str)
+        pos = np.minimum(np.searchsorted(self.terms, uniq), len(self.terms) - 1)
+        gram_cols = np.where(self.terms[pos] == uniq, self.columns[pos], -1)[ids]
+        known = gram_cols >= 0
+        rows = np.repeat(np.arange(len(texts)), lengths)[known]
+        cols = gram_cols[known].astype(np.int64)
+        if not len(rows):
+            return scores
+
+        # (row, column) term counts, then tf-idf values, row norms and the dot product
+        cells, counts = np.unique(rows * n_cols + cols, return_counts=True)
+        rows, cols = np.divmod(cells, n_cols)
+        values = counts.astype(np.float64)
+        if self.sublinear_tf:
+            values = np.log(values) + 1.0
+        values *= self.idf[cols]
+        dots = np.bincount(rows, weights=values * self.coef_text[cols], minlength=len(texts))
+        if self.norm == "l2":
+            norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(texts)))
+            np.divide(dots, norms, out=scores, where=norms > 0)
+            return scores
+        return dots
+
+    def decision_function(self, texts, X_eng):
+        return self.text_scores(texts) + np.asarray(X_eng) @ self.coef_eng + self.intercept
+
+    def score(self, texts, X_eng):
+        """Probability of the positive class for each text and engineered feature row"""
+        return 1.0 / (1.0 + np.exp(-self.decision_function(texts, X_eng)))
+
+    def validate(self, clf, vectorizer, texts, X_eng, tolerance=VALIDATION_TOLERANCE):
+        """
+        Compare against sklearn's predict_proba on the same inputs.
+        returns: the largest absolute difference; raises ValueError above tolerance
+        """
+        from scipy.sparse import hstack
+
+        if not len(texts):
+            return 0.0
+        expected = clf.predict_proba(hstack([vectorizer.transform(texts), X_eng]).tocsr())[:, 1]
+        deviation = float(np.max(np.abs(self.score(texts, X_eng) - expected)))
+        if deviation > tolerance:
+            raise ValueError(f"Compiled scorer deviates from sklearn by {deviation:.3g}")
+        return deviation
+
+    def info(self):
+        return {"version": self.version, "terms": len(self.terms),
+                "n_features": len(self.idf) + len(self.coef_eng)}
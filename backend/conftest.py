@@ -0,0 +1,20 @@
+# conftest.py
+# Shared pytest fixtures for the backend tests.
+import numpy as np
+import pytest
+
+from backend.bench_features import synthetic_posts
+from backend.features import build_feature_matrix
+
+
+@pytest.fixture
+def fitted_model():
+    """Factory: fit(n) -> (posts, clf, vectorizer) trained on n synthetic posts, as fit_model builds its input"""
+    from sklearn.linear_model import LogisticRegression
+
+    def fit(n):
+        posts = synthetic_posts(n)
+        labels = np.array([i % 2 for i in range(n)])
+        X, _, vec = build_feature_matrix(posts, combine=True)
+        return posts, LogisticRegression(max_iter=1000).fit(X, labels), vec
+    return fit
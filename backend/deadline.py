@@ -0,0 +1,52 @@
+# deadline.py
+# Per-request time budget passed down through scraping so work stops when it runs out.
+
+import time
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before this step could start"""
+
+    status = 504
+
+
+class Deadline:
+    """
+    A point in time (time.monotonic) by which a request must be done.
+    Pass one down the call chain; each blocking step caps its own timeout with
+    cap() and checks it before starting new work. Deadline(None) never expires.
+    """
+
+    __slots__ = ("seconds", "expires_at")
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left (never negative); None when there is no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cap(self, timeout):
+        """timeout limited to the time left (either may be None for unbounded)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, what="request"):
+        """Raise DeadlineExceeded if the budget is spent"""
+        if self.expired:
+            raise DeadlineExceeded(f"Time budget of {self.seconds:.0f}s ran out before {what}")
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining()})"
+
+
+NO_DEADLINE = Deadline(None)
@@ -0,0 +1,263 @@
+# driver_pool.py
+# Pool of reusable headless Chrome sessions shared by the scraper.
+
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+
+try:
+    from backend.metrics import time_stage
+except ImportError:
+    from metrics import time_stage
+
+# Pool configuration (overridable through the environment)
+POOL_SIZE = int(os.getenv("SCRAPER_POOL_SIZE", "3"))
+DRIVER_MAX_USES = int(os.getenv("SCRAPER_DRIVER_MAX_USES", "50"))
+ACQUIRE_TIMEOUT = float(os.getenv("SCRAPER_POOL_TIMEOUT", "60"))
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def import_browser_stack():
+    """
+    Import Selenium and webdriver_manager. They are loaded on first browser use
+    rather than at import, so processes that never open a browser (the web app
+    before its first Selenium fallback, scoring workers) start without them.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+    return webdriver, Service, Options, ChromeDriverManager
+
+
+def _chromedriver_path():
+    """Resolve the chromedriver binary once per process instead of once per scrape"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            ChromeDriverManager = import_browser_stack()[3]
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def create_driver():
+    """Launch a new headless Chrome configured for scraping"""
+    webdriver, Service, Options, _ = import_browser_stack()
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"--user-agent={USER_AGENT}")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    driver = webdriver.Chrome(service=Service(_chromedriver_path()), options=options)
+
+    # Remove webdriver flag on every page this session loads, not just the first
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    })
+    return driver
+
+
+class PoolTimeout(Exception):
+    """Raised when no driver becomes available within the acquire timeout"""
+
+
+class _PooledDriver:
+    __slots__ = ("driver", "uses", "created_at")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """
+    Bounded pool of Chrome sessions.
+    Drivers are health-checked on checkout, recycled after max_uses
+    checkouts, and replaced whenever a WebDriver error escapes a session.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=DRIVER_MAX_USES, factory=create_driver):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.factory = factory
+        self._idle = []
+        self._total = 0  # idle + checked out + being created
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # metrics
+        self.checkouts = 0
+        self.reuses = 0
+        self.created = 0
+        self.recycled = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def warm(self, count=None):
+        """Start drivers up front so the first requests don't pay for browser startup"""
+        count = self.size if count is None else min(count, self.size)
+        started = []
+        for _ in range(count):
+            with self._cond:
+                if self._closed or self._total >= self.size:
+                    break
+                self._total += 1
+            try:
+                started.append(self._new_driver())
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+        with self._cond:
+            self._idle.extend(started)
+            self._cond.notify_all()
+        return len(started)
+
+    def _new_driver(self):
+        with time_stage("browser_startup"):
+            pooled = _PooledDriver(self.factory())
+        with self._cond:
+            self.created += 1
+        return pooled
+
+    @staticmethod
+    def _is_healthy(pooled):
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        """Check a driver out of the pool, starting one if the pool isn't full yet"""
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No browser available after {timeout:.0f}s")
+                self._cond.wait(remaining)
+
+        try:
+            if pooled is not None and not self._is_healthy(pooled):
+                self._quit(pooled)
+                with self._cond:
+                    self.recycled += 1
+                pooled = None
+            if pooled is None:
+                pooled = self._new_driver()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self.checkouts += 1
+            if pooled.uses > 0:
+                self.reuses += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return pooled
+
+    def release(self, pooled, broken=False):
+        """Return a driver to the pool, retiring it if broken or worn out"""
+        pooled.uses += 1
+        retire = broken or pooled.uses >= self.max_uses or self._closed
+        if retire:
+            self._quit(pooled)
+        with self._cond:
+            if retire:
+                self._total -= 1
+                self.recycled += 1
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout=ACQUIRE_TIMEOUT):
+        """Context manager yielding a checked-out WebDriver"""
+        from selenium.common.exceptions import WebDriverException
+
+        pooled = self.acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "checkouts": self.checkouts,
+                "reuses": self.reuses,
+                "drivers_created": self.created,
+                "drivers_recycled": self.recycled,
+                "wait_seconds_total": round(self.wait_seconds_total, 3),
+                "wait_seconds_max": round(self.wait_seconds_max, 3),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+
+    def close(self):
+        """Quit every idle driver; checked-out drivers are quit when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """Return the process-wide driver pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -3,10 +3,13 @@
 
 import re
 import math
-import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
+try:
+    from backend.post_batch import PostBatch
+except ImportError:
+    from post_batch import PostBatch
+
 # Subreddit risk mapping (extendable)
 SUBREDDIT_RISK = {
     "conspiracy": 1.0,
@@ -25,6 +28,15 @@ MISINFO_KEYWORDS = [
     "they don't want you", "wake up", "conspiracy"
 ]
 
+# keywords shown to the user next to each scored post (all are also MISINFO_KEYWORDS)
+DISPLAY_KEYWORDS = [
+    "confirmed", "leaked", "official", "proof", "cure",
+    "exposed", "fake", "scam", "rumor", "conspiracy", "hoax"
+]
+
+# texts are featurized in chunks so the joined-text buffers stay small
+FEATURE_CHUNK_SIZE = 10000
+
 def clickbait_score(text: str) -> float:
     """
     Simple clickbait heuristics:
@@ -62,10 +74,15 @@ def rank_score(rank: int):
 
 # TF-IDF wrapper (trained during training)
 class TextVectorizer:
-    def __init__(self):
+    def __init__(self, max_features=500, ngram_range=(1, 2), **tfidf_params):
         # Reduced from 4000 to 500 to prevent overfitting with small training sets
         # Rule of thumb: features should be less than training samples
-        self.tfidf = TfidfVectorizer(ngram_range=(1,2), max_features=500)
+        # Other TfidfVectorizer settings (e.g. min_df, sublinear_tf) can be passed through;
+        # backend/model_selection.py searches over them.
+        # (sklearn is imported here so NumPy-only scoring workers never load it)
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        self.tfidf = TfidfVectorizer(ngram_range=tuple(ngram_range), max_features=max_features,
+                                     **tfidf_params)
 
     def fit(self, texts):
         self.tfidf.fit(texts)
@@ -75,38 +92,260 @@ class TextVectorizer:
         return self.tfidf.transform(texts)
 
     def save(self, path):
+        import joblib
+        joblib.dump(self.tfidf, path)
+
+    def load(self, path):
+        import joblib
+        self.tfidf = joblib.load(path)
+        return self
+
+# Stateless alternative for streaming training: no vocabulary to fit or hold in memory
+class HashingTextVectorizer:
+    def __init__(self, n_features=2 ** 20):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.tfidf = HashingVectorizer(ngram_range=(1,2), n_features=n_features,
+                                       alternate_sign=False, norm="l2")
+
+    def fit(self, texts):
+        return self
+
+    def transform(self, texts):
+        return self.tfidf.transform(texts)
+
+    def save(self, path):
+        import joblib
         joblib.dump(self.tfidf, path)
 
     def load(self, path):
+        import joblib
         self.tfidf = joblib.load(path)
         return self
 
-def build_feature_matrix(records, vectorizer=None):
+def feature_config():
+    """Settings that shape the feature space (used to fingerprint trained models)"""
+    params = TextVectorizer().tfidf.get_params()
+    return {
+        "ngram_range": list(params["ngram_range"]),
+        "max_features": params["max_features"],
+        "keywords": MISINFO_KEYWORDS,
+        "subreddit_risk": SUBREDDIT_RISK,
+    }
+
+def post_text(record):
+    return " ".join(filter(None, [record.get("title",""), record.get("snippet","")]))
+
+def post_texts(records):
+    """post_text() for every record (read straight from the columns of a PostBatch)"""
+    if isinstance(records, PostBatch):
+        return records.texts()
+    return [post_text(r) for r in records]
+
+def _is_word_char(codes):
+    # [A-Za-z'] -- the token alphabet used by clickbait_score()
+    return ((codes >= 65) & (codes <= 90)) | ((codes >= 97) & (codes <= 122)) | (codes == 39)
+
+def _join(texts):
+    """Join texts with NUL separators; return (joined, start offset of each text)"""
+    lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+    starts = np.zeros(len(texts), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    return "\0".join(texts), starts
+
+def _text_counts(texts):
+    """Per-text word, ALL-CAPS word and '!' counts, matching clickbait_score()"""
+    n = len(texts)
+    joined, starts = _join(texts)
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+
+    word = _is_word_char(codes)
+    token_start = word.copy()
+    token_start[1:] &= ~word[:-1]
+    start_pos = np.flatnonzero(token_start)
+    token_rows = np.searchsorted(starts, start_pos, side="right") - 1
+
+    # per-token length and upper/lower counts; token ids follow token starts
+    token_id = np.cumsum(token_start)[word] - 1
+    chars = codes[word]
+    n_tokens = len(start_pos)
+    length = np.bincount(token_id, minlength=n_tokens)
+    upper = np.bincount(token_id, weights=(chars >= 65) & (chars <= 90), minlength=n_tokens)
+    lower = np.bincount(token_id, weights=(chars >= 97) & (chars <= 122), minlength=n_tokens)
+    all_caps = (length > 1) & (upper > 0) & (lower == 0)
+
+    n_words = np.bincount(token_rows, minlength=n).astype(float)
+    n_caps = np.bincount(token_rows[all_caps], minlength=n).astype(float)
+    exclam_rows = np.searchsorted(starts, np.flatnonzero(codes == 33), side="right") - 1
+    n_exclam = np.bincount(exclam_rows, minlength=n).astype(float)
+    return n_words, n_caps, n_exclam
+
+def _keyword_hits(texts_lower, keywords):
+    """(n_texts, n_keywords) 0/1 matrix: keyword occurs as a substring of the text"""
+    joined, starts = _join(texts_lower)
+    hits = np.zeros((len(texts_lower), len(keywords)), dtype=float)
+    find = joined.find
+    for j, kw in enumerate(keywords):
+        positions = []
+        pos = find(kw)
+        while pos != -1:
+            positions.append(pos)
+            pos = find(kw, pos + 1)
+        if positions:
+            rows = np.searchsorted(starts, positions, side="right") - 1
+            hits[rows, j] = 1.0
+    return hits
+
+def engineered_features(records, texts=None):
+    """
+    Compute the engineered columns for a batch of posts:
+    [clickbait, subreddit_risk, rank_score] + one flag per MISINFO_KEYWORDS entry.
+    Texts are lowercased once and joined, so each keyword is a single C-level
+    scan per chunk and word counts come from NumPy over the joined buffer.
+    returns: (X_engineered_np, clickbait_scores_np, display_keywords_per_post)
+    """
+    if texts is None:
+        texts = post_texts(records)
+    n = len(texts)
+    n_kw = len(MISINFO_KEYWORDS)
+    extra = [k for k in DISPLAY_KEYWORDS if k not in MISINFO_KEYWORDS]
+    keywords = MISINFO_KEYWORDS + extra
+    display_cols = np.array([keywords.index(k) for k in DISPLAY_KEYWORDS], dtype=int)
+
+    X_eng = np.zeros((n, 3 + n_kw), dtype=float)
+    clickbait = np.zeros(n)
+    display = []
+
+    for lo in range(0, n, FEATURE_CHUNK_SIZE):
+        chunk = texts[lo:lo + FEATURE_CHUNK_SIZE]
+        hits = _keyword_hits([t.lower() for t in chunk], keywords)
+        n_words, n_caps, n_exclam = _text_counts(chunk)
+
+        # clickbait_score() vectorized; texts with no words score 0
+        n_sens = hits[:, :n_kw].sum(axis=1)
+        has_words = n_words > 0
+        cap_frac = np.divide(n_caps, n_words, out=np.zeros(len(chunk)), where=has_words)
+        score = 0.5 * cap_frac + 0.3 * np.minimum(1.0, n_exclam / 3.0) + 0.2 * np.minimum(1.0, n_sens / 3.0)
+        clickbait[lo:lo + len(chunk)] = np.where(has_words, score, 0.0)
+
+        X_eng[lo:lo + len(chunk), 3:] = hits[:, :n_kw]
+        chunk_display = [[] for _ in chunk]
+        rows, cols = np.nonzero(hits[:, display_cols])  # row-major, so keyword order is kept
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            chunk_display[i].append(DISPLAY_KEYWORDS[j])
+        display.extend(chunk_display)
+
+    X_eng[:, 0] = clickbait
+    if isinstance(records, PostBatch):
+        # Column lookups: one risk value per distinct subreddit, 1/rank where rank > 0
+        X_eng[:, 1] = records.subreddit_values(SUBREDDIT_RISK, SUBREDDIT_RISK["__default__"])
+        np.divide(1.0, records.rank, out=X_eng[:, 2], where=records.rank > 0)
+    else:
+        X_eng[:, 1] = [subreddit_risk(r.get("subreddit")) for r in records]
+        X_eng[:, 2] = [rank_score(r.get("rank")) for r in records]
+    # date feature is not always present; ignore for now or add later
+    return X_eng, clickbait, display
+
+class CSRBuffers:
+    """
+    Reusable data/indices/indptr arrays for combine_features, grown as needed.
+    A matrix built in them is only valid until the next call, so keep one per
+    thread and don't hold on to the result.
+    """
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.data = np.empty(0, dtype=self.dtype)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.indptr = np.empty(0, dtype=np.int32)
+
+    @staticmethod
+    def _fits(buffer, size):
+        # scipy copies a view smaller than half its base array, so a buffer much
+        # larger than the request is reallocated too
+        return size <= len(buffer) <= 2 * size
+
+    def take(self, nnz, n_rows):
+        """Views of nnz data/indices slots and n_rows + 1 indptr slots"""
+        if not self._fits(self.data, nnz):
+            size = nnz + nnz // 2
+            self.data = np.empty(size, dtype=self.dtype)
+            self.indices = np.empty(size, dtype=np.int32)
+        if not self._fits(self.indptr, n_rows + 1):
+            self.indptr = np.empty(n_rows + 1 + (n_rows + 1) // 2, dtype=np.int32)
+        return self.data[:nnz], self.indices[:nnz], self.indptr[:n_rows + 1]
+
+def combine_features(X_text, X_eng, dtype=np.float64, buffers=None):
     """
-    records: list of dicts with keys: title, snippet, url, subreddit, rank
-    returns: (X_text_sparse, X_engineered_np)
+    The CSR matrix [X_text | X_eng] assembled directly (same values as
+    hstack([X_text, X_eng]).tocsr(), without the COO round trip): each row's
+    text entries followed by its non-zero engineered columns, cast to dtype
+    on the way. With buffers (a CSRBuffers of that dtype) the arrays are
+    reused instead of allocated.
     """
-    texts = []
-    for r in records:
-        text = " ".join(filter(None, [r.get("title",""), r.get("snippet","")]))
-        texts.append(text)
+    from scipy.sparse import csr_matrix
+
+    X_text = X_text.tocsr()
+    if not X_text.has_sorted_indices:
+        X_text = X_text.sorted_indices()
+    X_eng = np.asarray(X_eng)
+    n, n_text = X_text.shape
+
+    eng_rows, eng_cols = np.nonzero(X_eng)  # row-major, so columns stay sorted within a row
+    eng_counts = np.bincount(eng_rows, minlength=n)
+    text_counts = np.diff(X_text.indptr)
+    nnz = X_text.nnz + len(eng_rows)
+
+    if buffers is not None:
+        if buffers.dtype != np.dtype(dtype):
+            raise ValueError(f"buffers hold {buffers.dtype}, not {np.dtype(dtype)}")
+        data, indices, indptr = buffers.take(nnz, n)
+    else:
+        index_dtype = np.int32 if nnz < 2 ** 31 else np.int64
+        data = np.empty(nnz, dtype=dtype)
+        indices = np.empty(nnz, dtype=index_dtype)
+        indptr = np.empty(n + 1, dtype=index_dtype)
+    indptr[0] = 0
+    np.cumsum(text_counts + eng_counts, out=indptr[1:])
+
+    # Text entries move right by the engineered entries of the rows above
+    shift = np.repeat(indptr[:-1] - X_text.indptr[:-1], text_counts)
+    text_pos = np.arange(X_text.nnz) + shift
+    data[text_pos] = X_text.data
+    indices[text_pos] = X_text.indices
+
+    # Engineered entries go after their row's text entries
+    first_eng = np.cumsum(eng_counts) - eng_counts
+    eng_pos = (indptr[:-1] + text_counts)[eng_rows] + np.arange(len(eng_rows)) - first_eng[eng_rows]
+    data[eng_pos] = X_eng[eng_rows, eng_cols]
+    indices[eng_pos] = n_text + eng_cols
+
+    X = csr_matrix((data, indices, indptr), shape=(n, n_text + X_eng.shape[1]), copy=False)
+    X.has_sorted_indices = True
+    return X
+
+def build_feature_matrix(records, vectorizer=None, return_details=False, engineered=None,
+                         combine=False, dtype=np.float64, buffers=None):
+    """
+    records: list of dicts with keys: title, snippet, url, subreddit, rank (or a PostBatch)
+    returns: (X_text_sparse, X_engineered_np, vectorizer)
+    With return_details=True a fourth item is added:
+    {"clickbait": per-post clickbait scores, "keywords": per-post matched DISPLAY_KEYWORDS}
+    engineered: a precomputed engineered_features(records) result (e.g. from PostStore)
+    combine=True returns the model input [text | engineered] as one CSR matrix of
+    dtype in place of X_text (see combine_features; buffers are passed through)
+    """
+    texts = post_texts(records)
 
     if vectorizer is None:
         vectorizer = TextVectorizer()
         vectorizer.fit(texts)
 
     X_text = vectorizer.transform(texts)
-
-    # engineered features
-    eng = []
-    for i, r in enumerate(records):
-        text = texts[i]
-        cb = clickbait_score(text)
-        kw_flags = keyword_flags(text)
-        sr = subreddit_risk(r.get("subreddit"))
-        rs = rank_score(r.get("rank"))
-        # date feature is not always present; ignore for now or add later
-        eng_row = [cb, sr, rs] + kw_flags
-        eng.append(eng_row)
-    X_eng = np.array(eng, dtype=float)
+    if engineered is None:
+        engineered = engineered_features(records, texts)
+    X_eng, clickbait, keywords = engineered
+    if combine:
+        X_text = combine_features(X_text, X_eng, dtype=dtype, buffers=buffers)
+    if return_details:
+        return X_text, X_eng, vectorizer, {"clickbait": clickbait, "keywords": keywords}
     return X_text, X_eng, vectorizer
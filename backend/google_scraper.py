@@ -1,122 +1,260 @@
 # google_scraper.py
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, quote_plus
+from urllib.parse import quote_plus, urlencode
+import os
 import time
-import re
+import logging
+import threading
 
-def search_reddit_by_hashtag(hashtag: str, num_results: int = 10, pause: float = 3.0):
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from backend.driver_pool import get_driver_pool, USER_AGENT, ACQUIRE_TIMEOUT
+    from backend.metrics import REGISTRY, STAGE_SECONDS, time_stage
+    from backend.result_parser import parse_page, normalize_url
+    from backend.post_batch import PostBatch
+    from backend.deadline import NO_DEADLINE, DeadlineExceeded
+    from backend.rate_limiter import get_rate_limiter, PRIORITY_USER
+except ImportError:
+    from driver_pool import get_driver_pool, USER_AGENT, ACQUIRE_TIMEOUT
+    from metrics import REGISTRY, STAGE_SECONDS, time_stage
+    from result_parser import parse_page, normalize_url
+    from post_batch import PostBatch
+    from deadline import NO_DEADLINE, DeadlineExceeded
+    from rate_limiter import get_rate_limiter, PRIORITY_USER
+
+logger = logging.getLogger(__name__)
+
+# DuckDuckGo's static HTML endpoint (overridable so tests can point at a local stub)
+SEARCH_URL = os.getenv("SCRAPER_SEARCH_URL", "https://duckduckgo.com/html/")
+
+# Default fetch backend: "http" (keep-alive requests session, Selenium fallback) or "selenium"
+FETCH_BACKEND = os.getenv("SCRAPER_BACKEND", "http")
+HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.getenv("SCRAPER_HTTP_POOL_SIZE", "10"))
+# Upper bound on result pages fetched for one query
+MAX_PAGES = int(os.getenv("SCRAPER_MAX_PAGES", "5"))
+# Browser fetches: seconds driver.get may take, and how often to check whether results rendered
+PAGE_LOAD_TIMEOUT = float(os.getenv("SCRAPER_PAGE_LOAD_TIMEOUT", "30"))
+READY_POLL_SECONDS = float(os.getenv("SCRAPER_READY_POLL", "0.1"))
+
+# Present once a results page has rendered: result blocks, the no-results marker,
+# or the bot-check modal (so a blocked page is returned at once, not after the wait)
+READY_SELECTOR = "div.result, .no-results, [data-testid='anomaly-modal']"
+
+FETCH_BACKENDS = ("http", "selenium")
+
+
+class FetchBlocked(Exception):
+    """The lightweight fetch was refused or served a bot-check page instead of results"""
+
+
+_local = threading.local()
+
+FETCH_FALLBACKS = REGISTRY.counter(
+    "clipcheck_fetch_fallbacks_total", "HTTP fetches that were blocked and retried with Selenium")
+
+
+def _http_session():
+    """Per-thread keep-alive session, so repeated queries reuse open connections"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+            "Accept-Language": "en-US,en;q=0.9",
+        })
+        _local.session = session
+    return session
+
+
+def _looks_blocked(html):
+    # Result pages always carry result blocks or an explicit no-results marker;
+    # anything else (e.g. the anomaly/captcha modal) means we were turned away.
+    if "anomaly-modal" in html:
+        return True
+    return 'class="result' not in html and "no-results" not in html
+
+
+def _fetch_http(url, deadline=NO_DEADLINE):
+    deadline.check("fetching results")
+    timeout = deadline.cap(HTTP_TIMEOUT)
+    try:
+        with time_stage("http_fetch"):
+            resp = _http_session().get(url, timeout=timeout)
+    except requests.Timeout as e:
+        if timeout < HTTP_TIMEOUT:  # the deadline, not the endpoint's own timeout, cut it off
+            raise DeadlineExceeded(f"Time budget ran out fetching {url}") from e
+        raise FetchBlocked(f"HTTP fetch failed: {e}") from e
+    except requests.RequestException as e:
+        raise FetchBlocked(f"HTTP fetch failed: {e}") from e
+    if resp.status_code != 200:
+        raise FetchBlocked(f"HTTP {resp.status_code} from search endpoint")
+    if _looks_blocked(resp.text):
+        raise FetchBlocked("Search endpoint returned a bot-check page")
+    return resp.text
+
+
+def _results_rendered(driver):
+    from selenium.webdriver.common.by import By
+    return bool(driver.find_elements(By.CSS_SELECTOR, READY_SELECTOR))
+
+
+def _fetch_selenium(url, pause, deadline=NO_DEADLINE):
     """
-    Scrape DuckDuckGo search results for Reddit posts with a given hashtag.
-    Returns list of dicts: {rank, title, url, snippet, subreddit, date_snippet}
+    Load url in a pooled browser and return the HTML as soon as results (or the
+    no-results / bot-check markers) are in the DOM, waiting at most pause seconds
+    after the page load, and never past the deadline.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
 
-    Note: Switched from Google to DuckDuckGo to avoid CAPTCHA blocking.
+    deadline.check("opening a browser")
+    start = time.perf_counter()
+    with get_driver_pool().driver(timeout=deadline.cap(ACQUIRE_TIMEOUT)) as driver:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage="browser_acquire")
+        with time_stage("page_load"):
+            deadline.check("loading the page")
+            driver.set_page_load_timeout(max(0.1, deadline.cap(PAGE_LOAD_TIMEOUT)))
+            try:
+                driver.get(url)
+            except TimeoutException:
+                deadline.check("the page finished loading")
+                raise
+            try:
+                WebDriverWait(driver, deadline.cap(pause), poll_frequency=READY_POLL_SECONDS).until(
+                    _results_rendered)
+            except TimeoutException:
+                logger.warning("No results rendered within %.1fs for %s; using the page as loaded",
+                               deadline.cap(pause), url)
+            return driver.page_source
+
+
+def fetch_results_page(url, backend=None, pause=3.0, deadline=NO_DEADLINE, priority=PRIORITY_USER):
     """
-    options = Options()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-
-    # Remove webdriver flag
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    Fetch a search results page and return its HTML.
+    The "http" backend falls back to Selenium when the lightweight fetch is blocked.
+    Every request first waits for a slot from the shared rate limiter (served in
+    priority order, see rate_limiter.py) and reports whether it was blocked, so
+    repeated blocks pause scraping (CircuitOpen) instead of hammering the endpoint.
+    Raises DeadlineExceeded when the deadline runs out before or during the fetch;
+    a fetch that ends in an exception releases its slot (see RateLimiter.release).
+    """
+    backend = backend or FETCH_BACKEND
+    if backend not in FETCH_BACKENDS:
+        raise ValueError(f"Unknown fetch backend: {backend!r}")
+
+    limiter = get_rate_limiter()
+    if backend == "http":
+        STAGE_SECONDS.observe(limiter.acquire(priority, deadline=deadline), stage="rate_limit_wait")
+        try:
+            html = _fetch_http(url, deadline)
+        except FetchBlocked as e:
+            limiter.record_failure()
+            logger.warning("%s - falling back to Selenium", e)
+            FETCH_FALLBACKS.inc()
+        except BaseException:
+            limiter.release()
+            raise
+        else:
+            limiter.record_success()
+            return html
+
+    STAGE_SECONDS.observe(limiter.acquire(priority, deadline=deadline), stage="rate_limit_wait")
+    try:
+        html = _fetch_selenium(url, pause, deadline)
+    except BaseException:
+        limiter.release()
+        raise
+    if _looks_blocked(html):
+        limiter.record_failure()
+    else:
+        limiter.record_success()
+    return html
+
 
+def iter_result_pages(hashtag, backend=None, pause=3.0, max_pages=None, deadline=NO_DEADLINE,
+                      priority=PRIORITY_USER):
+    """
+    Lazily fetch successive DuckDuckGo result pages for a hashtag, yielding each
+    page's Reddit results. The next page is only requested when the caller asks
+    for it, and iteration ends at the last page or after max_pages pages.
+    Raises DeadlineExceeded if the deadline runs out before a page is fetched.
+    """
+    max_pages = MAX_PAGES if max_pages is None else max_pages
     # Build search query - search for hashtag content on Reddit via DuckDuckGo
     search_term = hashtag.strip("#")
     query = f'site:reddit.com {search_term}'
-    search_url = f"https://duckduckgo.com/html/?q={quote_plus(query)}"
+    page_url = f"{SEARCH_URL}?q={quote_plus(query)}"
 
-    try:
-        driver.get(search_url)
-        time.sleep(pause)  # wait for page to load
+    for _ in range(max_pages):
+        page_source = fetch_results_page(page_url, backend=backend, pause=pause, deadline=deadline,
+                                         priority=priority)
+        with time_stage("parse"):
+            results, next_params = parse_page(page_source)
+        yield results
+        if not next_params:
+            return
+        # The "Next" form's fields (offset, vqd token, ...) also work as a GET query
+        page_url = f"{SEARCH_URL}?{urlencode(next_params)}"
 
-        soup = BeautifulSoup(driver.page_source, "html.parser")
 
-        results = []
-        rank = 0
+def search_reddit_by_hashtag(hashtag: str, num_results: int = 10, pause: float = 3.0, backend: str = None,
+                             seen_urls: set = None, max_pages: int = None, deadline=None,
+                             priority: int = PRIORITY_USER):
+    """
+    Scrape DuckDuckGo search results for Reddit posts with a given hashtag.
+    Returns a PostBatch, which reads like a list of dicts:
+    {rank, title, url, snippet, subreddit, date_snippet}
 
-        # DuckDuckGo uses class "result" for search results
-        search_results = soup.find_all("div", class_="result")
+    Note: Switched from Google to DuckDuckGo to avoid CAPTCHA blocking.
+    backend selects "http" or "selenium" (defaults to SCRAPER_BACKEND); pause only
+    applies when a browser is used, as the longest wait for results to render.
+
+    Further result pages are fetched only until num_results unique posts are
+    collected (at most max_pages pages, default SCRAPER_MAX_PAGES). Pass the same
+    seen_urls set to several calls to also skip posts another hashtag returned;
+    the set is updated with the normalized URLs of the posts returned.
+
+    deadline (a Deadline) bounds the whole search. If it runs out before the
+    first page arrives, DeadlineExceeded is raised; if it runs out later, the
+    posts collected so far are returned with batch.partial set.
+
+    priority (rate_limiter.PRIORITY_*) orders this search's requests against
+    other scrapes waiting on the shared rate limit; pass PRIORITY_TRAINING for
+    training-data scrapes so user-facing searches go first.
+    """
+    deadline = deadline or NO_DEADLINE
+    seen_urls = set() if seen_urls is None else seen_urls
+    posts = []
+    with time_stage("search"):
+        pages = iter_result_pages(hashtag, backend=backend, pause=pause, max_pages=max_pages, deadline=deadline,
+                                  priority=priority)
+        try:
+            # A page without Reddit results is skipped; the pages end with the last
+            # "Next" link or max_pages
+            for page in pages:
+                for post in page:
+                    key = normalize_url(post["url"])
+                    if key in seen_urls:
+                        continue
+                    seen_urls.add(key)
+                    posts.append(dict(post, rank=len(posts) + 1))
+                    if len(posts) >= num_results:
+                        return PostBatch.from_dicts(posts)
+        except DeadlineExceeded:
+            if not posts:
+                raise
+            logger.warning("Deadline reached while scraping %s; returning %d posts", hashtag, len(posts))
+            batch = PostBatch.from_dicts(posts)
+            batch.partial = True
+            return batch
+    return PostBatch.from_dicts(posts)
 
-        for result_div in search_results[:num_results]:
-            try:
-                # Find title link
-                title_link = result_div.find("a", class_="result__a")
-                if not title_link:
-                    continue
-
-                href = title_link.get("href", "")
-                if not href:
-                    continue
-
-                # DuckDuckGo wraps URLs - extract the actual Reddit URL
-                if "uddg=" in href:
-                    import urllib.parse
-                    match = re.search(r'uddg=([^&]+)', href)
-                    if match:
-                        href = urllib.parse.unquote(match.group(1))
-
-                if not href or "reddit.com" not in href:
-                    continue
-
-                title = title_link.get_text(strip=True)
-                if not title:
-                    continue
-
-                # Find snippet
-                snippet = ""
-                snippet_div = result_div.find("a", class_="result__snippet")
-                if snippet_div:
-                    snippet = snippet_div.get_text(separator=" ").strip()[:300]
-
-                # Extract subreddit from URL
-                subreddit = None
-                try:
-                    parsed = urlparse(href)
-                    parts = parsed.path.split("/")
-                    if "r" in parts:
-                        idx = parts.index("r")
-                        if idx + 1 < len(parts):
-                            subreddit = parts[idx + 1]
-                except:
-                    subreddit = "unknown"
-
-                # Extract date if present in snippet
-                date_match = None
-                if snippet:
-                    date_search = re.search(r'\b(?:\d{1,2}\s(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b|\b\d{4}\b|\bago\b)', snippet)
-                    if date_search:
-                        date_match = date_search.group(0)
-
-                rank += 1
-                results.append({
-                    "rank": rank,
-                    "title": title,
-                    "url": href,
-                    "snippet": snippet,
-                    "subreddit": subreddit,
-                    "date_snippet": date_match
-                })
-
-                if rank >= num_results:
-                    break
-            except Exception as e:
-                continue
-
-        return results
-
-    finally:
-        driver.quit()
 
 if __name__ == "__main__":
     posts = search_reddit_by_hashtag("#politics", num_results=5)
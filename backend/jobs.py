@@ -0,0 +1,228 @@
+# jobs.py
+# Bounded background job queue for analysis requests.
+
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Worker threads executing jobs, and jobs allowed to wait before new ones are refused
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+# Seconds a finished job (and its result) stays available for polling
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "600"))
+
+
+class QueueFull(Exception):
+    """The queue is at capacity; retry_after is a suggested wait in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """One queued unit of work and the events it has produced so far"""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def publish(self, event, data):
+        with self._cond:
+            self.events.append((event, data))
+            self._cond.notify_all()
+
+    def _finish(self, status):
+        with self._cond:
+            self.status = status
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def wait_events(self, start, timeout=None):
+        """
+        Block until there are events after index start (or the job finishes).
+        returns: (new_events, done)
+        """
+        with self._cond:
+            if len(self.events) <= start and not self.done:
+                self._cond.wait(timeout)
+            return self.events[start:], self.done
+
+    def to_dict(self):
+        info = {
+            "job_id": self.id,
+            "hashtag": self.key,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "done":
+            info["result"] = self.result
+        elif self.status == "failed":
+            info["error"] = self.error
+            info["error_status"] = self.error_status
+        return info
+
+
+class JobQueue:
+    """
+    Runs runner(key) on a fixed pool of worker threads.
+
+    runner must be a generator of (event, data) pairs; every pair is
+    recorded on the job for pollers and subscribers, and the data of the
+    result_event becomes the job's result. An exception fails the job and
+    publishes error_event with {"error", "status"} (status comes from the
+    exception's .status attribute, default 500).
+
+    Submitting a key that already has a queued or running job returns that
+    job instead of starting another. Once max_queued jobs are waiting,
+    submit() raises QueueFull with a retry-after estimate.
+    """
+
+    def __init__(self, runner, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE,
+                 result_event="complete", error_event="error", retention=JOB_RETENTION_SECONDS):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.result_event = result_event
+        self.error_event = error_event
+        self.retention = retention
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+
+        # metrics
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+    def start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                t = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        return self
+
+    def _retry_after(self):
+        finished = self.completed + self.failed
+        avg_run = self.run_seconds_total / finished if finished else 10.0
+        return max(1, int(avg_run * (self._queue.qsize() + 1) / self.workers + 0.5))
+
+    def _purge(self, now):
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and now - job.finished_at > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, key):
+        """Queue a job for key (or join the in-flight one); returns (job, created)"""
+        if not self._threads:
+            self.start()
+        with self._lock:
+            self._purge(time.time())
+            job = self._inflight.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                return job, False
+            if self._queue.qsize() >= self.max_queued:
+                self.rejected += 1
+                raise QueueFull(self._retry_after())
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self.submitted += 1
+            self._queue.put(job)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.started_at = time.time()
+            job.status = "running"
+            with self._lock:
+                self._running += 1
+                waited = job.started_at - job.created_at
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+            status = "failed"
+            try:
+                for event, data in self.runner(job.key):
+                    if event == self.result_event:
+                        job.result = data
+                    job.publish(event, data)
+                status = "done" if job.result is not None else "failed"
+                if job.result is None:
+                    job.error, job.error_status = "Job finished without a result", 500
+            except Exception as e:
+                job.error = str(e) or e.__class__.__name__
+                job.error_status = getattr(e, "status", 500)
+                if job.error_status >= 500:
+                    logger.exception("Job %s (%s) failed", job.id, job.key)
+            if status == "failed":
+                job.publish(self.error_event, {"error": job.error, "status": job.error_status})
+
+            with self._lock:
+                self._running -= 1
+                self._inflight.pop(job.key, None)
+                ran = time.time() - job.started_at
+                self.run_seconds_total += ran
+                self.run_seconds_max = max(self.run_seconds_max, ran)
+                if status == "done":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            job._finish(status)
+
+    def stats(self):
+        with self._lock:
+            started = self.completed + self.failed + self._running
+            finished = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self.max_queued,
+                "running": self._running,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_seconds_avg": round(self.wait_seconds_total / started, 3) if started else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 3),
+                "run_seconds_avg": round(self.run_seconds_total / finished, 3) if finished else 0.0,
+                "run_seconds_max": round(self.run_seconds_max, 3),
+            }
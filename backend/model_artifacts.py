@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# model_artifacts.py
+# Model artifacts as memory-mappable .npy arrays plus a manifest with a version and checksums.
+#
+# Usage:
+#   python backend/model_artifacts.py --export     # convert the .joblib model and vectorizer
+#   python backend/model_artifacts.py --verify     # check the manifest checksums
+
+import os
+import json
+import hashlib
+import argparse
+from functools import cached_property
+from collections.abc import Mapping
+from datetime import datetime, timezone
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Directory holding manifest.json and the arrays it lists
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", os.path.join(HERE, "model_artifacts"))
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# TfidfVectorizer settings stored in the manifest; everything else is left at the default
+VECTORIZER_PARAMS = ("lowercase", "token_pattern", "ngram_range", "norm", "use_idf",
+                     "smooth_idf", "sublinear_tf")
+
+
+class ArtifactError(Exception):
+    """The artifact directory is missing, incomplete or fails its checksums"""
+
+
+class ArrayVocabulary(Mapping):
+    """
+    Read-only term -> column mapping over a sorted term array (usually memory-mapped),
+    usable as a TfidfVectorizer vocabulary_. Lookups are a binary search, so no
+    per-process dict of the vocabulary is built.
+    """
+
+    def __init__(self, terms, columns):
+        self.terms = terms
+        self.columns = columns
+
+    def __getitem__(self, term):
+        i = int(np.searchsorted(self.terms, term))
+        if i < len(self.terms) and self.terms[i] == term:
+            return int(self.columns[i])
+        raise KeyError(term)
+
+    def __iter__(self):
+        return (str(t) for t in self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class ArtifactVectorizer:
+    """
+    TextVectorizer-compatible TF-IDF transform over the artifact arrays.
+    Tokens come from the sklearn analyzer; all distinct n-grams of a batch are then
+    looked up in the sorted term array with one searchsorted call, instead of one
+    dict (or binary-search) lookup per n-gram. Output equals TfidfVectorizer.transform.
+    """
+
+    def __init__(self, tfidf, terms, columns, idf):
+        self.tfidf = tfidf
+        self.terms = terms
+        self.columns = columns
+        self.idf = idf
+        self._analyze = tfidf.build_analyzer()
+
+    def fit(self, texts):
+        return self
+
+    def transform(self, texts):
+        import scipy.sparse as sp
+        from sklearn.preprocessing import normalize
+
+        docs = [self._analyze(t) for t in texts]
+        lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+        shape = (len(docs), len(self.idf))
+        tokens = np.array([tok for d in docs for tok in d], dtype=str)
+        if not len(tokens) or not len(self.terms):
+            return sp.csr_matrix(shape, dtype=np.float64)
+
+        uniq, inverse = np.unique(tokens, return_inverse=True)
+        pos = np.minimum(np.searchsorted(self.terms, uniq), len(self.terms) - 1)
+        known = self.terms[pos] == uniq
+        keep = known[inverse]
+        rows = np.repeat(np.arange(len(docs)), lengths)[keep]
+        cols = self.columns[pos][inverse][keep]
+        X = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+        X.sum_duplicates()
+
+        if self.tfidf.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.tfidf.use_idf:
+            X.data *= self.idf[X.indices]
+        if self.tfidf.norm is not None:
+            X = normalize(X, norm=self.tfidf.norm, copy=False)
+        return X
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _save_array(directory, name, array):
+    # Write to a temporary file and rename it into place, so processes that still
+    # map the previous file keep reading the old (unlinked) data
+    path = os.path.join(directory, f"{name}.npy")
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+    return {"file": f"{name}.npy", "sha256": _sha256(path),
+            "shape": list(array.shape), "dtype": array.dtype.str}
+
+
+def save_artifacts(clf, vectorizer, directory=MODEL_ARTIFACT_DIR, info=None):
+    """
+    Write a fitted LogisticRegression and TF-IDF vectorizer (sklearn object or
+    TextVectorizer) as .npy arrays and a manifest.
+    returns: the manifest dict
+    """
+    import sklearn
+
+    tfidf = getattr(vectorizer, "tfidf", vectorizer)
+    os.makedirs(directory, exist_ok=True)
+
+    terms = sorted(tfidf.vocabulary_)
+    arrays = {
+        "coef": np.ascontiguousarray(clf.coef_, dtype=np.float64),
+        "intercept": np.asarray(clf.intercept_, dtype=np.float64),
+        "classes": np.asarray(clf.classes_),
+        "idf": np.asarray(tfidf.idf_, dtype=np.float64),
+        "vocab_terms": np.array(terms, dtype=str),
+        "vocab_columns": np.array([tfidf.vocabulary_[t] for t in terms], dtype=np.int32),
+    }
+    files = {name: _save_array(directory, name, array) for name, array in arrays.items()}
+
+    params = tfidf.get_params()
+    model_version = hashlib.sha256(
+        "".join(files[name]["sha256"] for name in sorted(files)).encode()).hexdigest()[:12]
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "model_version": model_version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "n_text_features": len(terms),
+        "n_features": int(arrays["coef"].shape[1]),
+        "vectorizer": {k: list(params[k]) if k == "ngram_range" else params[k] for k in VECTORIZER_PARAMS},
+        "info": info or {},
+        "files": files,
+    }
+    tmp = os.path.join(directory, f"{MANIFEST}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST))
+    return manifest
+
+
+def read_manifest(directory=MODEL_ARTIFACT_DIR):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f"No model manifest in {directory}")
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format_version')!r}")
+    return manifest
+
+
+def verify_artifacts(directory=MODEL_ARTIFACT_DIR, manifest=None):
+    """Check every listed file against its sha256; raises ArtifactError on a mismatch"""
+    manifest = manifest or read_manifest(directory)
+    for name, entry in manifest["files"].items():
+        path = os.path.join(directory, entry["file"])
+        if not os.path.exists(path):
+            raise ArtifactError(f"Missing artifact file {entry['file']}")
+        if _sha256(path) != entry["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {entry['file']}")
+    return manifest
+
+
+class ModelArtifacts:
+    """
+    Loaded artifact set. The arrays are memory-mapped read-only, so every worker
+    process on the host shares one copy of the weights and vocabulary in the page
+    cache. clf is a LogisticRegression and tfidf a TfidfVectorizer built around
+    those arrays on first access (so sklearn is only imported when they are used);
+    vectorizer is the batch transform used for scoring.
+    """
+
+    def __init__(self, directory=MODEL_ARTIFACT_DIR, verify=True):
+        self.directory = directory
+        self.manifest = verify_artifacts(directory) if verify else read_manifest(directory)
+        self.arrays = {}
+        for name, entry in self.manifest["files"].items():
+            array = np.load(os.path.join(directory, entry["file"]), mmap_mode="r")
+            if list(array.shape) != entry["shape"] or array.dtype.str != entry["dtype"]:
+                raise ArtifactError(f"{entry['file']} does not match the manifest")
+            self.arrays[name] = array
+        self.version = self.manifest["model_version"]
+        self.vocabulary = ArrayVocabulary(self.arrays["vocab_terms"], self.arrays["vocab_columns"])
+
+    @cached_property
+    def vectorizer(self):
+        return ArtifactVectorizer(self.tfidf, self.arrays["vocab_terms"],
+                                  self.arrays["vocab_columns"], self.arrays["idf"])
+
+    @cached_property
+    def clf(self):
+        from sklearn.linear_model import LogisticRegression
+
+        clf = LogisticRegression()
+        clf.coef_ = self.arrays["coef"]
+        clf.intercept_ = self.arrays["intercept"]
+        clf.classes_ = np.asarray(self.arrays["classes"])
+        clf.n_features_in_ = clf.coef_.shape[1]
+        return clf
+
+    @cached_property
+    def tfidf(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        params = dict(self.manifest["vectorizer"], ngram_range=tuple(self.manifest["vectorizer"]["ngram_range"]))
+        tfidf = TfidfVectorizer(**params)
+        tfidf.vocabulary_ = self.vocabulary
+        tfidf.fixed_vocabulary_ = True
+        tfidf.idf_ = self.arrays["idf"]
+        return tfidf
+
+    def info(self):
+        return {
+            "model_version": self.version,
+            "created_at": self.manifest["created_at"],
+            "n_features": self.manifest["n_features"],
+            "directory": self.directory,
+        }
+
+
+def load_artifacts(directory=MODEL_ARTIFACT_DIR, verify=True):
+    return ModelArtifacts(directory, verify=verify)
+
+
+def main(argv=None):
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export or verify memory-mappable model artifacts")
+    parser.add_argument("--export", action="store_true", help="convert the .joblib files into artifacts")
+    parser.add_argument("--verify", action="store_true", help="check the manifest checksums")
+    parser.add_argument("--model", default=os.path.join(HERE, "misinfo_logreg_model.joblib"))
+    parser.add_argument("--vectorizer", default=os.path.join(HERE, "tfidf_vectorizer.joblib"))
+    parser.add_argument("--dir", default=MODEL_ARTIFACT_DIR)
+    args = parser.parse_args(argv)
+
+    if args.export:
+        manifest = save_artifacts(joblib.load(args.model), joblib.load(args.vectorizer), args.dir,
+                                  info={"source": [os.path.basename(args.model), os.path.basename(args.vectorizer)]})
+        print(f"✓ Wrote model {manifest['model_version']} to {args.dir}")
+    if args.verify or not args.export:
+        manifest = verify_artifacts(args.dir)
+        print(f"✓ Model {manifest['model_version']}: {len(manifest['files'])} files match their checksums")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# model_refresher.py
+# Retrains the served model in the background and swaps it in atomically.
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Minutes between background retrains
+REFRESH_INTERVAL_MINUTES = float(os.getenv("MODEL_REFRESH_MINUTES", "60"))
+
+
+class RefreshSkipped(Exception):
+    """Raised by collect() when this round's corpus should not replace the served model"""
+
+
+class ModelRefresher:
+    """
+    Periodically calls collect() -> (records, labels, info) and train(records, labels)
+    -> model dict, then publishes the result as the served model.
+
+    Readers call current() and get a complete snapshot; a refresh only replaces
+    the reference once training has finished, so requests never see a
+    half-built model. If collect() raises RefreshSkipped (or anything fails),
+    the current model stays in place and the reason is kept in last_error.
+    """
+
+    def __init__(self, collect, train, interval_minutes=REFRESH_INTERVAL_MINUTES):
+        self.collect = collect
+        self.train = train
+        self.interval = interval_minutes * 60
+        self._model = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_refresh = None
+        self.last_duration = None
+        self.last_error = None
+
+    def current(self):
+        """The model currently being served, or None before the first refresh"""
+        return self._model
+
+    def publish(self, model, duration=None):
+        """Swap in a newly trained model and return it with its version stamped"""
+        with self._lock:
+            self._version += 1
+            model = dict(model)
+            model["version"] = self._version
+            model["trained_at"] = datetime.now()
+            model["training_seconds"] = duration
+            self._model = model
+            self.last_refresh = model["trained_at"]
+            self.last_duration = duration
+            self.last_error = None
+        return model
+
+    def refresh(self):
+        """Scrape, retrain and publish once; concurrent callers wait for the one in progress"""
+        with self._refresh_lock:
+            start = time.monotonic()
+            try:
+                records, labels, info = self.collect()
+                model = self.train(records, labels)
+                model.update(info or {})
+            except RefreshSkipped as e:
+                self.last_error = str(e)
+                logger.warning("Background model refresh skipped: %s", e)
+                return None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Background model refresh failed")
+                return None
+            published = self.publish(model, duration=time.monotonic() - start)
+            logger.info("Published model v%d (%d samples, %.1fs)", published["version"],
+                        len(records), published["training_seconds"])
+            return published
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start the background thread (first refresh runs immediately)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def trigger(self):
+        """Ask the background thread to refresh now instead of waiting for the interval"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def status(self):
+        model = self._model
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "model_version": model["version"] if model else None,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "training_seconds": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "training_samples": model.get("n_samples") if model else None,
+            "refresh_interval_minutes": self.interval / 60,
+            "last_error": self.last_error,
+        }
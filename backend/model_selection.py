@@ -0,0 +1,175 @@
+# model_selection.py
+# Cross-validated grid search over vectorizer and classifier settings, run on a process pool.
+#
+# Usage (through train_model.py):
+#   python train_model.py --select                      all cores, 5 folds, default grid
+#   python train_model.py --select --folds 3 --workers 4 --min-accuracy 0.8
+
+import os
+import json
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from backend.features import TextVectorizer, combine_features, engineered_features, post_texts
+    from backend.train_model import make_classifier
+except ImportError:
+    from features import TextVectorizer, combine_features, engineered_features, post_texts
+    from train_model import make_classifier
+
+# Settings searched by default; every vectorizer setting is paired with every classifier setting
+VECTORIZER_GRID = {"max_features": [250, 500, 2000], "ngram_range": [(1, 1), (1, 2)]}
+CLASSIFIER_GRID = {"C": [0.1, 1.0, 10.0], "class_weight": [None, "balanced"]}
+
+# Candidates within this accuracy of the best count as accurate enough
+ACCURACY_TOLERANCE = 0.01
+
+# Corpus and folds, set once per worker process by _init_worker
+_shared = {}
+
+
+def expand_grid(grid):
+    """{"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _init_worker(texts, X_eng, labels, folds):
+    _shared.update(texts=texts, X_eng=X_eng, labels=labels, folds=folds)
+
+
+def evaluate_fold(vectorizer_params, fold, classifier_grid):
+    """
+    Fit the vectorizer on one fold's training split, then fit and score every
+    classifier setting on the same matrices (the vectorizer is fit once per fold,
+    not once per candidate). predict_seconds covers vectorizing the held-out
+    texts plus predict, i.e. what scoring them would cost.
+    returns: one result dict per classifier setting
+    """
+    texts, X_eng, labels = _shared["texts"], _shared["X_eng"], _shared["labels"]
+    train, test = _shared["folds"][fold]
+
+    start = time.perf_counter()
+    vectorizer = TextVectorizer(**vectorizer_params).fit([texts[i] for i in train])
+    X_train = combine_features(vectorizer.transform([texts[i] for i in train]), X_eng[train])
+    vectorize_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X_test = combine_features(vectorizer.transform([texts[i] for i in test]), X_eng[test])
+    transform_seconds = time.perf_counter() - start
+
+    results = []
+    for clf_params in classifier_grid:
+        clf = make_classifier(clf_params)
+        start = time.perf_counter()
+        clf.fit(X_train, labels[train])
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        predicted = clf.predict(X_test)
+        predict_seconds = transform_seconds + time.perf_counter() - start
+
+        results.append({
+            "vectorizer": vectorizer_params,
+            "classifier": clf_params,
+            "fold": fold,
+            "accuracy": float(np.mean(predicted == labels[test])),
+            "vectorize_seconds": vectorize_seconds,
+            "fit_seconds": fit_seconds,
+            "predict_seconds": predict_seconds,
+            "n_features": X_train.shape[1],
+        })
+    return results
+
+
+def summarize(fold_results):
+    """Average per-fold results into one entry per candidate, most accurate (then fastest) first"""
+    groups = {}
+    for r in fold_results:
+        key = (json.dumps(r["vectorizer"], sort_keys=True), json.dumps(r["classifier"], sort_keys=True))
+        groups.setdefault(key, []).append(r)
+
+    candidates = []
+    for results in groups.values():
+        accuracy = np.array([r["accuracy"] for r in results])
+        candidates.append({
+            "vectorizer": results[0]["vectorizer"],
+            "classifier": results[0]["classifier"],
+            "accuracy": float(accuracy.mean()),
+            "accuracy_std": float(accuracy.std()),
+            "vectorize_seconds": float(np.mean([r["vectorize_seconds"] for r in results])),
+            "fit_seconds": float(np.mean([r["fit_seconds"] for r in results])),
+            "predict_seconds": float(np.mean([r["predict_seconds"] for r in results])),
+            "n_features": int(np.mean([r["n_features"] for r in results])),
+            "folds": len(results),
+        })
+    candidates.sort(key=lambda c: (-c["accuracy"], c["predict_seconds"]))
+    return candidates
+
+
+def choose_candidate(candidates, min_accuracy=None, tolerance=ACCURACY_TOLERANCE):
+    """
+    The fastest-predicting candidate that is accurate enough: at least min_accuracy,
+    or by default within tolerance of the best. If none qualifies, the most accurate.
+    """
+    best = max(candidates, key=lambda c: c["accuracy"])
+    floor = best["accuracy"] - tolerance if min_accuracy is None else min_accuracy
+    eligible = [c for c in candidates if c["accuracy"] >= floor]
+    if not eligible:
+        return best
+    return min(eligible, key=lambda c: (c["predict_seconds"], c["fit_seconds"], -c["accuracy"]))
+
+
+def stratified_folds(labels, folds, seed=42):
+    """(train_indices, test_indices) per fold; folds is capped by the smallest class"""
+    from sklearn.model_selection import StratifiedKFold
+
+    smallest = int(np.bincount(labels).min()) if len(np.unique(labels)) > 1 else 0
+    folds = min(folds, smallest)
+    if folds < 2:
+        raise ValueError("Cross-validation needs at least 2 posts of each class")
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(labels)), labels))
+
+
+def select_model(records, labels, vectorizer_grid=None, classifier_grid=None, folds=5, workers=None,
+                 engineered=None):
+    """
+    Cross-validate every combination of vectorizer_grid x classifier_grid
+    (defaults VECTORIZER_GRID / CLASSIFIER_GRID) on records.
+    Each (vectorizer setting, fold) pair is one task on a pool of workers
+    processes (default: all cores; 1 runs inline). Engineered features do not
+    depend on the settings, so they are computed once here.
+    Returns dict: {candidates (see summarize), folds, workers, n_samples, elapsed_seconds}
+    """
+    labels = np.asarray(labels)
+    vectorizer_settings = expand_grid(vectorizer_grid or VECTORIZER_GRID)
+    classifier_settings = expand_grid(classifier_grid or CLASSIFIER_GRID)
+    fold_indices = stratified_folds(labels, folds)
+    texts = post_texts(records)
+    X_eng = (engineered or engineered_features(records, texts))[0]
+
+    tasks = [(params, fold) for params in vectorizer_settings for fold in range(len(fold_indices))]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    shared = (texts, X_eng, labels, fold_indices)
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(*shared)
+        fold_results = [evaluate_fold(params, fold, classifier_settings) for params, fold in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=shared) as pool:
+            futures = [pool.submit(evaluate_fold, params, fold, classifier_settings) for params, fold in tasks]
+            fold_results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+
+    return {
+        "candidates": summarize([r for results in fold_results for r in results]),
+        "folds": len(fold_indices),
+        "workers": workers,
+        "n_samples": len(labels),
+        "elapsed_seconds": elapsed,
+    }
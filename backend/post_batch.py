@@ -0,0 +1,160 @@
+# post_batch.py
+# Column-oriented container for scraped posts (one list/array per field instead of a dict per post).
+
+import sys
+
+import numpy as np
+
+# Fields a scraped post carries; any other keys (hashtag, label, ...) go in PostBatch.extra
+FIELDS = ("rank", "title", "url", "snippet", "subreddit", "date_snippet")
+RANK_MAX = np.iinfo(np.int32).max
+
+
+def _rank(value):
+    """A post's rank as a positive int that fits the int32 column, or 0 (unknown)"""
+    try:
+        rank = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+    return rank if 0 < rank <= RANK_MAX else 0
+
+
+class PostBatch:
+    """
+    A batch of posts stored as columns.
+
+    rank is an int32 array (0 = unknown) and subreddit is an int32 array of codes
+    into the subreddits list, whose names are interned, so both are NumPy columns
+    the feature code can use without walking records. title, url, snippet and
+    date_snippet are plain lists. extra holds, per post, a dict of any keys
+    outside FIELDS (e.g. hashtag, label), or None when there are none. partial is
+    set when the scrape that produced the batch was cut short (e.g. by a request
+    deadline).
+
+    The batch is also a read-only sequence of post dicts: iterating, indexing and
+    len() behave like the list of dicts the scraper used to return, so existing
+    consumers keep working. Indexing with a slice returns a PostBatch.
+    """
+
+    __slots__ = ("rank", "title", "url", "snippet", "subreddit", "subreddits", "date_snippet", "extra", "partial")
+
+    def __init__(self, rank, title, url, snippet, subreddit, subreddits, date_snippet, extra=None, partial=False):
+        self.rank = rank
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.subreddit = subreddit
+        self.subreddits = subreddits
+        self.date_snippet = date_snippet
+        self.extra = [None] * len(title) if extra is None else extra
+        self.partial = partial
+
+    @classmethod
+    def from_dicts(cls, records):
+        """Build a batch from post dicts (or return records unchanged if already a batch)"""
+        if isinstance(records, cls):
+            return records
+        records = list(records)
+        codes = {}
+        subreddits = []
+        sub_col = np.empty(len(records), dtype=np.int32)
+        rank_col = np.empty(len(records), dtype=np.int32)
+        for i, r in enumerate(records):
+            name = r.get("subreddit")
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(subreddits)
+                subreddits.append(sys.intern(name) if isinstance(name, str) else name)
+            sub_col[i] = code
+            rank_col[i] = _rank(r.get("rank"))
+        return cls(
+            rank=rank_col,
+            title=[r.get("title") or "" for r in records],
+            url=[r.get("url") or "" for r in records],
+            snippet=[r.get("snippet") or "" for r in records],
+            subreddit=sub_col,
+            subreddits=subreddits,
+            date_snippet=[r.get("date_snippet") for r in records],
+            extra=[{k: v for k, v in r.items() if k not in FIELDS} or None for r in records],
+        )
+
+    @classmethod
+    def concat(cls, batches):
+        """Join several batches (or dict lists) into one"""
+        batches = [cls.from_dicts(b) for b in batches]
+        codes = {}
+        subreddits = []
+        sub_cols = []
+        for b in batches:
+            remap = np.empty(len(b.subreddits), dtype=np.int32)
+            for j, name in enumerate(b.subreddits):
+                if name not in codes:
+                    codes[name] = len(subreddits)
+                    subreddits.append(name)
+                remap[j] = codes[name]
+            sub_cols.append(remap[b.subreddit] if len(b) else b.subreddit)
+        return cls(
+            rank=np.concatenate([b.rank for b in batches]) if batches else np.empty(0, dtype=np.int32),
+            title=[t for b in batches for t in b.title],
+            url=[u for b in batches for u in b.url],
+            snippet=[s for b in batches for s in b.snippet],
+            subreddit=np.concatenate(sub_cols) if batches else np.empty(0, dtype=np.int32),
+            subreddits=subreddits,
+            date_snippet=[d for b in batches for d in b.date_snippet],
+            extra=[e for b in batches for e in b.extra],
+            partial=any(b.partial for b in batches),
+        )
+
+    def __len__(self):
+        return len(self.title)
+
+    def record(self, i):
+        rank = int(self.rank[i])
+        record = {
+            "rank": rank or None,
+            "title": self.title[i],
+            "url": self.url[i],
+            "snippet": self.snippet[i],
+            "subreddit": self.subreddits[self.subreddit[i]],
+            "date_snippet": self.date_snippet[i],
+        }
+        if self.extra[i]:
+            record.update(self.extra[i])
+        return record
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PostBatch(self.rank[index], self.title[index], self.url[index], self.snippet[index],
+                             self.subreddit[index], self.subreddits, self.date_snippet[index], self.extra[index],
+                             self.partial)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PostBatch index out of range")
+        return self.record(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def to_dicts(self):
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (PostBatch, list, tuple)):
+            return self.to_dicts() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        partial = ", partial" if self.partial else ""
+        return f"PostBatch({len(self)} posts, {len(self.subreddits)} subreddits{partial})"
+
+    def texts(self):
+        """post_text() for every post: title and snippet joined by a space"""
+        return [f"{t} {s}" if t and s else t or s for t, s in zip(self.title, self.snippet)]
+
+    def subreddit_values(self, table, default):
+        """Per-post lookup of a subreddit-level value, e.g. SUBREDDIT_RISK, as a float array"""
+        values = np.array([table.get(name.lower(), default) if name else default
+                           for name in self.subreddits], dtype=float)
+        return values[self.subreddit] if len(values) else np.empty(0)
@@ -0,0 +1,188 @@
+# post_store.py
+# One canonical record per Reddit post (keyed by normalized URL), with its hashtags and cached feature row.
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from backend.features import engineered_features
+    from backend.result_parser import normalize_url
+except ImportError:
+    from features import engineered_features
+    from result_parser import normalize_url
+
+# Unique posts kept in memory; the least recently seen are dropped first
+POST_STORE_MAX_ENTRIES = int(os.getenv("POST_STORE_MAX_ENTRIES", "50000"))
+
+# Post fields the engineered feature row depends on
+_FEATURE_FIELDS = ("title", "snippet", "subreddit", "rank")
+
+
+def _content(post):
+    return tuple(post.get(f) for f in _FEATURE_FIELDS)
+
+
+class StoredPost:
+    __slots__ = ("post", "hashtags", "first_seen", "last_seen", "features", "features_for")
+
+    def __init__(self, post, now):
+        self.post = post
+        self.hashtags = {}      # hashtag -> last time the post was scraped under it
+        self.first_seen = now
+        self.last_seen = now
+        self.features = None    # (engineered row, clickbait score, display keywords)
+        self.features_for = None  # _content() the cached row was computed from
+
+
+class PostStore:
+    """
+    Deduplicating store of scraped posts.
+
+    The first scrape of a URL becomes its canonical record; later scrapes (under
+    the same or other hashtags) only record the hashtag and time. Engineered
+    feature rows are cached per post and recomputed only when the fields they
+    depend on change.
+    """
+
+    def __init__(self, max_entries=POST_STORE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._posts = OrderedDict()
+        self._lock = threading.RLock()
+        self.duplicates = 0
+        self.feature_hits = 0
+        self.feature_misses = 0
+
+    @staticmethod
+    def key(post):
+        url = post.get("url")
+        return normalize_url(url) if url else None
+
+    def add(self, post, hashtag=None, seen_at=None):
+        """Record a scraped post; returns its key (None for posts without a URL)"""
+        key = self.key(post)
+        if key is None:
+            return None
+        now = time.time() if seen_at is None else seen_at
+        with self._lock:
+            stored = self._posts.get(key)
+            if stored is None:
+                stored = self._posts[key] = StoredPost(dict(post), now)
+                while len(self._posts) > self.max_entries:
+                    self._posts.popitem(last=False)
+            else:
+                self.duplicates += 1
+                stored.last_seen = now
+                self._posts.move_to_end(key)
+            if hashtag:
+                stored.hashtags[hashtag] = now
+        return key
+
+    def add_many(self, posts, hashtag=None, seen_at=None):
+        """Record a scrape; returns the keys of its posts, without repeats, in order"""
+        keys = (self.add(post, hashtag, seen_at) for post in posts)
+        return list(dict.fromkeys(k for k in keys if k is not None))
+
+    def keys_for(self, posts, hashtag=None):
+        """
+        Keys of already-scraped posts (without repeats, in order). Posts the store
+        has not seen yet, e.g. ones served from the on-disk scrape cache after a
+        restart, are added; known posts are not counted as new sightings.
+        """
+        keys = []
+        with self._lock:
+            for post in posts:
+                key = self.key(post)
+                if key is None:
+                    continue
+                stored = self._posts.get(key)
+                if stored is None:
+                    self.add(post, hashtag)
+                elif hashtag and hashtag not in stored.hashtags:
+                    stored.hashtags[hashtag] = time.time()
+                keys.append(key)
+        return list(dict.fromkeys(keys))
+
+    def get(self, key):
+        with self._lock:
+            stored = self._posts.get(key)
+            return stored.post if stored else None
+
+    def hashtags(self, key):
+        """Hashtags the post was scraped under, mapped to the last time it was seen there"""
+        with self._lock:
+            stored = self._posts.get(key)
+            return dict(stored.hashtags) if stored else {}
+
+    def __len__(self):
+        return len(self._posts)
+
+    def training_set(self, tag_labels, keys=None):
+        """
+        Deduplicated training posts for labeled hashtags.
+        tag_labels maps hashtag -> label; a post seen under several labeled hashtags
+        takes the label of the first one in tag_labels order. keys restricts the
+        set (e.g. to the posts of the current scrape); default is every stored post.
+        returns: (canonical posts, labels)
+        """
+        posts, labels = [], []
+        with self._lock:
+            for key in (self._posts if keys is None else keys):
+                stored = self._posts.get(key)
+                if stored is None:
+                    continue
+                label = next((lbl for tag, lbl in tag_labels.items() if tag in stored.hashtags), None)
+                if label is not None:
+                    posts.append(stored.post)
+                    labels.append(label)
+        return posts, labels
+
+    def engineered(self, posts):
+        """
+        engineered_features(posts), computing rows only for posts that are not
+        cached (or whose title/snippet/subreddit/rank changed since).
+        returns: (X_engineered_np, clickbait_scores_np, display_keywords_per_post)
+        """
+        rows = [None] * len(posts)
+        missing = []
+        with self._lock:
+            for i, post in enumerate(posts):
+                stored = self._posts.get(self.key(post))
+                if stored is not None and stored.features is not None and stored.features_for == _content(post):
+                    rows[i] = stored.features
+                else:
+                    missing.append(i)
+            self.feature_hits += len(posts) - len(missing)
+            self.feature_misses += len(missing)
+
+        if missing:
+            X_new, cb_new, kw_new = engineered_features([posts[i] for i in missing])
+            with self._lock:
+                for j, i in enumerate(missing):
+                    rows[i] = (X_new[j], float(cb_new[j]), kw_new[j])
+                    stored = self._posts.get(self.key(posts[i]))
+                    if stored is not None:
+                        stored.features = rows[i]
+                        stored.features_for = _content(posts[i])
+
+        if not rows:
+            X_empty, cb_empty, _ = engineered_features([])
+            return X_empty, cb_empty, []
+        X_eng = np.vstack([r[0] for r in rows])
+        clickbait = np.array([r[1] for r in rows])
+        return X_eng, clickbait, [list(r[2]) for r in rows]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.feature_hits + self.feature_misses
+            return {
+                "posts": len(self._posts),
+                "max_entries": self.max_entries,
+                "duplicates_seen": self.duplicates,
+                "feature_cache_hits": self.feature_hits,
+                "feature_cache_misses": self.feature_misses,
+                "feature_cache_hit_ratio": round(self.feature_hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,280 @@
+# rate_limiter.py
+# Search-endpoint rate limit shared by every worker process: a SQLite token bucket with
+# priority queueing and a circuit breaker that pauses scraping while we are being blocked.
+
+import os
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+
+try:
+    from backend.deadline import NO_DEADLINE
+except ImportError:
+    from deadline import NO_DEADLINE
+
+logger = logging.getLogger(__name__)
+
+# Requests per second to the search endpoint across all processes (0 disables the limit),
+# and how many may go out back to back after a quiet period
+SCRAPE_RATE = float(os.getenv("SCRAPE_RATE", "1.0"))
+SCRAPE_BURST = float(os.getenv("SCRAPE_BURST", "5"))
+# SQLite file shared by the worker processes; unset limits each process on its own
+SCRAPE_LIMIT_DB = os.getenv("SCRAPE_LIMIT_DB") or None
+# Seconds a scrape may wait for its turn before giving up
+SCRAPE_LIMIT_TIMEOUT = float(os.getenv("SCRAPE_LIMIT_TIMEOUT", "60"))
+# Consecutive blocked/empty responses that open the breaker, and the pause that follows
+# (doubled each time a probe after the pause is blocked again, up to the maximum)
+BREAKER_THRESHOLD = int(os.getenv("SCRAPE_BREAKER_THRESHOLD", "3"))
+BREAKER_COOLDOWN = float(os.getenv("SCRAPE_BREAKER_COOLDOWN", "30"))
+BREAKER_MAX_COOLDOWN = float(os.getenv("SCRAPE_BREAKER_MAX_COOLDOWN", "600"))
+
+# Lower values are served first
+PRIORITY_USER = 0       # an /analyze request is waiting on it
+PRIORITY_BATCH = 1      # /batch_score
+PRIORITY_TRAINING = 2   # training-corpus scrapes
+
+POLL_SECONDS = 0.05
+# A waiter that has not polled for this long is assumed dead (its process exited)
+WAITER_TTL = 10.0
+# A half-open probe that never reported back frees the slot after this long
+PROBE_TIMEOUT = 60.0
+
+
+class CircuitOpen(Exception):
+    """Scraping is paused because the search endpoint kept blocking us; retry_after in seconds"""
+
+    status = 503
+
+    def __init__(self, retry_after):
+        super().__init__(f"Search endpoint is blocking requests; scraping paused for {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class RateLimitTimeout(TimeoutError):
+    """No request slot became free within the wait limit"""
+
+
+class RateLimiter:
+    """
+    Global request rate for the search endpoint.
+
+    acquire() blocks until the caller may send one request: the token bucket
+    (rate per second, up to burst saved up) has a token, no waiter with a lower
+    priority value (or the same priority, queued earlier) is ahead, and the
+    circuit breaker is closed. Callers report each response with
+    record_success() / record_failure(); threshold failures in a row open the
+    breaker for cooldown seconds, after which one probe request is let through
+    (half-open) to decide whether to close it or pause again, for twice as long.
+
+    State lives in SQLite, so processes pointing at the same db_path share one
+    budget; with no db_path it is an in-memory database private to this process.
+    """
+
+    def __init__(self, rate=SCRAPE_RATE, burst=SCRAPE_BURST, db_path=SCRAPE_LIMIT_DB,
+                 timeout=SCRAPE_LIMIT_TIMEOUT, threshold=BREAKER_THRESHOLD,
+                 cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.db_path = db_path
+        self.timeout = timeout
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        # Transactions are issued explicitly (BEGIN IMMEDIATE locks out other processes)
+        self._conn = sqlite3.connect(db_path or ":memory:", timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        now = time.time()
+        with self._lock:
+            if db_path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS bucket ("
+                               " id INTEGER PRIMARY KEY CHECK (id = 0), tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS waiters ("
+                               " id TEXT PRIMARY KEY, priority INTEGER NOT NULL,"
+                               " enqueued_at REAL NOT NULL, seen_at REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS breaker ("
+                               " id INTEGER PRIMARY KEY CHECK (id = 0), state TEXT NOT NULL, failures INTEGER NOT NULL,"
+                               " opened_until REAL NOT NULL, cooldown REAL NOT NULL, probe_at REAL)")
+            self._conn.execute("INSERT OR IGNORE INTO bucket VALUES (0, ?, ?)", (self.burst, now))
+            self._conn.execute("INSERT OR IGNORE INTO breaker VALUES (0, 'closed', 0, 0, ?, NULL)", (cooldown,))
+
+        # metrics (this process only)
+        self.granted = 0
+        self.waited_seconds = 0.0
+        self.failures_recorded = 0
+        self.rejected = 0
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(time.time())
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _tokens(self, now):
+        tokens, updated_at = self._conn.execute("SELECT tokens, updated_at FROM bucket").fetchone()
+        if self.rate <= 0:
+            return self.burst
+        return min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+
+    def _try_acquire(self, waiter, priority):
+        """One attempt; returns (granted, seconds to wait before retrying, breaker retry_after or None)"""
+        def attempt(now):
+            conn = self._conn
+            conn.execute("DELETE FROM waiters WHERE seen_at < ?", (now - WAITER_TTL,))
+            conn.execute("INSERT INTO waiters VALUES (?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET seen_at = ?",
+                         (waiter, priority, now, now, now))
+
+            state, opened_until, probe_at = conn.execute(
+                "SELECT state, opened_until, probe_at FROM breaker").fetchone()
+            if state == "open":
+                if now < opened_until:
+                    return False, opened_until - now, opened_until - now
+                state = "half_open"
+                conn.execute("UPDATE breaker SET state = 'half_open', probe_at = NULL")
+            if state == "half_open" and probe_at is not None and now - probe_at < PROBE_TIMEOUT:
+                return False, POLL_SECONDS, None  # the probe request will decide
+
+            head = conn.execute("SELECT id FROM waiters ORDER BY priority, enqueued_at, id LIMIT 1").fetchone()
+            tokens = self._tokens(now)
+            conn.execute("UPDATE bucket SET tokens = ?, updated_at = ?", (tokens, now))
+            if head[0] != waiter:
+                return False, POLL_SECONDS, None
+            if tokens < 1:
+                return False, (1 - tokens) / self.rate, None
+
+            conn.execute("UPDATE bucket SET tokens = ?", (tokens - 1 if self.rate > 0 else tokens,))
+            conn.execute("DELETE FROM waiters WHERE id = ?", (waiter,))
+            if state == "half_open":
+                conn.execute("UPDATE breaker SET probe_at = ?", (now,))
+            return True, 0.0, None
+
+        return self._transaction(attempt)
+
+    def _leave(self, waiter):
+        self._transaction(lambda now: self._conn.execute("DELETE FROM waiters WHERE id = ?", (waiter,)))
+
+    def acquire(self, priority=PRIORITY_USER, timeout=None, deadline=NO_DEADLINE):
+        """
+        Block until one request may be sent; returns the seconds waited.
+        Waits at most timeout (default SCRAPE_LIMIT_TIMEOUT), capped by deadline.
+        Raises CircuitOpen if the breaker stays open longer than that,
+        DeadlineExceeded when the deadline runs out, RateLimitTimeout otherwise.
+        """
+        limit = deadline.cap(self.timeout if timeout is None else timeout)
+        start = time.monotonic()
+        waiter = uuid.uuid4().hex
+        try:
+            while True:
+                granted, wait, retry_after = self._try_acquire(waiter, priority)
+                if granted:
+                    break
+                left = limit - (time.monotonic() - start)
+                if retry_after is not None and retry_after > left:
+                    self.rejected += 1
+                    raise CircuitOpen(retry_after)
+                if left <= 0:
+                    deadline.check("a scrape slot freed up")
+                    raise RateLimitTimeout(f"No scrape slot became free within {limit:.1f}s")
+                time.sleep(max(0.001, min(wait, left, POLL_SECONDS)))
+        except BaseException:
+            self._leave(waiter)
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self.granted += 1
+            self.waited_seconds += waited
+        return waited
+
+    def record_success(self):
+        """The last request returned results: close the breaker"""
+        self._transaction(lambda now: self._conn.execute(
+            "UPDATE breaker SET state = 'closed', failures = 0, cooldown = ?, probe_at = NULL", (self.cooldown,)))
+
+    def record_failure(self):
+        """The last request was blocked, throttled or came back empty"""
+        def failed(now):
+            state, failures, cooldown = self._conn.execute(
+                "SELECT state, failures, cooldown FROM breaker").fetchone()
+            failures += 1
+            if state == "half_open" or (state == "closed" and failures >= self.threshold):
+                logger.warning("Search endpoint blocked %d time(s) in a row; pausing scrapes for %.0fs",
+                               failures, cooldown)
+                self._conn.execute(
+                    "UPDATE breaker SET state = 'open', failures = ?, opened_until = ?, cooldown = ?, probe_at = NULL",
+                    (failures, now + cooldown, min(cooldown * 2, self.max_cooldown)))
+            else:
+                self._conn.execute("UPDATE breaker SET failures = ?", (failures,))
+
+        self._transaction(failed)
+        with self._lock:
+            self.failures_recorded += 1
+
+    def release(self):
+        """
+        The granted request got no answer (e.g. the deadline ran out mid-fetch). That says
+        nothing about blocking, so nothing is recorded, but if it was the half-open probe
+        its slot is freed so the next request can probe instead of waiting PROBE_TIMEOUT.
+        """
+        self._transaction(lambda now: self._conn.execute(
+            "UPDATE breaker SET probe_at = NULL WHERE state = 'half_open'"))
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._conn.execute("SELECT state FROM breaker").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            state, failures, opened_until = self._conn.execute(
+                "SELECT state, failures, opened_until FROM breaker").fetchone()
+            waiting = self._conn.execute("SELECT COUNT(*) FROM waiters WHERE seen_at >= ?",
+                                         (now - WAITER_TTL,)).fetchone()[0]
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "shared": self.db_path is not None,
+                "tokens": round(self._tokens(now), 2),
+                "waiting": waiting,
+                "breaker": state,
+                "consecutive_failures": failures,
+                "paused_for": round(max(0.0, opened_until - now), 1) if state == "open" else 0.0,
+                "granted": self.granted,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "failures_recorded": self.failures_recorded,
+                "rejected": self.rejected,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter, creating it on first use"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+def set_rate_limiter(limiter):
+    """Replace the process-wide rate limiter (e.g. in tests); returns the previous one"""
+    global _limiter
+    with _limiter_lock:
+        previous, _limiter = _limiter, limiter
+        return previous
@@ -0,0 +1,107 @@
+# result_cache.py
+# Finished analysis payloads keyed by (hashtag, model version), stored ready to serve.
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Cache limits (overridable through the environment)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+# Payloads at least this large (bytes of JSON) also get a gzip copy
+RESULT_GZIP_MIN_BYTES = int(os.getenv("RESULT_GZIP_MIN_BYTES", "1024"))
+
+
+class CachedResult:
+    """One serialized analysis: JSON bytes, optional gzip copy and validators for conditional GETs"""
+
+    __slots__ = ("payload", "body", "gzipped", "etag", "last_modified", "stored_at")
+
+    def __init__(self, payload, gzip_min_bytes=RESULT_GZIP_MIN_BYTES):
+        self.payload = payload
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, compresslevel=6, mtime=0) \
+            if len(self.body) >= gzip_min_bytes else None
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.stored_at = time.time()
+        # HTTP dates have one-second resolution
+        self.last_modified = datetime.fromtimestamp(int(self.stored_at), tz=timezone.utc)
+
+
+class ResultCache:
+    """
+    Bounded cache of complete analysis payloads.
+
+    Entries are keyed by hashtag and the version of the model that scored them,
+    so publishing a new model makes older entries unreachable; they age out via
+    ttl and LRU eviction (max_entries). invalidate() drops a hashtag's entries
+    when its posts are re-scraped.
+    """
+
+    def __init__(self, ttl, max_entries=RESULT_CACHE_MAX_ENTRIES, gzip_min_bytes=RESULT_GZIP_MIN_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.gzip_min_bytes = gzip_min_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0  # counted by the server when it answers 304
+
+    def get(self, hashtag, model_version):
+        """The CachedResult for hashtag scored by model_version, or None if missing or expired"""
+        key = (hashtag, str(model_version))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, hashtag, model_version, payload):
+        """Serialize and store payload; returns the CachedResult"""
+        entry = CachedResult(payload, self.gzip_min_bytes)
+        key = (hashtag, str(model_version))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, hashtag):
+        """Drop every model version's entry for hashtag; returns how many were removed"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == hashtag]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(e.body) for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+            }
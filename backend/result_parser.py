@@ -0,0 +1,167 @@
+# result_parser.py
+# Extracts Reddit results from DuckDuckGo HTML result pages, independent of how they were fetched.
+
+import re
+from html.parser import HTMLParser
+from urllib.parse import urlparse, urlunparse, unquote
+
+UDDG_RE = re.compile(r'uddg=([^&]+)')
+DATE_RE = re.compile(r'\b(?:\d{1,2}\s(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b|\b\d{4}\b|\bago\b)')
+
+
+class _ResultExtractor(HTMLParser):
+    """
+    Streaming pass over the page that keeps only what each div.result needs:
+    the first a.result__a (href + text) and the first a.result__snippet (text),
+    plus the hidden fields of the "Next" pagination form.
+    No document tree is built, and other markup is just skipped.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self.next_params = None
+        self._block = None
+        self._depth = 0        # open divs inside the current result block
+        self._capture = None   # "title" / "snippet" while inside that link
+        self._form = None      # [hidden fields, submit label] while inside a form
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "form":
+            self._form = [{}, None]
+        elif tag == "input" and self._form is not None:
+            attrs = dict(attrs)
+            if attrs.get("type") == "hidden" and attrs.get("name"):
+                self._form[0][attrs["name"]] = attrs.get("value") or ""
+            elif attrs.get("type") == "submit":
+                self._form[1] = attrs.get("value")
+        elif tag == "div":
+            if self._block is not None:
+                self._depth += 1
+            elif "result" in (dict(attrs).get("class") or "").split():
+                self._block = {"href": None, "title": None, "snippet": None}
+                self._depth = 1
+        elif tag == "a" and self._block is not None and self._capture is None:
+            attrs = dict(attrs)
+            classes = (attrs.get("class") or "").split()
+            if "result__a" in classes and self._block["title"] is None:
+                self._block["href"] = attrs.get("href") or ""
+                self._block["title"] = []
+                self._capture = "title"
+            elif "result__snippet" in classes and self._block["snippet"] is None:
+                self._block["snippet"] = []
+                self._capture = "snippet"
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "input":  # <input ... /> carries the pagination fields
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "form" and self._form is not None:
+            fields, label = self._form
+            if label == "Next" and fields:
+                self.next_params = fields
+            self._form = None
+        if self._block is None:
+            return
+        if tag == "a":
+            self._capture = None
+        elif tag == "div":
+            self._depth -= 1
+            if self._depth == 0:
+                self.blocks.append(self._block)
+                self._block = None
+                self._capture = None
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._block[self._capture].append(data)
+
+    def close(self):
+        super().close()
+        if self._block is not None:  # truncated page: keep the last, unclosed block
+            self.blocks.append(self._block)
+            self._block = None
+
+
+def _real_url(href):
+    # DuckDuckGo wraps URLs in a redirect - extract the actual target
+    if "uddg=" in href:
+        match = UDDG_RE.search(href)
+        if match:
+            return unquote(match.group(1))
+    return href
+
+
+def _subreddit(url):
+    parts = urlparse(url).path.split("/")
+    if "r" in parts:
+        idx = parts.index("r")
+        if idx + 1 < len(parts):
+            return parts[idx + 1]
+    return None
+
+
+def normalize_url(url):
+    """
+    Canonical form of a Reddit post URL for deduplication: https, no www./old./np.
+    host prefix, no query string or fragment, no trailing slash.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    for prefix in ("www.", "old.", "new.", "np."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    return urlunparse(("https", host, parsed.path.rstrip("/"), "", "", ""))
+
+
+def parse_results(html):
+    """
+    Extract every Reddit result from a DuckDuckGo HTML results page, in page order.
+    Returns list of dicts: {rank, title, url, snippet, subreddit, date_snippet}
+    """
+    return parse_page(html)[0]
+
+
+def parse_page(html):
+    """
+    Like parse_results, but also returns the form fields that request the next
+    results page (None on the last page): (results, next_params)
+    """
+    extractor = _ResultExtractor()
+    extractor.feed(html)
+    extractor.close()
+
+    results = []
+    for block in extractor.blocks:
+        if block["title"] is None:
+            continue
+
+        href = _real_url(block["href"])
+        if not href or "reddit.com" not in href:
+            continue
+
+        # Same text as BeautifulSoup's get_text(strip=True) / get_text(separator=" ")
+        title = "".join(s.strip() for s in block["title"])
+        if not title:
+            continue
+        snippet = " ".join(block["snippet"]).strip()[:300] if block["snippet"] else ""
+
+        try:
+            subreddit = _subreddit(href)
+        except ValueError:
+            subreddit = "unknown"
+
+        date_search = DATE_RE.search(snippet) if snippet else None
+
+        results.append({
+            "rank": len(results) + 1,
+            "title": title,
+            "url": href,
+            "snippet": snippet,
+            "subreddit": subreddit,
+            "date_snippet": date_search.group(0) if date_search else None
+        })
+
+    return results, extractor.next_params
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# score_batch.py
+# Command-line batch scoring: score hashtags or a file of collected posts, emit NDJSON.
+#
+# Usage:
+#   python backend/score_batch.py --posts posts.jsonl > scores.ndjson
+#   python backend/score_batch.py --hashtags "#conspiracy" "#gaming" --output scores.ndjson
+
+import os
+import sys
+import argparse
+
+import joblib
+
+try:
+    from backend.batch_scoring import score_posts, to_ndjson, load_vectorizer, clean_batch_post
+    from backend.train_model import iter_jsonl_posts
+except ImportError:
+    from batch_scoring import score_posts, to_ndjson, load_vectorizer, clean_batch_post
+    from train_model import iter_jsonl_posts
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def iter_batches(posts, batch_size):
+    batch = []
+    for post in posts:
+        batch.append(post)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_posts(paths):
+    """Posts from JSONL files, checked like /batch_score input; exits naming the first bad post"""
+    counts = {}
+    for post, (file_index, _) in iter_jsonl_posts(paths):
+        counts[file_index] = counts.get(file_index, 0) + 1
+        try:
+            yield clean_batch_post(post, f"{paths[file_index]}: post {counts[file_index]}")
+        except ValueError as e:
+            sys.exit(f"Invalid input: {e}")
+
+
+def scrape_hashtags(hashtags, num_results):
+    """Scrape every hashtag concurrently; failures are reported on stderr"""
+    try:
+        from backend.scrape_coordinator import scrape_many
+        from backend.google_scraper import search_reddit_by_hashtag
+        from backend.rate_limiter import PRIORITY_BATCH
+    except ImportError:
+        from scrape_coordinator import scrape_many
+        from google_scraper import search_reddit_by_hashtag
+        from rate_limiter import PRIORITY_BATCH
+
+    tags = [t if t.startswith("#") else "#" + t for t in hashtags]
+    scraped = scrape_many(tags, lambda tag: search_reddit_by_hashtag(tag, num_results=num_results,
+                                                                 priority=PRIORITY_BATCH))
+    for tag in tags:
+        if tag in scraped.errors:
+            print(f"Failed to scrape {tag}: {scraped.errors[tag].reason}", file=sys.stderr)
+        for post in scraped.get(tag, []):
+            yield dict(post, hashtag=tag)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score posts for misinformation likelihood (NDJSON output)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--posts", nargs="+", metavar="JSONL", help="files of posts, one JSON object per line")
+    source.add_argument("--hashtags", nargs="+", help="hashtags to scrape and score")
+    parser.add_argument("--num-results", type=int, default=10, help="posts to scrape per hashtag")
+    parser.add_argument("--model", default=os.path.join(HERE, "misinfo_logreg_model.joblib"))
+    parser.add_argument("--vectorizer", default=os.path.join(HERE, "tfidf_vectorizer.joblib"))
+    parser.add_argument("--batch-size", type=int, default=50000,
+                        help="posts per feature matrix / predict_proba call")
+    parser.add_argument("--output", help="write NDJSON here instead of stdout")
+    args = parser.parse_args()
+
+    clf = joblib.load(args.model)
+    vectorizer = load_vectorizer(args.vectorizer)
+
+    if args.posts:
+        posts = read_posts(args.posts)
+    else:
+        posts = scrape_hashtags(args.hashtags, args.num_results)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    total = 0
+    try:
+        for batch in iter_batches(posts, args.batch_size):
+            _, results = score_posts(batch, clf, vectorizer)
+            for rec, result in zip(batch, results):
+                if "hashtag" in rec:
+                    result["hashtag"] = rec["hashtag"]
+            out.writelines(to_ndjson(results))
+            total += len(results)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Scored {total} posts", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# scrape_cache.py
+# Thread-safe LRU/TTL cache for scrape results with optional SQLite backing.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Cache limits (overridable through the environment)
+CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Path to a SQLite file shared by every worker process; unset keeps the cache in memory only
+CACHE_DB_PATH = os.getenv("SCRAPE_CACHE_DB") or None
+
+
+def _json_default(obj):
+    # Column batches (PostBatch) serialize as their list of post dicts
+    to_dicts = getattr(obj, "to_dicts", None)
+    return to_dicts() if to_dicts is not None else str(obj)
+
+
+class _Entry:
+    __slots__ = ("data", "stored_at", "size")
+
+    def __init__(self, data, stored_at, size):
+        self.data = data
+        self.stored_at = stored_at
+        self.size = size
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SQLiteStore:
+    """On-disk key -> JSON store; survives restarts and can be shared across processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                " key TEXT PRIMARY KEY, data TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, stored_at FROM scrape_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key, payload, stored_at):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (key, data, stored_at) VALUES (?, ?, ?)",
+                (key, payload, stored_at),
+            )
+
+    def delete_older_than(self, cutoff):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM scrape_cache WHERE stored_at < ?", (cutoff,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM scrape_cache")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ScrapeCache:
+    """
+    Bounded cache of scrape results (hashtag -> post list).
+
+    Entries expire after ttl seconds and the least recently used entries are
+    evicted once max_entries or max_bytes (JSON size) is exceeded. When a
+    db_path is given every write also goes to SQLite, and memory misses are
+    filled from disk. get_or_fetch() deduplicates concurrent misses so only
+    one caller scrapes a given key while the others wait for its result.
+    """
+
+    def __init__(self, ttl, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 db_path=CACHE_DB_PATH):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._flights = {}
+        self._listeners = []
+        self._last_sweep = time.time()
+        self.store = SQLiteStore(db_path) if db_path else None
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def add_listener(self, callback):
+        """Register callback(key, data) to run whenever an entry is stored"""
+        self._listeners.append(callback)
+
+    def _fresh(self, stored_at, now):
+        return now - stored_at < self.ttl
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _insert(self, key, data, stored_at, size):
+        self._remove(key)
+        self._entries[key] = _Entry(data, stored_at, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            if oldest == key and len(self._entries) == 1:
+                break  # a single oversized entry is still worth keeping
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return cached data for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep >= min(self.ttl, 60):
+                self.sweep(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._fresh(entry.stored_at, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.data
+                self._remove(key)
+                self.expirations += 1
+
+        if self.store is not None:
+            row = self.store.get(key)
+            if row is not None and self._fresh(row[1], now):
+                data, stored_at = row
+                with self._lock:
+                    self._insert(key, data, stored_at, len(json.dumps(data, default=_json_default)))
+                    self.hits += 1
+                    self.disk_hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, data):
+        """Store data under key (write-through to disk when a store is configured)"""
+        stored_at = time.time()
+        payload = json.dumps(data, default=_json_default)
+        with self._lock:
+            self._insert(key, data, stored_at, len(payload))
+        if self.store is not None:
+            self.store.put(key, payload, stored_at)
+        for callback in list(self._listeners):
+            callback(key, data)
+
+    def get_or_fetch(self, key, fetch, timeout=None):
+        """
+        Return cached data for key, calling fetch() on a miss.
+        Concurrent misses for the same key share a single fetch(); timeout bounds
+        how long a caller waits for another caller's fetch (TimeoutError).
+        Empty and partial (data.partial) results are returned but not cached.
+        """
+        data = self.get(key)
+        if data:
+            return data
+
+        with self._lock:
+            # Another caller may have finished fetching since our miss
+            entry = self._entries.get(key)
+            if entry is not None and self._fresh(entry.stored_at, time.time()):
+                return entry.data
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for the in-flight fetch of {key}")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            if flight.result and not getattr(flight.result, "partial", False):
+                self.set(key, flight.result)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def sweep(self, now=None):
+        """Drop every expired entry from memory and disk"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            expired = [k for k, e in self._entries.items() if not self._fresh(e.stored_at, now)]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        if self.store is not None:
+            self.store.delete_older_than(now - self.ttl)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced_fetches": self.coalesced,
+                "persistent": self.store is not None,
+            }
@@ -0,0 +1,145 @@
+# scrape_coordinator.py
+# Fans out hashtag scrapes concurrently with a concurrency cap and per-query timeout.
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    from backend.deadline import NO_DEADLINE
+except ImportError:
+    from deadline import NO_DEADLINE
+
+# Maximum scrapes in flight across the whole process
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "7"))
+# Seconds a single query may run before it is abandoned
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "30"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # One shared pool so the cap holds across concurrent requests and worker
+    # threads (and their keep-alive HTTP sessions) are reused between requests.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SCRAPE_CONCURRENCY,
+                                           thread_name_prefix="scrape")
+        return _executor
+
+
+class ScrapeError:
+    """
+    Why a query failed: a short reason, plus the HTTP status that best describes
+    it (504 for timeouts, the exception's own status if it has one, else None).
+    """
+
+    __slots__ = ("reason", "status")
+
+    def __init__(self, reason, status=None):
+        self.reason = reason
+        self.status = status
+
+    @classmethod
+    def from_exception(cls, e):
+        status = getattr(e, "status", 504 if isinstance(e, TimeoutError) else None)
+        return cls(str(e) or e.__class__.__name__, status)
+
+    def __str__(self):
+        return self.reason
+
+    def __repr__(self):
+        return f"ScrapeError({self.reason!r}, status={self.status})"
+
+
+class ScrapeResults:
+    """
+    Outcome of a fan-out scrape.
+    posts maps each hashtag that succeeded to its post list; errors maps each
+    hashtag that failed or timed out to its ScrapeError.
+    """
+
+    def __init__(self):
+        self.posts = {}
+        self.errors = {}
+        self.elapsed = 0.0
+
+    def add(self, hashtag, posts, error=None):
+        if error is None:
+            self.posts[hashtag] = posts
+        else:
+            self.errors[hashtag] = error
+
+    def get(self, hashtag, default=None):
+        return self.posts.get(hashtag, default)
+
+    @property
+    def partial(self):
+        return bool(self.errors)
+
+
+def iter_scrape(hashtags, fetch, timeout=SCRAPE_TIMEOUT, total_timeout=None, deadline=None):
+    """
+    Run fetch(hashtag) for every hashtag concurrently, yielding
+    (hashtag, posts, error) as each query finishes (error is None on success).
+
+    A query that raises or runs longer than timeout seconds is yielded with an
+    error (a ScrapeError) instead of posts. total_timeout bounds the whole call (default:
+    twice the per-query timeout), covering queries that were still waiting
+    for a free worker. A deadline (see deadline.py) caps both; queries that
+    reach a worker after it has passed are not started. fetch should be given
+    the same deadline so abandoned queries also stop early.
+    """
+    deadline = deadline or NO_DEADLINE
+    start = time.monotonic()
+    total_timeout = deadline.cap(timeout * 2 if total_timeout is None else total_timeout)
+    started = {}
+
+    def run(tag):
+        deadline.check(f"scraping {tag} started")
+        started[tag] = time.monotonic()
+        return fetch(tag)
+
+    executor = _get_executor()
+    pending = {executor.submit(run, tag): tag for tag in dict.fromkeys(hashtags)}
+
+    while pending:
+        done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+        for future in done:
+            tag = pending.pop(future)
+            try:
+                yield tag, future.result() or [], None
+            except Exception as e:
+                yield tag, [], ScrapeError.from_exception(e)
+
+        now = time.monotonic()
+        out_of_time = now - start >= total_timeout
+        for future, tag in list(pending.items()):
+            tag_started = started.get(tag)
+            if tag_started is not None and now - tag_started >= timeout:
+                error = ScrapeError(f"timed out after {timeout:.0f}s", 504)
+            elif out_of_time:
+                future.cancel()
+                error = ScrapeError("time budget ran out" if deadline.expired
+                                    else "timed out waiting for a scrape worker", 504)
+            else:
+                continue
+            del pending[future]
+            yield tag, [], error
+
+
+def scrape_many(hashtags, fetch, timeout=SCRAPE_TIMEOUT, total_timeout=None, deadline=None):
+    """
+    Run fetch(hashtag) for every hashtag concurrently and wait for all of them.
+    Failed or timed-out queries are recorded in ScrapeResults.errors and the
+    rest are still returned.
+    """
+    results = ScrapeResults()
+    start = time.monotonic()
+    for tag, posts, error in iter_scrape(hashtags, fetch, timeout, total_timeout, deadline):
+        results.add(tag, posts, error)
+    results.elapsed = time.monotonic() - start
+    return results
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# startup_profile.py
+# Cold-start profile of the web app: import time by package, heavy modules loaded, warm-up steps.
+#
+# Usage:
+#   python backend/startup_profile.py                 # import + warm-up without browsers
+#   python backend/startup_profile.py --browsers      # include the browser pool
+#   python backend/startup_profile.py --top 15 --output startup.json
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that should only be loaded by warm-up (or first use), not by importing the app
+HEAVY_PACKAGES = ("sklearn", "scipy", "joblib", "selenium", "webdriver_manager", "bs4", "pandas")
+
+# Runs in a fresh interpreter under -X importtime; prints one JSON line on stdout
+_PROBE = """
+import sys, json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+heavy = sorted(p for p in {heavy!r} if p in sys.modules)
+app.warmup.run()
+print(json.dumps({{"wall_import_seconds": imported, "heavy_at_import": heavy,
+                  "heavy_after_warmup": sorted(p for p in {heavy!r} if p in sys.modules),
+                  "warmup": app.warmup.status()}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Per-module (self microseconds, depth) from -X importtime output, in import order"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us), len(name) - len(name.lstrip())))
+    return modules
+
+
+def top_packages(modules, n):
+    """Top-level packages by total self import time"""
+    totals = defaultdict(int)
+    for name, self_us, _ in modules:
+        totals[name.split(".")[0]] += self_us
+    ranked = sorted(totals.items(), key=lambda item: -item[1])[:n]
+    return [{"package": name, "seconds": round(us / 1e6, 4)} for name, us in ranked]
+
+
+def profile(browsers=False, top=10):
+    env = dict(os.environ, WARMUP_BROWSERS="true" if browsers else "false")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _PROBE.format(heavy=HEAVY_PACKAGES)],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Split the import log at the app module: everything before it is importing the app
+    modules = parse_importtime(proc.stderr)
+    app_index = next(i for i, (name, _, _) in enumerate(modules) if name == "app")
+    result["import_top_packages"] = top_packages(modules[:app_index + 1], top)
+    result["warmup_top_packages"] = top_packages(modules[app_index + 1:], top)
+    result["wall_import_seconds"] = round(result["wall_import_seconds"], 3)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the web app's cold start (JSON output)")
+    parser.add_argument("--browsers", action="store_true", help="also warm the browser pool")
+    parser.add_argument("--top", type=int, default=10, help="packages to list per phase")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    text = json.dumps(profile(args.browsers, args.top), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# test_batch_score.py
+# /batch_score input checks: malformed bodies get a JSON 400, never a 500 or a stray scrape.
+import json
+
+import pytest
+
+import app as webapp
+from backend.score_batch import read_posts
+
+
+def _client(monkeypatch):
+    """A test client whose scrapes are recorded instead of sent"""
+    scraped = []
+    monkeypatch.setattr(webapp, "scrape_with_cache", lambda tag, **kwargs: scraped.append(tag) or [])
+    client = webapp.app.test_client()
+    client.scraped = scraped
+    return client
+
+
+@pytest.fixture
+def client(monkeypatch):
+    return _client(monkeypatch)
+
+
+@pytest.mark.parametrize("body", [
+    {"hashtags": "ab"},
+    {"hashtags": [1]},
+    {"posts": "abc"},
+    {"posts": [5]},
+    {"posts": [{"title": "t", "rank": "third"}]},
+    {"posts": [{"title": "t", "rank": 0}]},
+    {"posts": [{"title": "t", "snippet": ["not", "text"]}]},
+    [1, 2],
+])
+def test_malformed_json_bodies_are_rejected(client, body):
+    response = client.post("/batch_score", json=body)
+    assert response.status_code == 400 and "error" in response.get_json()
+    assert client.scraped == []
+
+
+def test_malformed_ndjson_lines_are_rejected(client):
+    for line in ("[1, 2]", "{not json", json.dumps({"title": 5})):
+        response = client.post("/batch_score", data=json.dumps({"title": "ok"}) + "\n" + line,
+                               content_type="application/x-ndjson")
+        assert response.status_code == 400 and "line 2" in response.get_json()["error"]
+
+
+def test_valid_posts_are_scored_with_ranks_coerced(client):
+    body = {"posts": [{"title": "Shocking leaked secret", "rank": "3"}, {"title": "Help with my build", "snippet": None}]}
+    response = client.post("/batch_score", json=body)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row["rank"] for row in rows] == [3, 2] and all(0 <= row["misinfo_score"] <= 100 for row in rows)
+
+
+def test_cli_input_is_checked_like_the_endpoint(tmp_path):
+    path = tmp_path / "posts.jsonl"
+    path.write_text('{"title": "ok", "rank": "2"}\n\n{"title": "bad", "rank": "third"}\n')
+    posts = read_posts([str(path)])
+    assert next(posts) == {"title": "ok", "rank": 2}
+    with pytest.raises(SystemExit, match="post 2.rank must be a positive integer"):
+        next(posts)
@@ -0,0 +1,57 @@
+# test_combined_features.py
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix, hstack
+from sklearn.linear_model import LogisticRegression
+
+from backend.batch_scoring import score_posts, scoring_buffers
+from backend.bench_features import synthetic_posts
+from backend.features import build_feature_matrix, combine_features, CSRBuffers
+
+
+def test_direct_csr_matches_hstack():
+    posts = synthetic_posts(500) + [{"title": "", "snippet": ""}]  # a row with no text terms
+    X_text, X_eng, vec = build_feature_matrix(posts)
+    X_eng[3] = 0.0  # and one with no engineered values
+    expected = hstack([X_text, X_eng]).tocsr()
+
+    X = combine_features(X_text, X_eng)
+    assert X.dtype == np.float64 and X.has_sorted_indices
+    for attr in ("indptr", "indices", "data"):
+        assert np.array_equal(getattr(X, attr), getattr(expected, attr)), attr
+
+    X32 = combine_features(X_text, X_eng, np.float32)
+    assert X32.dtype == np.float32 and X32.data.nbytes * 2 == X.data.nbytes
+    assert abs(X32 - expected).max() < 1e-6
+
+    combined, _, _ = build_feature_matrix(posts, vectorizer=vec, combine=True)
+    assert combined.shape == expected.shape
+
+    # Unsorted input columns are handled
+    shuffled = csr_matrix((np.array([1.0, 2.0]), np.array([2, 0]), np.array([0, 2])), shape=(1, 3))
+    assert combine_features(shuffled, np.array([[0.0, 5.0]])).toarray().tolist() == [[2.0, 0.0, 1.0, 0.0, 5.0]]
+
+
+def test_buffers_are_reused():
+    X_text, X_eng, _ = build_feature_matrix(synthetic_posts(200))
+    buffers = CSRBuffers(np.float32)
+    first = combine_features(X_text[:100], X_eng[:100], np.float32, buffers)
+    data = buffers.data
+    second = combine_features(X_text[100:190], X_eng[100:190], np.float32, buffers)
+    assert buffers.data is data and np.shares_memory(second.data, data) and np.shares_memory(second.indices, buffers.indices)
+    assert abs(second - hstack([X_text[100:190], X_eng[100:190]])).max() < 1e-6
+    with pytest.raises(ValueError):
+        combine_features(X_text, X_eng, np.float64, buffers)
+
+
+def test_float32_scoring_matches_float64():
+    posts = synthetic_posts(300)
+    labels = np.array([i % 2 for i in range(300)])
+    X, _, vec = build_feature_matrix(posts, combine=True)
+    clf = LogisticRegression(max_iter=1000).fit(X, labels)
+
+    probs64, rows64 = score_posts(posts, clf, vec, dtype=np.float64)
+    probs32, rows32 = score_posts(posts, clf, vec)
+    assert scoring_buffers(np.float32).data.size > 0  # built in this thread's buffers
+    assert np.allclose(probs32, probs64, rtol=0, atol=1e-6)
+    assert [r["misinfo_score"] for r in rows32] == [r["misinfo_score"] for r in rows64]
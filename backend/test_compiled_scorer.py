@@ -0,0 +1,51 @@
+# test_compiled_scorer.py
+import os
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from backend.batch_scoring import score_posts
+from backend.compiled_scorer import CompiledScorer
+from backend.features import build_feature_matrix, post_texts
+from backend.model_artifacts import save_artifacts
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_scores_match_sklearn(tmp_path, fitted_model):
+    posts, clf, vec = fitted_model(400)
+    posts = posts + [{"title": "", "snippet": ""}, {"title": "!!! ??", "snippet": "a b c"}]
+    expected, expected_rows = score_posts(posts, clf, vec, dtype=np.float64)
+    save_artifacts(clf, vec, str(tmp_path))
+
+    for scorer in (CompiledScorer.from_model(clf, vec), CompiledScorer.from_artifacts(str(tmp_path))):
+        probs, rows = score_posts(posts, None, None, scorer=scorer)
+        assert np.allclose(probs, expected, rtol=0, atol=1e-12)
+        assert rows == expected_rows
+
+    X_eng = build_feature_matrix(posts, vectorizer=vec)[1]
+    assert scorer.validate(clf, vec, post_texts(posts), X_eng) < 1e-12
+    # The artifact scorer looks terms up in the mapped arrays, not a per-process copy
+    assert isinstance(scorer.terms, np.memmap) and isinstance(scorer.columns, np.memmap)
+
+
+def test_mismatched_model_fails_validation(fitted_model):
+    posts, clf, vec = fitted_model(200)
+    scorer = CompiledScorer.from_model(clf, vec)
+    scorer.intercept += 0.5
+    X_eng = build_feature_matrix(posts, vectorizer=vec)[1]
+    with pytest.raises(ValueError):
+        scorer.validate(clf, vec, post_texts(posts), X_eng)
+
+
+def test_scoring_worker_does_not_import_sklearn():
+    code = ("import sys; from backend.compiled_scorer import CompiledScorer; "
+            "from backend.features import engineered_features, post_texts; "
+            "s = CompiledScorer.from_artifacts(); posts = [{'title': 'LEAKED proof', 'snippet': 'wake up'}]; "
+            "print(s.score(post_texts(posts), engineered_features(posts)[0])[0]); "
+            "print(sorted(m for m in ('sklearn', 'scipy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    prob, modules = out.stdout.split("\n")[:2]
+    assert 0.0 < float(prob) < 1.0 and modules == "[]"
@@ -0,0 +1,77 @@
+# test_deadline.py
+# Request time budgets: the Deadline helper, partial scrapes and early stops.
+import time
+
+import pytest
+
+from backend import google_scraper
+from backend.deadline import Deadline, DeadlineExceeded, NO_DEADLINE
+from backend.google_scraper import search_reddit_by_hashtag
+from backend.post_batch import PostBatch
+from backend.scrape_cache import ScrapeCache
+from backend.scrape_coordinator import iter_scrape
+from backend.test_http_fetch import _serve, _stop, _selenium_stub
+
+
+def test_deadline_caps_and_checks():
+    assert NO_DEADLINE.cap(5) == 5 and NO_DEADLINE.cap(None) is None and not NO_DEADLINE.expired
+    NO_DEADLINE.check()
+
+    deadline = Deadline(0.2)
+    assert 0 < deadline.cap(10) <= 0.2 and deadline.cap(0.05) == 0.05
+    deadline.check()
+    time.sleep(0.25)
+    assert deadline.expired and deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check("the next page")
+
+
+def test_slow_first_page_raises_without_browser_fallback():
+    server = _serve("slow")
+    calls = []
+    original = google_scraper._fetch_selenium
+    google_scraper._fetch_selenium = _selenium_stub(calls)
+    start = time.monotonic()
+    try:
+        with pytest.raises(DeadlineExceeded):
+            search_reddit_by_hashtag("#leaked", num_results=5, backend="http", deadline=Deadline(0.3))
+    finally:
+        google_scraper._fetch_selenium = original
+        _stop(server)
+
+    assert calls == []  # running out of time is not a reason to open a browser
+    assert time.monotonic() - start < 0.9
+
+
+def test_deadline_between_pages_returns_partial_batch():
+    server = _serve("slow_page2")
+    try:
+        posts = search_reddit_by_hashtag("#conspiracy", num_results=7, backend="http", deadline=Deadline(0.5))
+        full = search_reddit_by_hashtag("#conspiracy", num_results=5, backend="http", deadline=Deadline(0.5))
+    finally:
+        _stop(server)
+
+    assert posts.partial and len(posts) == 5  # page 1 only
+    assert not full.partial and len(full) == 5
+
+
+def test_partial_batches_are_not_cached():
+    cache = ScrapeCache(ttl=60)
+    partial = PostBatch.from_dicts([{"title": "t", "url": "https://reddit.com/r/x/1", "snippet": ""}])
+    partial.partial = True
+
+    assert cache.get_or_fetch("#x", lambda: partial).partial
+    assert cache.get("#x") is None
+
+
+def test_queries_left_waiting_report_the_budget():
+    def fetch(tag):
+        time.sleep(0.4)
+        return [tag]
+
+    deadline = Deadline(0.2)
+    # One worker slot is held by the first query; the rest never start
+    results = list(iter_scrape([f"#t{i}" for i in range(20)], fetch, timeout=5, deadline=deadline))
+    errors = [error for _, _, error in results if error]
+    assert "time budget ran out" in {error.reason for error in errors}
+    assert len(results) == 20 and {error.status for error in errors} == {504}
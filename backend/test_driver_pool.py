@@ -0,0 +1,106 @@
+# test_driver_pool.py
+# DriverPool with a fake driver factory: recycling, health checks, timeouts, stats and close().
+import time
+import threading
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from backend.driver_pool import DriverPool, PoolTimeout
+
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise WebDriverException("session deleted")
+        return 1
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+def _pool(size=1, max_uses=50):
+    drivers = []
+
+    def factory():
+        drivers.append(FakeDriver(len(drivers)))
+        return drivers[-1]
+
+    return DriverPool(size=size, max_uses=max_uses, factory=factory), drivers
+
+
+def test_driver_is_recycled_after_max_uses():
+    pool, drivers = _pool(max_uses=2)
+    for _ in range(2):
+        with pool.driver() as driver:
+            assert driver is drivers[0]
+    assert drivers[0].quit_calls == 1  # worn out on its second release
+
+    with pool.driver() as driver:
+        assert driver is drivers[1]
+    stats = pool.stats()
+    assert stats["drivers_created"] == 2 and stats["drivers_recycled"] == 1
+    assert stats["checkouts"] == 3 and stats["reuses"] == 1
+
+
+def test_unhealthy_and_broken_drivers_are_replaced():
+    pool, drivers = _pool()
+    with pool.driver():
+        pass
+    drivers[0].healthy = False  # e.g. Chrome crashed while idle
+    with pool.driver() as driver:
+        assert driver is drivers[1]
+    assert drivers[0].quit_calls == 1
+
+    with pytest.raises(WebDriverException):
+        with pool.driver():
+            raise WebDriverException("tab crashed")
+    assert drivers[1].quit_calls == 1
+    with pool.driver() as driver:
+        assert driver is drivers[2]
+    assert pool.stats()["drivers_recycled"] == 2 and pool.stats()["open"] == 1
+
+
+def test_acquire_times_out_when_the_pool_is_exhausted():
+    pool, drivers = _pool(size=1)
+    held = pool.acquire()
+    start = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.1)
+    assert 0.1 <= time.monotonic() - start < 1.0
+    pool.release(held)
+    assert pool.acquire(timeout=0.1).driver is drivers[0]
+
+
+def test_waiters_get_the_released_driver_and_waits_are_counted():
+    pool, drivers = _pool(size=1)
+    held = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    time.sleep(0.2)
+    pool.release(held)
+    waiter.join()
+
+    assert got[0].driver is drivers[0] and len(drivers) == 1
+    stats = pool.stats()
+    assert stats["checkouts"] == 2 and stats["reuses"] == 1
+    assert stats["wait_seconds_max"] >= 0.15 and stats["in_use"] == 1
+
+
+def test_close_quits_idle_drivers_and_checked_out_ones_on_release():
+    pool, drivers = _pool(size=3)
+    assert pool.warm() == 3
+    held = pool.acquire()
+    pool.close()
+    assert sorted(d.quit_calls for d in drivers) == [0, 1, 1]
+
+    pool.release(held)
+    assert all(d.quit_calls == 1 for d in drivers) and pool.stats()["open"] == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire()
@@ -0,0 +1,164 @@
+# test_http_fetch.py
+# Exercises the browserless fetch path against a local stub that serves saved result pages.
+import os
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from backend import google_scraper
+from backend.google_scraper import search_reddit_by_hashtag
+from backend.rate_limiter import RateLimiter, set_rate_limiter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LIVE_SEARCH_URL = google_scraper.SEARCH_URL
+
+
+def _fixture(name):
+    """A saved search result page from backend/fixtures, as text"""
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    # "results", "blocked" (bot-check page), "throttled" (HTTP 429),
+    # "slow" (every page takes a second), "slow_page2" (only the second page does),
+    # "no_reddit_page1" (the first page's results all link outside Reddit) or
+    # "rate_limited" (429 for a request less than min_interval seconds after the previous one)
+    mode = "results"
+    min_interval = 0.1
+    hits = 0
+    throttled = 0
+    paths = []
+    last_hit = 0.0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubSearchHandler.lock:
+            StubSearchHandler.hits += 1
+            StubSearchHandler.paths.append(self.path)
+            now = time.monotonic()
+            throttle = self.mode == "throttled" or (
+                self.mode == "rate_limited" and now - StubSearchHandler.last_hit < self.min_interval)
+            StubSearchHandler.last_hit = now
+            StubSearchHandler.throttled += throttle
+        if self.mode == "slow" or (self.mode == "slow_page2" and "s=10" in self.path):
+            time.sleep(1.0)
+        if throttle:
+            self.send_response(429)
+            self.end_headers()
+            return
+        if self.mode == "blocked":
+            body = _fixture("ddg_blocked.html").encode("utf-8")
+        else:
+            # The second page is requested with the first page's "Next" form fields
+            body = _fixture("ddg_results_page2.html" if "s=10" in self.path else "ddg_results.html")
+            if self.mode == "no_reddit_page1" and "s=10" not in self.path:
+                body = body.replace("reddit.com", "example.com")
+            body = body.encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=UTF-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # a "slow" page's client gave up
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(mode, limiter=None):
+    """Start the stub; scrapes go through limiter (default: a fresh unlimited one)"""
+    StubSearchHandler.mode = mode
+    StubSearchHandler.hits = 0
+    StubSearchHandler.throttled = 0
+    StubSearchHandler.paths = []
+    StubSearchHandler.last_hit = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    google_scraper.SEARCH_URL = f"http://127.0.0.1:{server.server_address[1]}/html/"
+    server.previous_limiter = set_rate_limiter(limiter or RateLimiter(rate=0))
+    return server
+
+
+def _stop(server):
+    server.shutdown()
+    server.server_close()
+    google_scraper.SEARCH_URL = LIVE_SEARCH_URL
+    set_rate_limiter(server.previous_limiter)
+
+
+def _selenium_stub(calls):
+    def fetch(url, pause, deadline=None):
+        calls.append(url)
+        return _fixture("ddg_results.html")
+    return fetch
+
+
+def test_http_backend_parses_stub_results():
+    server = _serve("results")
+    calls = []
+    original = google_scraper._fetch_selenium
+    google_scraper._fetch_selenium = _selenium_stub(calls)
+    try:
+        posts = search_reddit_by_hashtag("#conspiracy", num_results=5, backend="http")
+        posts_again = search_reddit_by_hashtag("#conspiracy", num_results=5, backend="http")
+    finally:
+        google_scraper._fetch_selenium = original
+        _stop(server)
+
+    assert calls == []  # browser never used
+    assert StubSearchHandler.hits == 2
+    assert [p["rank"] for p in posts] == [1, 2, 3, 4, 5]
+    assert all("reddit.com" in p["url"] for p in posts)
+    assert posts[0]["subreddit"] == "conspiracy"
+    assert posts == posts_again
+
+
+def test_pagination_fetches_only_needed_pages_and_dedupes():
+    server = _serve("results")
+    try:
+        posts = search_reddit_by_hashtag("#conspiracy", num_results=7, backend="http")
+        hits_for_seven = StubSearchHandler.hits
+        seen = set()
+        everything = search_reddit_by_hashtag("#conspiracy", num_results=50, backend="http", seen_urls=seen)
+        other_tag = search_reddit_by_hashtag("#leaked", num_results=50, backend="http", seen_urls=seen)
+    finally:
+        _stop(server)
+
+    # 5 posts on page 1; page 2 repeats one of them (as old.reddit.com) and adds 3
+    assert hits_for_seven == 2
+    assert "s=10" in StubSearchHandler.paths[1] and "vqd=" in StubSearchHandler.paths[1]
+    assert [p["rank"] for p in posts] == list(range(1, 8))
+    assert posts[5]["subreddit"] == "UnresolvedMysteries"
+    assert len(everything) == 8 and len(seen) == 8
+    assert other_tag == []  # every URL was already collected for #conspiracy
+
+
+def test_page_without_reddit_results_does_not_end_the_search():
+    server = _serve("no_reddit_page1")
+    try:
+        posts = search_reddit_by_hashtag("#conspiracy", num_results=10, backend="http")
+    finally:
+        _stop(server)
+
+    assert StubSearchHandler.hits == 2  # page 1 had nothing usable; page 2 was still fetched
+    assert len(posts) == 4 and [p["rank"] for p in posts] == [1, 2, 3, 4]
+    assert all("reddit.com" in p["url"] for p in posts)
+
+
+def test_blocked_fetch_falls_back_to_selenium():
+    for mode in ("blocked", "throttled"):
+        server = _serve(mode)
+        calls = []
+        original = google_scraper._fetch_selenium
+        google_scraper._fetch_selenium = _selenium_stub(calls)
+        try:
+            posts = search_reddit_by_hashtag("#leaked", num_results=5, backend="http")
+        finally:
+            google_scraper._fetch_selenium = original
+            _stop(server)
+
+        assert len(calls) == 1, mode
+        assert len(posts) == 5
@@ -0,0 +1,69 @@
+# test_jobs.py
+import time
+import threading
+
+from backend.jobs import JobQueue, QueueFull
+
+
+class Failure(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def test_jobs_publish_events_and_result():
+    def runner(key):
+        yield "stage", {"key": key}
+        yield "complete", {"answer": key.upper()}
+
+    jobs = JobQueue(runner, workers=2)
+    job, created = jobs.submit("#a")
+    assert created
+    events, done = [], False
+    while not done:
+        new, done = job.wait_events(len(events), timeout=2)
+        events.extend(new)
+    assert [e for e, _ in events] == ["stage", "complete"]
+    assert job.to_dict()["result"] == {"answer": "#A"}
+    assert jobs.stats()["completed"] == 1
+
+
+def test_failed_job_reports_status():
+    def runner(key):
+        raise Failure("nothing found", 404)
+        yield
+
+    jobs = JobQueue(runner, workers=1, error_event="analysis_error")
+    job, _ = jobs.submit("#a")
+    job.wait_events(0, timeout=2)
+    while not job.done:
+        time.sleep(0.01)
+    assert job.to_dict()["error_status"] == 404
+    assert job.events[-1] == ("analysis_error", {"error": "nothing found", "status": 404})
+
+
+def test_dedup_and_backpressure():
+    release = threading.Event()
+
+    def runner(key):
+        release.wait(2)
+        yield "complete", key
+
+    jobs = JobQueue(runner, workers=1, max_queued=1)
+    first, _ = jobs.submit("#a")
+    time.sleep(0.1)  # #a is now running, the queue is empty
+    same, created = jobs.submit("#a")
+    assert same is first and not created
+
+    jobs.submit("#b")  # fills the queue
+    try:
+        jobs.submit("#c")
+        assert False, "expected QueueFull"
+    except QueueFull as e:
+        assert e.retry_after >= 1
+
+    release.set()
+    while not first.done:
+        time.sleep(0.01)
+    stats = jobs.stats()
+    assert stats["deduplicated"] == 1 and stats["rejected"] == 1
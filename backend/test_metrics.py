@@ -0,0 +1,36 @@
+# test_metrics.py
+from backend.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "Demo latency", ("stage",), buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="parse")
+    hist.observe(0.5, stage="parse")
+    hist.observe(5.0, stage="parse")
+
+    text = registry.render()
+    assert '# TYPE demo_seconds histogram' in text
+    assert 'demo_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="parse",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="parse"} 3' in text
+    assert hist.snapshot(stage="parse") == (3, 5.55)
+
+
+def test_counters_and_callback_gauges():
+    registry = Registry()
+    counter = registry.counter("demo_total", "Demo count")
+    assert "demo_total 0" in registry.render()
+    counter.inc()
+    counter.inc(2)
+    assert registry.counter("demo_total", "Demo count") is counter
+    assert counter.value() == 3
+
+    stats = {"hits": 3, "misses": 1}
+    registry.gauge("demo_ratio", "Hit ratio", fn=lambda: stats["hits"] / 4)
+    registry.callback_counter("demo_lookups_total", "Lookups", labelnames=("result",),
+                              fn=lambda: {("hit",): stats["hits"], ("miss",): stats["misses"]})
+    text = registry.render()
+    assert "demo_ratio 0.75" in text
+    assert 'demo_lookups_total{result="miss"} 1' in text
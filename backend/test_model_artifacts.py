@@ -0,0 +1,39 @@
+# test_model_artifacts.py
+import os
+
+import numpy as np
+import pytest
+
+from backend.features import build_feature_matrix, post_texts
+from backend.model_artifacts import save_artifacts, load_artifacts, ArtifactError
+
+
+def test_artifacts_reproduce_the_sklearn_model(tmp_path, fitted_model):
+    posts, clf, vec = fitted_model(300)
+    manifest = save_artifacts(clf, vec, str(tmp_path))
+    artifacts = load_artifacts(str(tmp_path))
+
+    assert artifacts.version == manifest["model_version"]
+    assert isinstance(artifacts.arrays["coef"], np.memmap)
+    assert artifacts.vocabulary["the"] == vec.tfidf.vocabulary_["the"] and "zzz zzz" not in artifacts.vocabulary
+
+    texts = post_texts(posts) + ["", "!!!"]
+    assert (vec.transform(texts) != artifacts.vectorizer.transform(texts)).nnz == 0
+    assert (vec.transform(texts) != artifacts.tfidf.transform(texts)).nnz == 0
+
+    X = build_feature_matrix(posts, vectorizer=artifacts.vectorizer, combine=True)[0]
+    assert np.allclose(artifacts.clf.predict_proba(X), clf.predict_proba(X))
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, fitted_model):
+    _, clf, vec = fitted_model(100)
+    save_artifacts(clf, vec, str(tmp_path))
+    with open(os.path.join(tmp_path, "coef.npy"), "r+b") as f:
+        f.seek(-8, os.SEEK_END)
+        f.write(b"\0" * 8)
+
+    with pytest.raises(ArtifactError):
+        load_artifacts(str(tmp_path))
+    load_artifacts(str(tmp_path), verify=False)  # opt-out still maps the files
+    with pytest.raises(ArtifactError):
+        load_artifacts(str(tmp_path / "missing"))
@@ -0,0 +1,46 @@
+# test_model_cache.py
+# Trained models are reused per training-corpus fingerprint and retrained when the corpus changes.
+import numpy as np
+import pytest
+
+import app as webapp
+from backend.bench_features import synthetic_posts
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Count real train_classifier calls, starting from an empty model cache"""
+    calls = []
+    train = webapp.train_classifier
+    monkeypatch.setattr(webapp, "train_classifier", lambda posts, labels: calls.append(len(posts)) or train(posts, labels))
+    monkeypatch.setattr(webapp, "_trained_models", {})
+    return calls
+
+
+def _corpus(n=40, offset=0):
+    posts = synthetic_posts(n + offset)[offset:]
+    return posts, np.array([i % 2 for i in range(n)])
+
+
+def test_same_corpus_reuses_the_fitted_model(fits):
+    posts, labels = _corpus()
+    first = webapp.get_trained_model(posts, labels)
+    again = webapp.get_trained_model([dict(p) for p in posts], labels.copy())
+    assert again is first and fits == [40]
+
+
+def test_refreshed_scrape_changes_the_fingerprint_and_retrains(fits):
+    posts, labels = _corpus()
+    fingerprint = webapp.corpus_fingerprint(posts, labels)
+    first = webapp.get_trained_model(posts, labels)
+
+    new_posts, _ = _corpus(offset=7)  # a re-scrape returned different posts
+    relabeled = labels.copy()
+    relabeled[0] = 1 - relabeled[0]
+    assert webapp.corpus_fingerprint(new_posts, labels) != fingerprint
+    assert webapp.corpus_fingerprint(posts, relabeled) != fingerprint
+
+    second = webapp.get_trained_model(new_posts, labels)
+    assert second is not first and fits == [40, 40]
+    assert list(webapp._trained_models) == [webapp.corpus_fingerprint(new_posts, labels)]  # only the current corpus
+    assert webapp.get_trained_model(posts, relabeled) is not second and len(fits) == 3
@@ -0,0 +1,33 @@
+# test_model_refresher.py
+# Background refreshes publish new models, but never one trained on the fallback corpus.
+import numpy as np
+import pytest
+
+import app as webapp
+from backend.bench_features import synthetic_posts
+from backend.model_refresher import ModelRefresher
+
+
+def _refresher_with_published_model():
+    posts = synthetic_posts(40)
+    labels = np.array([i % 2 for i in range(40)])
+    refresher = ModelRefresher(lambda: (posts, labels, {"failed_tags": []}), webapp.train_classifier)
+    assert refresher.refresh()["version"] == 1
+    refresher.collect = webapp.collect_training_corpus
+    return refresher
+
+
+@pytest.mark.parametrize("reachable", [set(), set(webapp.MISINFO_TAGS)])
+def test_failed_training_scrapes_keep_the_published_model(monkeypatch, reachable):
+    refresher = _refresher_with_published_model()
+    published = refresher.current()
+
+    def refresh_scrape(tag, num_results=10):
+        if tag not in reachable:
+            raise ConnectionError("search endpoint unreachable")
+        return [dict(p, url=p["url"] + tag.strip("#") + "/") for p in synthetic_posts(5)]
+
+    monkeypatch.setattr(webapp, "refresh_scrape", refresh_scrape)
+    assert refresher.refresh() is None
+    assert refresher.current() is published and refresher.status()["model_version"] == 1
+    assert "keeping the current model" in refresher.last_error
@@ -0,0 +1,88 @@
+# test_model_selection.py
+import numpy as np
+import pytest
+
+from backend import model_selection, train_model
+from backend.bench_features import synthetic_posts
+from backend.features import TextVectorizer
+from backend.model_selection import select_model, choose_candidate, expand_grid
+from backend.train_model import fit_model
+
+VECTORIZER_GRID = {"max_features": [50, 200], "ngram_range": [(1, 1)]}
+CLASSIFIER_GRID = {"C": [0.1, 1.0, 10.0]}
+
+
+def _corpus(n=120):
+    posts = synthetic_posts(n)
+    # Learnable labels: posts with a misinformation keyword or shouting
+    labels = np.array([int("!" in p["snippet"] or "proof" in (p["title"] + p["snippet"]).lower()) for p in posts])
+    return posts, labels
+
+
+def test_vectorizer_is_fit_once_per_fold(monkeypatch):
+    fits = []
+
+    class CountingVectorizer(TextVectorizer):
+        def fit(self, texts):
+            fits.append(len(texts))
+            return super().fit(texts)
+
+    monkeypatch.setattr(model_selection, "TextVectorizer", CountingVectorizer)
+    posts, labels = _corpus()
+    report = select_model(posts, labels, VECTORIZER_GRID, CLASSIFIER_GRID, folds=3, workers=1)
+
+    assert len(fits) == 2 * 3  # vectorizer settings x folds, shared by the 3 classifier settings
+    assert len(report["candidates"]) == 6 and report["folds"] == 3
+    c = report["candidates"][0]
+    assert c["folds"] == 3 and 0.0 <= c["accuracy"] <= 1.0
+    assert c["fit_seconds"] > 0 and c["predict_seconds"] > 0 and c["n_features"] <= 200 + 20
+    assert [c["accuracy"] for c in report["candidates"]] == sorted((c["accuracy"] for c in report["candidates"]), reverse=True)
+
+
+def test_process_pool_matches_inline_run():
+    posts, labels = _corpus()
+    inline = select_model(posts, labels, VECTORIZER_GRID, CLASSIFIER_GRID, folds=3, workers=1)
+    pooled = select_model(posts, labels, VECTORIZER_GRID, CLASSIFIER_GRID, folds=3, workers=2)
+
+    assert pooled["workers"] == 2
+    key = lambda c: (c["vectorizer"]["max_features"], c["classifier"]["C"])
+    assert {key(c): c["accuracy"] for c in inline["candidates"]} == \
+        {key(c): c["accuracy"] for c in pooled["candidates"]}
+
+
+def test_choose_fastest_accurate_candidate_and_train_it():
+    candidates = [
+        {"vectorizer": {"max_features": 2000}, "classifier": {"C": 1.0}, "accuracy": 0.90, "predict_seconds": 0.5, "fit_seconds": 2},
+        {"vectorizer": {"max_features": 500}, "classifier": {"C": 1.0}, "accuracy": 0.895, "predict_seconds": 0.2, "fit_seconds": 1},
+        {"vectorizer": {"max_features": 50}, "classifier": {"C": 0.1}, "accuracy": 0.80, "predict_seconds": 0.1, "fit_seconds": 1},
+    ]
+    assert choose_candidate(candidates)["vectorizer"]["max_features"] == 500
+    assert choose_candidate(candidates, min_accuracy=0.75)["vectorizer"]["max_features"] == 50
+    assert choose_candidate(candidates, min_accuracy=0.99)["accuracy"] == 0.90
+    assert len(expand_grid({"a": [1, 2], "b": [3, 4]})) == 4
+
+    posts, labels = _corpus(60)
+    model = fit_model(posts, labels, vectorizer_params={"max_features": 40, "ngram_range": [1, 1]},
+                      clf_params={"C": 0.5})
+    assert len(model["vectorizer"].tfidf.vocabulary_) <= 40 and model["clf"].C == 0.5
+
+    with pytest.raises(ValueError):
+        select_model(posts[:3], [0, 0, 1], VECTORIZER_GRID, CLASSIFIER_GRID)
+
+
+@pytest.mark.parametrize("n, expected", [(6, [6]), (60, [48, 60])])
+def test_fit_model_fits_once_on_all_data_for_production(monkeypatch, n, expected):
+    fits = []
+    make = train_model.make_classifier
+
+    def counting_classifier(params=None):
+        clf = make(params)
+        fit = clf.fit
+        clf.fit = lambda X, y: fits.append(X.shape[0]) or fit(X, y)
+        return clf
+
+    monkeypatch.setattr(train_model, "make_classifier", counting_classifier)
+    posts, labels = _corpus(n)
+    labels[:2] = [0, 1]  # both classes even in the tiny corpus
+    assert fit_model(posts, labels)["n_samples"] == n
+    assert fits == expected  # split fit (if any), then one fit on everything
@@ -0,0 +1,73 @@
+# test_post_batch.py
+import json
+
+import numpy as np
+
+from backend.bench_features import synthetic_posts
+from backend.features import engineered_features, build_feature_matrix
+from backend.post_batch import PostBatch
+from backend.scrape_cache import ScrapeCache
+
+
+def _records(n=50):
+    posts = synthetic_posts(n)
+    for i, p in enumerate(posts):
+        p["date_snippet"] = "2024" if i % 3 == 0 else None
+        if i % 7 == 0:
+            p["subreddit"] = None
+    return posts
+
+
+def test_batch_reads_like_the_dict_list():
+    posts = _records()
+    batch = PostBatch.from_dicts(posts)
+
+    assert len(batch) == len(posts) and batch == posts
+    assert batch[3] == posts[3] and batch[-1] == posts[-1]
+    assert isinstance(batch[10:20], PostBatch) and batch[10:20] == posts[10:20]
+    assert batch.rank.dtype == np.int32 and batch.subreddit.dtype == np.int32
+    assert len(batch.subreddits) < len(posts)  # one interned name per distinct subreddit
+
+    joined = PostBatch.concat([batch[:20], posts[20:]])
+    assert joined == posts
+    assert PostBatch.from_dicts([]) == [] and not PostBatch.from_dicts([])
+
+
+def test_extra_keys_survive_slicing_and_concat():
+    posts = _records(6)
+    for i, p in enumerate(posts):
+        if i % 2:
+            p.update(hashtag="#leaked", label=i % 4 == 1)
+    batch = PostBatch.from_dicts(posts)
+
+    assert batch[1]["hashtag"] == "#leaked" and "hashtag" not in batch[0]
+    assert batch.extra[0] is None and batch.extra[1] == {"hashtag": "#leaked", "label": True}
+    assert batch[1:4] == posts[1:4] and PostBatch.concat([batch[:2], posts[2:]]) == posts
+
+
+def test_unusable_ranks_become_unknown():
+    ranks = [3, "4", 5.0, None, "", "n/a", -2, 2 ** 40, float("nan")]
+    batch = PostBatch.from_dicts([{"title": "t", "rank": r} for r in ranks])
+    assert batch.rank.tolist() == [3, 4, 5, 0, 0, 0, 0, 0, 0]
+    assert [p["rank"] for p in batch] == [3, 4, 5] + [None] * 6
+
+
+def test_features_from_columns_match_dicts():
+    posts = _records(500)
+    batch = PostBatch.from_dicts(posts)
+
+    X_dicts, cb_dicts, kw_dicts = engineered_features(posts)
+    X_batch, cb_batch, kw_batch = engineered_features(batch)
+    assert np.allclose(X_dicts, X_batch) and np.allclose(cb_dicts, cb_batch) and kw_dicts == kw_batch
+
+    X_text, _, vec = build_feature_matrix(posts)
+    X_text_batch, _, _ = build_feature_matrix(batch, vectorizer=vec)
+    assert (X_text != X_text_batch).nnz == 0
+
+
+def test_cache_serializes_batches_as_dicts():
+    posts = _records(5)
+    cache = ScrapeCache(ttl=60)
+    cache.set("#a", PostBatch.from_dicts(posts))
+    assert cache.get("#a") == posts
+    assert json.loads(json.dumps(posts)) == PostBatch.from_dicts(posts).to_dicts()
@@ -0,0 +1,45 @@
+# test_post_store.py
+import numpy as np
+
+from backend.features import engineered_features
+from backend.post_store import PostStore
+
+
+def _post(path, title="Leaked memo PROOF", rank=1, host="www.reddit.com"):
+    return {"rank": rank, "title": title, "snippet": "they don't want you to know",
+            "url": f"https://{host}/r/conspiracy/comments/{path}/", "subreddit": "conspiracy"}
+
+
+def test_one_record_per_url_with_hashtags():
+    store = PostStore()
+    store.add_many([_post("a"), _post("b")], "#leaked", seen_at=1.0)
+    keys = store.add_many([_post("a", host="old.reddit.com"), _post("c")], "#exposed", seen_at=2.0)
+
+    assert len(store) == 3
+    assert store.hashtags(keys[0]) == {"#leaked": 1.0, "#exposed": 2.0}
+    assert store.get(keys[0])["url"].startswith("https://www.reddit.com")  # first scrape is canonical
+    assert store.stats()["duplicates_seen"] == 1
+
+    store.add(_post("d"), "#gaming")
+    posts, labels = store.training_set({"#leaked": 1, "#exposed": 1, "#gaming": 0})
+    assert len(posts) == 4 and labels == [1, 1, 1, 0]
+
+
+def test_feature_rows_are_computed_once_per_post():
+    store = PostStore()
+    posts = [_post("a"), _post("b", title="Best monitor?"), _post("c", rank=3)]
+    store.add_many(posts, "#leaked")
+
+    first = store.engineered(posts)
+    expected = engineered_features(posts)
+    assert np.allclose(first[0], expected[0]) and first[2] == expected[2]
+    assert store.stats()["feature_cache_misses"] == 3
+
+    again = store.engineered([posts[2], posts[0]])
+    assert np.allclose(again[0], expected[0][[2, 0]])
+    assert store.stats()["feature_cache_hits"] == 2
+
+    # A changed rank invalidates that post's cached row
+    moved = dict(posts[0], rank=7)
+    assert np.allclose(store.engineered([moved])[0], engineered_features([moved])[0])
+    assert store.stats()["feature_cache_misses"] == 4
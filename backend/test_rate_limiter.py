@@ -0,0 +1,135 @@
+# test_rate_limiter.py
+# Shared scrape rate limit: token bucket, priorities, circuit breaker, and several worker
+# processes scraping a stub search server that throttles bursts.
+import time
+import threading
+import multiprocessing
+
+import pytest
+
+from backend import google_scraper
+from backend.deadline import Deadline, DeadlineExceeded
+from backend.google_scraper import search_reddit_by_hashtag
+from backend.rate_limiter import (RateLimiter, CircuitOpen, RateLimitTimeout, set_rate_limiter,
+                                  PRIORITY_USER, PRIORITY_TRAINING)
+from backend.test_http_fetch import StubSearchHandler, _serve, _stop, _fixture
+
+
+def test_bucket_is_shared_through_the_database(tmp_path):
+    db = str(tmp_path / "limit.sqlite")
+    first, second = RateLimiter(rate=2, burst=2, db_path=db), RateLimiter(rate=2, burst=2, db_path=db)
+
+    assert first.acquire() < 0.05 and second.acquire() < 0.05  # the burst
+    with pytest.raises(RateLimitTimeout):
+        second.acquire(timeout=0.05)  # the next token is ~0.5s away for both
+    assert 0.1 < first.acquire() < 1.0
+    assert second.stats()["shared"] and first.stats()["granted"] == 2
+
+
+def test_user_scrapes_go_before_training_scrapes():
+    limiter = RateLimiter(rate=2, burst=1)
+    limiter.acquire()  # empty the bucket; the next token is 0.5s away
+    order = []
+
+    def take(name, priority):
+        limiter.acquire(priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=("training", PRIORITY_TRAINING))]
+    threads[0].start()
+    time.sleep(0.02)  # the training scrape is queued first
+    threads.append(threading.Thread(target=take, args=("user", PRIORITY_USER)))
+    threads[1].start()
+    for t in threads:
+        t.join()
+    assert order == ["user", "training"]
+
+
+def test_breaker_opens_then_probes():
+    limiter = RateLimiter(rate=0, threshold=2, cooldown=0.3)
+    limiter.record_failure()
+    limiter.acquire()
+    limiter.record_failure()
+    assert limiter.state == "open"
+    with pytest.raises(CircuitOpen):
+        limiter.acquire(timeout=0.05)  # the pause outlasts the wait budget
+
+    assert 0.2 < limiter.acquire(timeout=2) < 1.0  # after the pause: one probe
+    assert limiter.state == "half_open"
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(timeout=0.1)  # nobody else goes while the probe is out
+    limiter.record_failure()
+    assert limiter.state == "open" and 0.4 < limiter.stats()["paused_for"] <= 0.6  # doubled
+
+    time.sleep(0.6)
+    limiter.acquire(timeout=0.1)
+    limiter.record_success()
+    assert limiter.state == "closed" and limiter.acquire(timeout=0.1) < 0.05
+
+
+def test_probe_cut_short_by_the_deadline_frees_its_slot():
+    limiter = RateLimiter(rate=0, threshold=1, cooldown=0.1)
+    limiter.record_failure()
+    time.sleep(0.15)
+    server = _serve("slow", limiter)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            search_reddit_by_hashtag("#a", num_results=5, backend="http", deadline=Deadline(0.3))
+    finally:
+        _stop(server)
+
+    # Still half-open, but the next request probes now instead of after PROBE_TIMEOUT
+    assert limiter.state == "half_open" and limiter.stats()["failures_recorded"] == 1
+    assert limiter.acquire(timeout=0.1) < 0.05
+
+
+def test_throttled_endpoint_trips_breaker_and_stops_requests():
+    limiter = RateLimiter(rate=0, threshold=3, cooldown=30, timeout=1)
+    server = _serve("throttled", limiter)
+    original = google_scraper._fetch_selenium
+    google_scraper._fetch_selenium = lambda url, pause, deadline=None: _fixture("ddg_blocked.html")
+    try:
+        assert search_reddit_by_hashtag("#a", num_results=5, backend="http") == []  # 429, blocked fallback
+        with pytest.raises(CircuitOpen):
+            search_reddit_by_hashtag("#b", num_results=5, backend="http")  # third failure opens it
+        hits = StubSearchHandler.hits
+        with pytest.raises(CircuitOpen):
+            search_reddit_by_hashtag("#c", num_results=5, backend="http")
+    finally:
+        google_scraper._fetch_selenium = original
+        _stop(server)
+
+    assert hits == 2 and StubSearchHandler.hits == 2  # nothing sent while paused
+
+
+def _worker_searches(db_path, rate, n):
+    """Runs in a forked worker process: n searches through a limiter on the shared database"""
+    set_rate_limiter(RateLimiter(rate=rate, burst=1, db_path=db_path))
+    fallbacks = []
+    google_scraper._fetch_selenium = lambda url, pause, deadline=None: fallbacks.append(url) or \
+        _fixture("ddg_results.html")
+    posts = sum(len(search_reddit_by_hashtag(f"#w{i}", num_results=5, backend="http")) for i in range(n))
+    return posts, len(fallbacks)
+
+
+def _run_workers(tmp_path, rate):
+    server = _serve("rate_limited")
+    StubSearchHandler.min_interval = 0.1
+    ctx = multiprocessing.get_context("fork")
+    try:
+        with ctx.Pool(2) as pool:
+            results = pool.starmap(_worker_searches, [(str(tmp_path / f"limit-{rate}.sqlite"), rate, 3)] * 2)
+    finally:
+        _stop(server)
+    return results, StubSearchHandler.throttled
+
+
+def test_worker_processes_share_the_rate_limit(tmp_path):
+    # Uncoordinated, the workers' requests arrive too close together and get throttled
+    _, throttled = _run_workers(tmp_path, rate=0)
+    assert throttled > 0
+
+    # Through the shared bucket (5/s, below the stub's 10/s) nothing is throttled
+    results, throttled = _run_workers(tmp_path, rate=5)
+    assert throttled == 0
+    assert results == [(15, 0), (15, 0)]
@@ -0,0 +1,74 @@
+# test_result_cache.py
+import gzip
+import json
+import time
+
+from backend.post_batch import PostBatch
+from backend.result_cache import ResultCache
+from backend.result_parser import parse_results
+from backend.test_http_fetch import _fixture
+
+
+def _payload(hashtag, n=20):
+    return {"hashtag": hashtag, "posts": [{"rank": i, "title": f"post {i}"} for i in range(n)],
+            "training_info": {"model_version": 3}}
+
+
+def test_entries_are_keyed_by_model_version_and_bounded():
+    cache = ResultCache(ttl=60, max_entries=2, gzip_min_bytes=200)
+    entry = cache.set("#cats", 3, _payload("#cats"))
+    assert cache.get("#cats", 3) is entry and cache.get("#cats", 4) is None
+    assert json.loads(entry.body) == _payload("#cats")
+    assert json.loads(gzip.decompress(entry.gzipped)) == _payload("#cats")
+    assert cache.set("#tiny", 3, {"posts": []}).gzipped is None  # below gzip_min_bytes
+
+    # Same payload, same validator; the LRU bound evicts #cats once #dogs arrives
+    assert cache.set("#again", 3, _payload("#cats")).etag == entry.etag
+    cache.set("#dogs", 3, _payload("#dogs"))
+    assert cache.get("#cats", 3) is None and cache.stats()["evictions"] == 2
+
+    assert cache.invalidate("#dogs") == 1 and cache.get("#dogs", 3) is None
+
+
+def test_entries_expire():
+    cache = ResultCache(ttl=0.1)
+    cache.set("#cats", 1, _payload("#cats"))
+    time.sleep(0.15)
+    assert cache.get("#cats", 1) is None
+
+
+def test_repeat_analysis_is_served_from_cache_with_conditional_get(monkeypatch):
+    import app as webapp
+
+    def fake_search(tag, num_results=10, **kwargs):
+        posts = parse_results(_fixture("ddg_results.html"))[:num_results]
+        return PostBatch.from_dicts([dict(p, url=p["url"] + tag.strip("#") + "/") for p in posts])
+
+    monkeypatch.setattr(webapp, "search_reddit_by_hashtag", fake_search)
+    client = webapp.app.test_client()
+
+    first = client.post("/analyze", json={"hashtag": "resultcache"})
+    assert first.status_code == 202
+    job = webapp.analysis_jobs.get(first.get_json()["job_id"])
+    deadline = time.monotonic() + 60
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert job.status == "done"
+
+    hit = client.post("/analyze", json={"hashtag": "#resultcache"})
+    assert hit.status_code == 200 and hit.get_json() == job.result
+    assert hit.headers["ETag"].startswith('W/"') and hit.headers["Last-Modified"]
+    assert "Accept-Encoding" in hit.headers["Vary"]
+
+    zipped = client.get("/analyze?hashtag=resultcache", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.get_data())) == job.result
+
+    etag = hit.headers["ETag"]
+    assert client.get("/analyze?hashtag=resultcache", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/analyze?hashtag=resultcache",
+                      headers={"If-Modified-Since": hit.headers["Last-Modified"]}).status_code == 304
+
+    # A fresh scrape of the hashtag invalidates the stored analysis
+    webapp._scrape_cache.set("#resultcache", fake_search("#resultcache"))
+    assert client.get("/analyze?hashtag=resultcache").status_code == 202
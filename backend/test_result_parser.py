@@ -0,0 +1,36 @@
+# test_result_parser.py
+from backend.result_parser import parse_results, parse_page, normalize_url
+from backend.test_http_fetch import _fixture
+
+
+def test_parses_reddit_results_from_recorded_page():
+    posts = parse_results(_fixture("ddg_results.html"))
+    assert [p["rank"] for p in posts] == [1, 2, 3, 4, 5]
+    assert all("reddit.com" in p["url"] for p in posts)  # the wikipedia result is skipped
+
+    first = posts[0]
+    assert first["url"] == "https://www.reddit.com/r/conspiracy/comments/1a2b3c/leaked_documents_confirm_the_coverup/"
+    assert first["title"] == "Leaked documents CONFIRM the coverup!!! : r/conspiracy"
+    assert first["subreddit"] == "conspiracy"
+    assert first["date_snippet"] == "12 Mar"
+    assert "PROOF" in first["snippet"]
+
+
+def test_next_page_fields_and_url_normalization():
+    _, next_params = parse_page(_fixture("ddg_results.html"))
+    assert next_params["s"] == "10" and next_params["vqd"].startswith("4-")
+    _, next_params = parse_page(_fixture("ddg_results_page2.html"))
+    assert next_params is None  # only a "Previous" form on the last page
+
+    assert (normalize_url("https://old.reddit.com/r/a/comments/1/x?utm=1#c")
+            == normalize_url("http://www.reddit.com/r/a/comments/1/x/")
+            == "https://reddit.com/r/a/comments/1/x")
+
+
+def test_blocked_and_truncated_pages():
+    assert parse_results(_fixture("ddg_blocked.html")) == []
+
+    html = _fixture("ddg_results.html")
+    cut = html.index('<div class="result ', html.index('<div class="result ') + 1)
+    truncated = parse_results(html[:cut + 400])
+    assert len(truncated) >= 1 and truncated[0]["subreddit"] == "conspiracy"
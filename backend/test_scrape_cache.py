@@ -0,0 +1,76 @@
+# test_scrape_cache.py
+import os
+import time
+import tempfile
+import threading
+
+from backend.scrape_cache import ScrapeCache
+
+
+def _posts(tag, n=3):
+    return [{"rank": i + 1, "title": f"{tag} post {i}", "url": f"https://www.reddit.com/r/{tag}/{i}"}
+            for i in range(n)]
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ScrapeCache(ttl=60, max_entries=2)
+    cache.set("#a", _posts("a"))
+    cache.set("#b", _posts("b"))
+    cache.get("#a")  # #a is now most recently used
+    cache.set("#c", _posts("c"))
+    assert cache.get("#b") is None
+    assert cache.get("#a") and cache.get("#c")
+
+    one_entry = len(str(_posts("x")).encode()) + 50
+    cache = ScrapeCache(ttl=60, max_bytes=one_entry)
+    cache.set("#a", _posts("a"))
+    cache.set("#b", _posts("b"))
+    assert len(cache) == 1 and cache.get("#b")
+
+
+def test_ttl_expiry_and_sweep():
+    cache = ScrapeCache(ttl=0.2)
+    cache.set("#a", _posts("a"))
+    assert cache.get("#a")
+    time.sleep(0.25)
+    assert cache.get("#a") is None
+    cache.set("#b", _posts("b"))
+    time.sleep(0.25)
+    assert cache.sweep() == 1 and len(cache) == 0
+
+
+def test_single_flight_fetch():
+    cache = ScrapeCache(ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return _posts("slow")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("#slow", fetch)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5 and all(r == results[0] for r in results)
+
+
+def test_sqlite_store_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scrapes.db")
+        first = ScrapeCache(ttl=60, db_path=path)
+        first.set("#a", _posts("a"))
+        first.store.close()
+
+        second = ScrapeCache(ttl=60, db_path=path)
+        assert second.get("#a") == _posts("a")
+        assert second.stats()["disk_hits"] == 1
+        second.store.close()
@@ -0,0 +1,58 @@
+# test_scrape_coordinator.py
+# Fan-out scraping: partial results, per-query timeouts, error statuses and the shared executor.
+import time
+import threading
+
+from backend import scrape_coordinator
+from backend.deadline import DeadlineExceeded
+from backend.rate_limiter import CircuitOpen
+from backend.scrape_coordinator import iter_scrape, scrape_many, ScrapeError
+
+
+def test_one_failing_query_leaves_the_rest():
+    def fetch(tag):
+        if tag == "#broken":
+            raise ValueError("boom")
+        return [f"{tag} post"]
+
+    results = scrape_many(["#a", "#broken", "#b", "#a"], fetch)
+    assert results.posts == {"#a": ["#a post"], "#b": ["#b post"]}
+    assert list(results.errors) == ["#broken"] and results.partial
+    error = results.errors["#broken"]
+    assert isinstance(error, ScrapeError) and error.reason == "boom" and error.status is None
+
+
+def test_statuses_follow_timeouts_and_exceptions():
+    def fetch(tag):
+        if tag == "#slow":
+            time.sleep(0.5)
+        elif tag == "#expired":
+            raise DeadlineExceeded("budget spent")
+        elif tag == "#blocked":
+            raise CircuitOpen(30)
+        elif tag == "#throttled":
+            raise TimeoutError("no slot")
+        return []
+
+    start = time.monotonic()
+    errors = {tag: error for tag, _, error in
+              iter_scrape(["#slow", "#expired", "#blocked", "#throttled", "#fine"], fetch, timeout=0.2)}
+    assert time.monotonic() - start < 0.45  # the slow query is abandoned, not awaited
+    assert errors["#slow"].reason == "timed out after 0s" and errors["#slow"].status == 504
+    assert errors["#expired"].status == 504 and errors["#throttled"].status == 504
+    assert errors["#blocked"].status == 503 and errors["#fine"] is None
+
+
+def test_queries_share_one_executor_across_calls():
+    threads = set()
+
+    def fetch(tag):
+        threads.add(threading.current_thread().name)
+        return [tag]
+
+    executor = scrape_coordinator._get_executor()
+    for _ in range(3):
+        assert scrape_many([f"#t{i}" for i in range(4)], fetch).posts.keys() == {"#t0", "#t1", "#t2", "#t3"}
+    assert scrape_coordinator._get_executor() is executor
+    assert all(name.startswith("scrape") for name in threads)
+    assert len(threads) <= scrape_coordinator.SCRAPE_CONCURRENCY
@@ -0,0 +1,61 @@
+# test_streaming_training.py
+# Streaming training from the scrape store: interrupt, resume, and every post used exactly once.
+import json
+
+import pytest
+
+from backend import train_model
+from backend.scrape_cache import SQLiteStore
+from backend.train_model import iter_scrape_store_posts, train_streaming
+
+ITER_CHUNKS = train_model.iter_chunks
+
+
+def _store(path, entries):
+    store = SQLiteStore(str(path))
+    for key, (stored_at, titles) in entries.items():
+        store.put(key, json.dumps([{"title": t, "snippet": "", "label": i % 2} for i, t in enumerate(titles)]),
+                  stored_at)
+    return store
+
+
+def _train(monkeypatch, db, checkpoint, used, resume=False, stop_after=None):
+    """Run train_streaming, recording the posts of each chunk it trains on; stop_after interrupts before that chunk"""
+    def recording_chunks(source, size):
+        for n, (posts, position) in enumerate(ITER_CHUNKS(source, size)):
+            if n == stop_after:
+                raise KeyboardInterrupt
+            used.extend(p["title"] for p in posts)
+            yield posts, position
+
+    monkeypatch.setattr(train_model, "iter_chunks", recording_chunks)
+    return train_streaming(lambda position: iter_scrape_store_posts(db, position), chunk_size=3,
+                           checkpoint_path=checkpoint, checkpoint_every=1, resume=resume, n_features=2 ** 10)
+
+
+def test_interrupted_run_resumes_without_skipping_or_repeating(tmp_path, monkeypatch):
+    db, checkpoint = str(tmp_path / "scrapes.db"), str(tmp_path / "ckpt.joblib")
+    store = _store(db, {"#a": (1.0, ["a0", "a1", "a2", "a3"]),
+                        "#b": (2.0, ["b0", "b1", "b2", "b3"]),
+                        "#c": (3.0, ["c0", "c1", "c2", "c3"])})
+    used = []
+    with pytest.raises(KeyboardInterrupt):
+        _train(monkeypatch, db, checkpoint, used, stop_after=3)
+    done = ["a0", "a1", "a2", "a3", "b0", "b1", "b2", "b3", "c0"]
+    assert used == done  # stopped one post into #c
+
+    # Meanwhile the app re-scrapes #c (being read) and #a (done). INSERT OR REPLACE hands the
+    # new #c the rowid the old one had (it was the last row), and #a a new one at the end
+    _store(db, {"#c": (4.0, ["c-new0", "c-new1", "c-new2"]), "#a": (5.0, ["a-new"])}).close()
+    store.close()
+
+    result = _train(monkeypatch, db, checkpoint, used, resume=True)
+    assert used == done + ["c-new0", "c-new1", "c-new2", "a-new"]
+    assert result["state"]["seen"] == len(used)
+
+
+def test_old_checkpoint_positions_are_rejected(tmp_path):
+    db = str(tmp_path / "scrapes.db")
+    _store(db, {"#a": (1.0, ["a0"])}).close()
+    with pytest.raises(ValueError):
+        next(iter_scrape_store_posts(db, (1, 1)))
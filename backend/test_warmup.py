@@ -0,0 +1,50 @@
+# test_warmup.py
+import os
+import sys
+import json
+import subprocess
+
+from backend.warmup import Warmup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_steps_run_once_and_failures_are_recorded():
+    calls = []
+
+    def broken():
+        raise RuntimeError("no chrome")
+
+    warmup = Warmup([("a", lambda: calls.append("a")), ("broken", broken)])
+    warmup.add("b", lambda: calls.append("b"))
+    assert not warmup.ready and warmup.status()["steps"] == {"a": None, "broken": None, "b": None}
+
+    assert warmup.start() and warmup.wait(5)
+    assert not warmup.start() and not warmup.run()  # already ran
+    status = warmup.status()
+    assert calls == ["a", "b"] and status["ready"]
+    assert status["errors"] == {"broken": "no chrome"} and set(status["steps"]) == {"a", "broken", "b"}
+
+
+def test_app_imports_without_heavy_stacks_and_reports_ready_with_refresher_running():
+    code = """
+import sys, json
+import app
+heavy = sorted(m for m in ("sklearn", "scipy", "joblib", "selenium", "webdriver_manager", "bs4") if m in sys.modules)
+client = app.app.test_client()
+first = client.get("/ready").status_code
+app.warmup.wait(60)
+second = client.get("/ready")
+refresher = app.model_refresher.status()["running"]
+app.model_refresher.stop()
+print(json.dumps({"heavy": heavy, "first": first, "second": second.status_code, "body": second.get_json(),
+                  "refresher": refresher}))
+"""
+    env = dict(os.environ, WARMUP_BROWSERS="false")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["heavy"] == []
+    assert result["first"] == 503 and result["second"] == 200
+    assert result["body"]["errors"] == {} and "ml_stack" in result["body"]["steps"]
+    assert result["refresher"]  # started by warm-up, so it runs under a WSGI server too
@@ -1,20 +1,42 @@
 #!/usr/bin/env python3
 # train_model.py
 # Automatically scrapes real Reddit data, labels it using heuristics, and trains the model
-
-import joblib
+#
+# Usage:
+#   python train_model.py                               scrape, label and train in memory
+#   python train_model.py --stream posts/*.jsonl        stream a large corpus out of core
+#   python train_model.py --scrape-store scrapes.db     stream the app's persistent scrape cache
+#   python train_model.py --stream ... --resume         continue from the last checkpoint
+#   python train_model.py --select --folds 5            cross-validate a settings grid, train the pick
+
+import os
+import json
+import time
+import sqlite3
+import argparse
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from scipy.sparse import hstack
-from features import build_feature_matrix, TextVectorizer, clickbait_score, SUBREDDIT_RISK, MISINFO_KEYWORDS
-from google_scraper import search_reddit_by_hashtag
+
+try:
+    from backend.features import build_feature_matrix, post_texts, TextVectorizer, HashingTextVectorizer, clickbait_score, SUBREDDIT_RISK, MISINFO_KEYWORDS
+    from backend.google_scraper import search_reddit_by_hashtag
+    from backend.rate_limiter import CircuitOpen, PRIORITY_TRAINING
+    from backend.metrics import time_stage
+    from backend.post_batch import PostBatch
+    from backend.model_artifacts import save_artifacts, MODEL_ARTIFACT_DIR
+except ImportError:
+    from features import build_feature_matrix, post_texts, TextVectorizer, HashingTextVectorizer, clickbait_score, SUBREDDIT_RISK, MISINFO_KEYWORDS
+    from google_scraper import search_reddit_by_hashtag
+    from rate_limiter import CircuitOpen, PRIORITY_TRAINING
+    from metrics import time_stage
+    from post_batch import PostBatch
+    from model_artifacts import save_artifacts, MODEL_ARTIFACT_DIR
 
 def auto_label_post(post):
     """
     Automatically label a post as misinformation (1) or normal (0) using heuristics
     """
     text = f"{post.get('title', '')} {post.get('snippet', '')}".lower()
-    subreddit = post.get('subreddit', '').lower()
+    subreddit = (post.get('subreddit') or '').lower()
 
     # Score based on multiple factors
     score = 0
@@ -63,40 +85,323 @@ def scrape_training_data():
 
     all_records = []
     all_labels = []
+    # Shared across hashtags so a post returned for several of them is kept once
+    seen_urls = set()
+
+    # Requests go through the shared rate limiter at training priority, so a running
+    # web app's user-facing scrapes are served first
+    for heading, hashtags in (("misinformation-prone", misinfo_hashtags), ("normal", normal_hashtags)):
+        print(f"\nScraping {heading} hashtags...")
+        for hashtag in hashtags:
+            print(f"  Searching {hashtag}...")
+            try:
+                posts = search_reddit_by_hashtag(hashtag, num_results=15, seen_urls=seen_urls,
+                                                 priority=PRIORITY_TRAINING)
+                all_records.append(posts)
+                for post in posts:
+                    all_labels.append(auto_label_post(post))
+                print(f"    ✓ Found {len(posts)} posts")
+            except CircuitOpen as e:
+                # The endpoint keeps blocking us; more requests would only extend the block
+                print(f"    ✗ {e} - stopping")
+                return PostBatch.concat(all_records), np.array(all_labels)
+            except Exception as e:
+                print(f"    ✗ Error: {e}")
+
+    # One columnar batch for the whole corpus instead of a dict per post
+    return PostBatch.concat(all_records), np.array(all_labels)
+
+
+# LogisticRegression settings used unless overridden (e.g. by --select)
+CLASSIFIER_DEFAULTS = {"max_iter": 1000, "random_state": 42, "class_weight": "balanced"}
+
+
+def make_classifier(params=None):
+    """LogisticRegression with CLASSIFIER_DEFAULTS updated by params"""
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(**dict(CLASSIFIER_DEFAULTS, **(params or {})))
+
+
+def fit_model(records, labels, engineered=None, vectorizer_params=None, clf_params=None):
+    """
+    Build features and fit the classifier.
+    Accuracy is measured on a stratified 80/20 split when there are at least 10
+    samples, then the model is refit on everything for production use.
+    engineered: optional precomputed engineered_features(records) (see PostStore)
+    vectorizer_params / clf_params: TextVectorizer and LogisticRegression settings
+    (defaults when None), e.g. the pick of model_selection.select_model
+    Returns dict: {clf, vectorizer, train_acc, test_acc, n_samples}
+    """
+    # sklearn is imported on first training, not when the web app imports this module
+    from sklearn.model_selection import train_test_split
 
-    print("\nScraping misinformation-prone hashtags...")
-    for hashtag in misinfo_hashtags:
-        print(f"  Searching {hashtag}...")
-        try:
-            posts = search_reddit_by_hashtag(hashtag, num_results=15)
-            for post in posts:
-                label = auto_label_post(post)
-                all_records.append(post)
-                all_labels.append(label)
-            print(f"    ✓ Found {len(posts)} posts")
-        except Exception as e:
-            print(f"    ✗ Error: {e}")
-
-    print("\nScraping normal hashtags...")
-    for hashtag in normal_hashtags:
-        print(f"  Searching {hashtag}...")
-        try:
-            posts = search_reddit_by_hashtag(hashtag, num_results=15)
-            for post in posts:
-                label = auto_label_post(post)
-                all_records.append(post)
-                all_labels.append(label)
-            print(f"    ✓ Found {len(posts)} posts")
-        except Exception as e:
-            print(f"    ✗ Error: {e}")
-
-    return all_records, np.array(all_labels)
-
-
-def main():
+    labels = np.asarray(labels)
+    with time_stage("train_features"):
+        vectorizer = None
+        if vectorizer_params is not None:
+            vectorizer = TextVectorizer(**vectorizer_params).fit(post_texts(records))
+        # float64: lbfgs would copy float32 input back to float64
+        X, _, vectorizer = build_feature_matrix(records, vectorizer=vectorizer, engineered=engineered, combine=True)
+
+    clf = make_classifier(clf_params)
+    with time_stage("fit"):
+        if len(records) >= 10:
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, labels, test_size=0.2, random_state=42, stratify=labels
+            )
+            clf.fit(X_train, y_train)
+            train_acc = clf.score(X_train, y_train)
+            test_acc = clf.score(X_test, y_test)
+            clf.fit(X, labels)  # Train on all data for production use
+        else:
+            # Not enough data for a split; fit and score on all of it
+            clf.fit(X, labels)
+            train_acc = test_acc = clf.score(X, labels)
+    return {
+        "clf": clf,
+        "vectorizer": vectorizer,
+        "train_acc": train_acc,
+        "test_acc": test_acc,
+        "n_samples": len(records),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Streaming (out-of-core) training
+# ---------------------------------------------------------------------------
+
+STREAM_CLASSES = np.array([0, 1])
+
+
+def iter_jsonl_posts(paths, start=None):
+    """
+    Yield (post, position) from JSONL files, one post per line.
+    position = (file_index, byte_offset) to resume reading after that post.
+    """
+    file_index, offset = start or (0, 0)
+    for i in range(file_index, len(paths)):
+        with open(paths[i], "rb") as f:
+            if i == file_index and offset:
+                f.seek(offset)
+            for line in iter(f.readline, b""):
+                if line.strip():
+                    yield json.loads(line), (i, f.tell())
+
+
+def iter_scrape_store_posts(db_path, start=None):
+    """
+    Yield (post, position) from the scrape cache's SQLite store (see scrape_cache.py).
+    position = (stored_at, key, index) to resume after that post; each post gets its hashtag.
+    Entries are read in (stored_at, key) order rather than by rowid: the store writes
+    with INSERT OR REPLACE, which gives a re-scraped entry a new (possibly reused)
+    rowid. A re-scrape always moves past the resume position, so its posts are read once.
+    """
+    if start is not None and len(start) != 3:
+        raise ValueError("Checkpoint position is from an older scrape-store format; start without --resume")
+    stored_start, key_start, index_start = start or (float("-inf"), "", 0)
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT stored_at, key, data FROM scrape_cache"
+            " WHERE stored_at > ? OR (stored_at = ? AND key >= ?) ORDER BY stored_at, key",
+            (stored_start, stored_start, key_start)
+        )
+        for stored_at, key, data in rows:
+            posts = json.loads(data)
+            first = index_start if (stored_at, key) == (stored_start, key_start) else 0
+            for j in range(first, len(posts)):
+                post = dict(posts[j])
+                post.setdefault("hashtag", key)
+                yield post, (stored_at, key, j + 1)
+    finally:
+        conn.close()
+
+
+def iter_chunks(source, chunk_size):
+    """Group (post, position) pairs into (posts, position_after_last_post) chunks"""
+    chunk, position = [], None
+    for post, position in source:
+        chunk.append(post)
+        if len(chunk) >= chunk_size:
+            yield chunk, position
+            chunk = []
+    if chunk:
+        yield chunk, position
+
+
+def stream_label(post):
+    """Use an explicit 0/1 label when the corpus has one, otherwise the heuristics"""
+    label = post.get("label")
+    return int(label) if label is not None else auto_label_post(post)
+
+
+def _save_checkpoint(path, clf, state, n_features):
+    import joblib
+
+    tmp = path + ".tmp"
+    joblib.dump({"clf": clf, "state": state, "n_features": n_features}, tmp)
+    os.replace(tmp, path)  # never leave a half-written checkpoint behind
+
+
+def train_streaming(open_source, chunk_size=5000, checkpoint_path=None, checkpoint_every=10,
+                    resume=False, n_features=2 ** 20):
+    """
+    Train on an arbitrarily large corpus with bounded memory.
+
+    open_source(position) must return an iterator of (post, position) starting
+    after position (None = from the beginning). Each chunk is hashed (no
+    vocabulary), scored for progressive validation, then fed to an SGD
+    logistic regression via partial_fit. The model and read position are
+    checkpointed every checkpoint_every chunks, so an interrupted run can
+    resume where it stopped.
+    Returns dict: {clf, vectorizer, state}
+    """
+    import joblib
+    from sklearn.linear_model import SGDClassifier
+
+    vectorizer = HashingTextVectorizer(n_features=n_features)
+    state = {"position": None, "chunks": 0, "seen": 0, "positives": 0, "scored": 0, "correct": 0}
+    clf = SGDClassifier(loss="log_loss", alpha=1e-6, random_state=42)
+
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        checkpoint = joblib.load(checkpoint_path)
+        if checkpoint["n_features"] != n_features:
+            raise ValueError("Checkpoint was trained with a different n_features")
+        clf, state = checkpoint["clf"], checkpoint["state"]
+        print(f"  Resuming after {state['seen']} posts ({state['chunks']} chunks)")
+
+    start = time.time()
+    for posts, position in iter_chunks(open_source(state["position"]), chunk_size):
+        labels = np.array([stream_label(p) for p in posts])
+        X, _, _ = build_feature_matrix(posts, vectorizer=vectorizer, combine=True)
+
+        # Progressive validation: score each chunk before learning from it
+        if state["chunks"] > 0:
+            state["correct"] += int((clf.predict(X) == labels).sum())
+            state["scored"] += len(labels)
+
+        clf.partial_fit(X, labels, classes=STREAM_CLASSES)
+        state["chunks"] += 1
+        state["seen"] += len(labels)
+        state["positives"] += int(labels.sum())
+        state["position"] = position
+
+        if state["chunks"] % 10 == 0:
+            rate = state["seen"] / max(time.time() - start, 1e-9)
+            print(f"  {state['seen']} posts, {state['chunks']} chunks ({rate:.0f} posts/s)")
+        if checkpoint_path and state["chunks"] % checkpoint_every == 0:
+            _save_checkpoint(checkpoint_path, clf, state, n_features)
+
+    if checkpoint_path and state["chunks"]:
+        _save_checkpoint(checkpoint_path, clf, state, n_features)
+    return {"clf": clf, "vectorizer": vectorizer, "state": state}
+
+
+def stream_main(args):
+    """Streaming training entry point (--stream / --scrape-store)"""
+    import joblib
+
+    print("\n" + "=" * 60)
+    print("STREAMING MODEL TRAINING")
+    print("=" * 60)
+
+    if args.scrape_store:
+        print(f"\nStreaming posts from scrape store {args.scrape_store}...")
+        open_source = lambda position: iter_scrape_store_posts(args.scrape_store, position)
+    else:
+        print(f"\nStreaming posts from {len(args.stream)} JSONL file(s)...")
+        open_source = lambda position: iter_jsonl_posts(args.stream, position)
+
+    result = train_streaming(
+        open_source,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+        n_features=args.n_features,
+    )
+    state = result["state"]
+    if state["seen"] == 0:
+        print("⚠️  No posts found - nothing trained")
+        return
+
+    print(f"\n✓ Trained on {state['seen']} posts ({state['positives']} labeled misinformation)")
+    if state["scored"]:
+        print(f"✓ Progressive validation accuracy: {state['correct'] / state['scored'] * 100:.1f}%")
+
+    joblib.dump(result["clf"], "misinfo_sgd_model.joblib")
+    result["vectorizer"].save("hashing_vectorizer.joblib")
+    print("✓ Model saved: misinfo_sgd_model.joblib")
+    print("✓ Vectorizer saved: hashing_vectorizer.joblib")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the misinformation classifier")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--stream", nargs="+", metavar="JSONL",
+                        help="stream posts from JSONL files instead of scraping")
+    source.add_argument("--scrape-store", metavar="DB",
+                        help="stream posts from the app's SQLite scrape cache (SCRAPE_CACHE_DB)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="posts per partial_fit chunk")
+    parser.add_argument("--n-features", type=int, default=2 ** 20, help="hashing vectorizer width")
+    parser.add_argument("--checkpoint", default="stream_checkpoint.joblib",
+                        help="checkpoint file for streaming mode")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="chunks between checkpoints")
+    parser.add_argument("--resume", action="store_true", help="resume streaming from the checkpoint")
+    parser.add_argument("--select", action="store_true",
+                        help="cross-validate a grid of vectorizer/classifier settings and train the pick")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds for --select")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for --select (default: all cores)")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="--select picks the fastest candidate at least this accurate "
+                             "(default: within 1 point of the best)")
+    parser.add_argument("--report", default="model_selection.json", help="--select results (JSON)")
+    args = parser.parse_args(argv)
+    if args.select and (args.stream or args.scrape_store):
+        parser.error("--select only applies to in-memory training")
+    return args
+
+
+def select_main(records, labels, args):
+    """Model selection for --select: print the candidates, write the report, return the pick's settings"""
+    try:
+        from backend.model_selection import select_model, choose_candidate
+    except ImportError:
+        from model_selection import select_model, choose_candidate
+
+    print(f"\nSelecting model settings ({args.folds}-fold cross-validation)...")
+    report = select_model(records, labels, folds=args.folds, workers=args.workers)
+    print(f"✓ {len(report['candidates'])} candidates on {report['folds']} folds "
+          f"with {report['workers']} workers in {report['elapsed_seconds']:.1f}s")
+    print(f"  {'accuracy':>9} {'fit s':>8} {'predict s':>10}  settings")
+    for c in report["candidates"]:
+        print(f"  {c['accuracy'] * 100:8.1f}% {c['fit_seconds']:8.3f} {c['predict_seconds']:10.4f}  "
+              f"{json.dumps(c['vectorizer'])} {json.dumps(c['classifier'])}")
+
+    chosen = choose_candidate(report["candidates"], min_accuracy=args.min_accuracy)
+    if args.min_accuracy is not None and chosen["accuracy"] < args.min_accuracy:
+        print(f"⚠️  No candidate reached {args.min_accuracy * 100:.1f}% - using the most accurate")
+    print(f"✓ Picked {json.dumps(chosen['vectorizer'])} {json.dumps(chosen['classifier'])} "
+          f"({chosen['accuracy'] * 100:.1f}% cross-validated)")
+
+    report["chosen"] = chosen
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Report saved: {args.report}")
+    return chosen["vectorizer"], chosen["classifier"]
+
+
+def main(argv=None):
     """
     Main training pipeline: scrape, label, train
     """
+    import joblib
+
+    args = parse_args(argv)
+    if args.stream or args.scrape_store:
+        return stream_main(args)
+
     print("\n" + "=" * 60)
     print("AUTOMATED MODEL TRAINING")
     print("=" * 60)
@@ -137,42 +442,35 @@ def main():
     print(f"  - Auto-labeled as misinformation: {misinfo_count}")
     print(f"  - Auto-labeled as normal: {normal_count}")
 
-    # Step 2: Build features
-    print("\nStep 2: Extracting features...")
-    X_text, X_eng, vectorizer = build_feature_matrix(records, vectorizer=None)
-    X = hstack([X_text, X_eng])
-    print(f"✓ Feature matrix shape: {X.shape}")
-
-    # Step 3: Split data into train and test sets
-    print("\nStep 3: Splitting data into train/test sets...")
-    from sklearn.model_selection import train_test_split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, labels, test_size=0.2, random_state=42, stratify=labels
-    )
-    print(f"✓ Training samples: {X_train.shape[0]}")
-    print(f"✓ Test samples: {X_test.shape[0]}")
+    vectorizer_params = clf_params = None
+    if args.select:
+        vectorizer_params, clf_params = select_main(records, labels, args)
 
-    # Step 4: Train model
-    print("\nStep 4: Training Logistic Regression model...")
-    clf = LogisticRegression(max_iter=1000, random_state=42, class_weight='balanced')
-    clf.fit(X_train, y_train)
+    # Step 2-4: Build features, split 80/20 and train
+    print("\nStep 2: Extracting features and training Logistic Regression model...")
+    model = fit_model(records, labels, vectorizer_params=vectorizer_params, clf_params=clf_params)
+    clf, vectorizer = model["clf"], model["vectorizer"]
+    train_acc, test_acc = model["train_acc"], model["test_acc"]
+    print(f"✓ Training samples: {model['n_samples']}")
 
     # Show accuracy on both train and test
-    train_acc = clf.score(X_train, y_train)
-    test_acc = clf.score(X_test, y_test)
     print(f"✓ Training accuracy: {train_acc * 100:.1f}%")
     print(f"✓ Test accuracy: {test_acc * 100:.1f}%")
 
     if train_acc > test_acc + 0.15:
         print(f"⚠️  Warning: Large gap between train and test accuracy suggests overfitting!")
 
-    # Step 5: Save model (train on full dataset for production)
-    print("\nStep 5: Re-training on full dataset and saving model...")
-    clf.fit(X, labels)  # Train on all data for production use
+    # Step 3: Save model (already re-trained on the full dataset)
+    print("\nStep 3: Saving model...")
     joblib.dump(clf, "misinfo_logreg_model.joblib")
     joblib.dump(vectorizer.tfidf, "tfidf_vectorizer.joblib")
     print("✓ Model saved: misinfo_logreg_model.joblib")
     print("✓ Vectorizer saved: tfidf_vectorizer.joblib")
+    info = {"n_samples": model["n_samples"], "test_acc": round(float(test_acc), 4)}
+    if args.select:
+        info["selected"] = {"vectorizer": vectorizer_params, "classifier": clf_params}
+    manifest = save_artifacts(clf, vectorizer, MODEL_ARTIFACT_DIR, info=info)
+    print(f"✓ Memory-mappable artifacts saved: {MODEL_ARTIFACT_DIR} (model {manifest['model_version']})")
 
     print("\n" + "=" * 60)
     print("SUCCESS! Model trained with real scraped data")
@@ -0,0 +1,79 @@
+# warmup.py
+# Runs the server's warm-up steps (imports, model loading, browser pool) and tracks readiness.
+
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Ordered warm-up steps, run once, either inline (run) or on a background
+    thread (start). Each step is a (name, fn) pair; its duration and any error
+    are recorded, and a failing step does not stop the ones after it. The
+    process is ready once every step has run.
+    """
+
+    def __init__(self, steps=()):
+        self.steps = list(steps)
+        self.import_seconds = None   # set by the app: time spent importing it
+        self.timings = {}
+        self.errors = {}
+        self.started_at = None
+        self.finished_at = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, name, fn):
+        self.steps.append((name, fn))
+
+    def run(self):
+        """Run the steps in this thread; returns False if they already ran or are running elsewhere"""
+        with self._lock:
+            claimed = self.started_at is None or threading.current_thread() is self._thread
+            if self.started_at is None:
+                self.started_at = time.time()
+        if not claimed:
+            return False
+        for name, fn in self.steps:
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                self.errors[name] = str(e)
+                logger.warning("Warm-up step %s failed: %s", name, e)
+            self.timings[name] = time.perf_counter() - start
+        self.finished_at = time.time()
+        self._ready.set()
+        return True
+
+    def start(self):
+        """Run the steps on a daemon thread; safe to call repeatedly"""
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+        return True
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "started": self.started_at is not None,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "warmup_seconds": round(self.finished_at - self.started_at, 3) if self.finished_at else None,
+            "steps": {name: round(self.timings[name], 3) if name in self.timings else None
+                      for name, _ in self.steps},
+            "errors": dict(self.errors),
+        }